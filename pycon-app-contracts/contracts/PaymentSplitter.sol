@@ -2,10 +2,29 @@
 pragma solidity ^0.8.0;
 
 contract PaymentSplitter {
+    // A recipient's share in basis points and the amount it works out to,
+    // computed once in createPayment; one slot, like the percentage it replaces
+    struct Share {
+        uint240 amount;
+        uint16 basisPoints;
+    }
+    
     struct Payment {
         string description;
         address[] recipients;
-        uint256[] percentages;
+        Share[] shares;
+        uint256 totalAmount;
+        uint256 collectedAmount;
+        bool isActive;
+        address creator;
+    }
+    
+    // Listing view of a payment, without the recipient arrays. Fields 0 and
+    // 3-6 are at the same positions as in getPayment()'s return values.
+    struct PaymentSummary {
+        string description;
+        uint256 id;
+        uint256 recipientCount;
         uint256 totalAmount;
         uint256 collectedAmount;
         bool isActive;
@@ -33,6 +52,21 @@ contract PaymentSplitter {
     
     event PaymentCompleted(uint256 indexed paymentId);
     
+    event Refunded(
+        uint256 indexed paymentId, 
+        address contributor, 
+        uint256 amount
+    );
+    
+    // Completed payments pay out exactly totalAmount: contributions past it are
+    // refunded and the rounding dust goes to the last recipient. Read by the app
+    // to tell this from earlier deployments, which keep both in the contract.
+    bool public constant REFUNDS_OVERPAYMENT = true;
+    
+    // Percentages are in basis points and add up to SHARE_DENOMINATOR. Read
+    // by the app; earlier deployments have no such constant and use 100.
+    uint256 public constant SHARE_DENOMINATOR = 10000;
+    
     // Create a new payment split
     function createPayment(
         string memory _description,
@@ -43,23 +77,30 @@ contract PaymentSplitter {
         require(_recipients.length == _percentages.length, "Mismatched arrays");
         require(_recipients.length > 0, "Need at least one recipient");
         require(_totalAmount > 0, "Amount must be greater than 0");
+        require(_totalAmount <= type(uint128).max, "Amount too large");
+        
+        Payment storage payment = payments[nextPaymentId];
+        payment.description = _description;
+        payment.recipients = _recipients;
+        payment.totalAmount = _totalAmount;
+        payment.isActive = true;
+        payment.creator = msg.sender;
         
-        // Check percentages add up to 100
-        uint256 totalPercentage = 0;
+        // Check the shares add up to SHARE_DENOMINATOR while working out each
+        // amount; the last recipient gets the rounding dust of the others.
+        // The running total never passes SHARE_DENOMINATOR, so neither does
+        // `allocated` pass _totalAmount.
+        uint256 totalBasisPoints = 0;
+        uint256 allocated = 0;
+        uint256 last = _percentages.length - 1;
         for (uint i = 0; i < _percentages.length; i++) {
-            totalPercentage += _percentages[i];
+            totalBasisPoints += _percentages[i];
+            require(totalBasisPoints <= SHARE_DENOMINATOR, "Shares must add up to 10000 basis points");
+            uint256 amount = i < last ? (_totalAmount * _percentages[i]) / SHARE_DENOMINATOR : _totalAmount - allocated;
+            allocated += amount;
+            payment.shares.push(Share(uint240(amount), uint16(_percentages[i])));
         }
-        require(totalPercentage == 100, "Percentages must add up to 100");
-        
-        payments[nextPaymentId] = Payment({
-            description: _description,
-            recipients: _recipients,
-            percentages: _percentages,
-            totalAmount: _totalAmount,
-            collectedAmount: 0,
-            isActive: true,
-            creator: msg.sender
-        });
+        require(totalBasisPoints == SHARE_DENOMINATOR, "Shares must add up to 10000 basis points");
         
         emit PaymentCreated(nextPaymentId, _description, msg.sender, _totalAmount);
         nextPaymentId++;
@@ -72,29 +113,45 @@ contract PaymentSplitter {
         require(!hasPaid[_paymentId][msg.sender], "Already paid");
         require(msg.value > 0, "Must send some CELO");
         
-        contributions[_paymentId][msg.sender] = msg.value;
+        // Accept up to what is still missing; the rest goes back to the sender
+        uint256 remaining = payment.totalAmount - payment.collectedAmount;
+        uint256 accepted = msg.value < remaining ? msg.value : remaining;
+        uint256 refund = msg.value - accepted;
+        
+        contributions[_paymentId][msg.sender] = accepted;
         hasPaid[_paymentId][msg.sender] = true;
-        payment.collectedAmount += msg.value;
+        payment.collectedAmount += accepted;
         
-        emit ContributionMade(_paymentId, msg.sender, msg.value);
+        emit ContributionMade(_paymentId, msg.sender, accepted);
         
-        // Check if we've collected enough to distribute
-        if (payment.collectedAmount >= payment.totalAmount) {
+        // All state is updated before any CELO leaves the contract
+        bool completed = payment.collectedAmount == payment.totalAmount;
+        if (completed) {
+            payment.isActive = false;
+            emit PaymentCompleted(_paymentId);
+        }
+        if (refund > 0) {
+            emit Refunded(_paymentId, msg.sender, refund);
+        }
+        
+        if (completed) {
             _distributePayment(_paymentId);
         }
+        if (refund > 0) {
+            (bool sent, ) = payable(msg.sender).call{value: refund}("");
+            require(sent, "Refund failed");
+        }
     }
     
-    // Internal function to distribute payments
+    // Internal function to distribute payments: the amounts set in
+    // createPayment, which add up to exactly totalAmount
     function _distributePayment(uint256 _paymentId) internal {
         Payment storage payment = payments[_paymentId];
+        uint256 count = payment.recipients.length;
         
-        for (uint i = 0; i < payment.recipients.length; i++) {
-            uint256 amount = (payment.totalAmount * payment.percentages[i]) / 100;
-            payable(payment.recipients[i]).transfer(amount);
+        for (uint i = 0; i < count; i++) {
+            payable(payment.recipients[i]).transfer(payment.shares[i].amount);
         }
-        
-        payment.isActive = false;
-        emit PaymentCompleted(_paymentId);
     }
     
     // Get payment details
@@ -107,11 +164,16 @@ contract PaymentSplitter {
         bool isActive,
         address creator
     ) {
-        Payment memory payment = payments[_paymentId];
+        Payment storage payment = payments[_paymentId];
+        uint256 count = payment.shares.length;
+        percentages = new uint256[](count);
+        for (uint i = 0; i < count; i++) {
+            percentages[i] = payment.shares[i].basisPoints;
+        }
         return (
             payment.description,
             payment.recipients,
-            payment.percentages,
+            percentages,
             payment.totalAmount,
             payment.collectedAmount,
             payment.isActive,
@@ -119,6 +181,54 @@ contract PaymentSplitter {
         );
     }
     
+    // Summaries of payments _start to _start + _count - 1, stopping at the last payment
+    function getPayments(uint256 _start, uint256 _count) 
+        public view returns (PaymentSummary[] memory summaries) {
+        if (_start >= nextPaymentId) {
+            return new PaymentSummary[](0);
+        }
+        uint256 end = nextPaymentId;
+        if (_count < end - _start) {
+            end = _start + _count;
+        }
+        
+        summaries = new PaymentSummary[](end - _start);
+        for (uint i = _start; i < end; i++) {
+            summaries[i - _start] = _summary(i);
+        }
+    }
+    
+    // Summaries of the given payments; unknown ids give an empty summary, like getPayment
+    function getPaymentSummaries(uint256[] memory _paymentIds) 
+        public view returns (PaymentSummary[] memory summaries) {
+        summaries = new PaymentSummary[](_paymentIds.length);
+        for (uint i = 0; i < _paymentIds.length; i++) {
+            summaries[i] = _summary(_paymentIds[i]);
+        }
+    }
+    
+    function _summary(uint256 _paymentId) internal view returns (PaymentSummary memory) {
+        Payment storage payment = payments[_paymentId];
+        return PaymentSummary({
+            description: payment.description,
+            id: _paymentId,
+            recipientCount: payment.recipients.length,
+            totalAmount: payment.totalAmount,
+            collectedAmount: payment.collectedAmount,
+            isActive: payment.isActive,
+            creator: payment.creator
+        });
+    }
+    
+    // Amount each recipient is paid on completion, in recipient order
+    function getShareAmounts(uint256 _paymentId) public view returns (uint256[] memory amounts) {
+        Share[] storage shares = payments[_paymentId].shares;
+        amounts = new uint256[](shares.length);
+        for (uint i = 0; i < shares.length; i++) {
+            amounts[i] = shares[i].amount;
+        }
+    }
+    
     // Check contribution amount
     function getContribution(uint256 _paymentId, address _contributor) 
         public view returns (uint256) {
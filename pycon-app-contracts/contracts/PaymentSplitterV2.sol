@@ -0,0 +1,309 @@
+// SPDX-License-Identifier: MIT
+pragma solidity ^0.8.0;
+
+// Same interface as PaymentSplitter, with storage laid out for less gas:
+// - each recipient and its share in basis points use one slot, so amounts are
+//   worked out on payout: storing them as well would take a second slot
+// - totals, status and creator share two slots
+// - only keccak256(description) is stored; the text is in PaymentCreated
+// - "already paid" is a non-zero contribution instead of a separate mapping
+//
+// Payments made with createPullPayment settle by withdrawal: the completing
+// payInvoice only marks the payment done, at a cost independent of the
+// recipient count, and each share is paid out by its own withdraw call.
+//
+// Either way exactly totalAmount is paid out: contributions past it are
+// refunded, and the last share also receives the rounding dust.
+contract PaymentSplitterV2 {
+    struct Share {
+        address recipient;   // 20 bytes
+        uint96 basisPoints;  // 12 bytes, same slot
+    }
+
+    struct Payment {
+        bytes32 descriptionHash;
+        uint128 totalAmount;
+        uint128 collectedAmount;
+        address creator;
+        bool isActive;
+        bool pullSettlement;
+        Share[] shares;
+    }
+
+    mapping(uint256 => Payment) internal payments;
+    mapping(uint256 => mapping(address => uint256)) public contributions;
+    // One bit per share index, set once that share is withdrawn
+    mapping(uint256 => mapping(uint256 => uint256)) internal withdrawnBitmap;
+
+    uint256 public nextPaymentId;
+
+    event PaymentCreated(
+        uint256 indexed paymentId,
+        string description,
+        address creator,
+        uint256 totalAmount
+    );
+
+    event ContributionMade(
+        uint256 indexed paymentId,
+        address contributor,
+        uint256 amount
+    );
+
+    event PaymentCompleted(uint256 indexed paymentId);
+
+    event Withdrawn(
+        uint256 indexed paymentId,
+        address indexed recipient,
+        uint256 amount
+    );
+
+    event Refunded(
+        uint256 indexed paymentId,
+        address contributor,
+        uint256 amount
+    );
+
+    // See PaymentSplitter.REFUNDS_OVERPAYMENT
+    bool public constant REFUNDS_OVERPAYMENT = true;
+
+    // See PaymentSplitter.SHARE_DENOMINATOR
+    uint256 public constant SHARE_DENOMINATOR = 10000;
+
+    // Create a new payment split, paid out to every recipient on completion
+    function createPayment(
+        string calldata _description,
+        address[] calldata _recipients,
+        uint256[] calldata _percentages,
+        uint256 _totalAmount
+    ) external {
+        _createPayment(_description, _recipients, _percentages, _totalAmount, false);
+    }
+
+    // Create a new payment split whose recipients withdraw their shares
+    function createPullPayment(
+        string calldata _description,
+        address[] calldata _recipients,
+        uint256[] calldata _percentages,
+        uint256 _totalAmount
+    ) external {
+        _createPayment(_description, _recipients, _percentages, _totalAmount, true);
+    }
+
+    function _createPayment(
+        string calldata _description,
+        address[] calldata _recipients,
+        uint256[] calldata _percentages,
+        uint256 _totalAmount,
+        bool _pullSettlement
+    ) internal {
+        require(_recipients.length == _percentages.length, "Mismatched arrays");
+        require(_recipients.length > 0, "Need at least one recipient");
+        require(_totalAmount > 0, "Amount must be greater than 0");
+        require(_totalAmount <= type(uint128).max, "Amount too large");
+
+        uint256 paymentId = nextPaymentId;
+        Payment storage payment = payments[paymentId];
+
+        // Check the shares add up to SHARE_DENOMINATOR while copying them
+        uint256 totalBasisPoints = 0;
+        for (uint256 i = 0; i < _percentages.length; i++) {
+            require(_percentages[i] <= SHARE_DENOMINATOR, "Shares must add up to 10000 basis points");
+            totalBasisPoints += _percentages[i];
+            payment.shares.push(Share(_recipients[i], uint96(_percentages[i])));
+        }
+        require(totalBasisPoints == SHARE_DENOMINATOR, "Shares must add up to 10000 basis points");
+
+        payment.descriptionHash = keccak256(bytes(_description));
+        payment.totalAmount = uint128(_totalAmount);
+        payment.creator = msg.sender;
+        payment.isActive = true;
+        payment.pullSettlement = _pullSettlement;
+
+        emit PaymentCreated(paymentId, _description, msg.sender, _totalAmount);
+        nextPaymentId = paymentId + 1;
+    }
+
+    // Pay your share of the bill
+    function payInvoice(uint256 _paymentId) external payable {
+        Payment storage payment = payments[_paymentId];
+        require(payment.isActive, "Payment not active");
+        require(contributions[_paymentId][msg.sender] == 0, "Already paid");
+        require(msg.value > 0, "Must send some CELO");
+
+        // Accept up to what is still missing; the rest goes back to the sender
+        uint128 totalAmount = payment.totalAmount;
+        uint128 collectedAmount = payment.collectedAmount;
+        uint256 remaining = totalAmount - collectedAmount;
+        uint256 accepted = msg.value < remaining ? msg.value : remaining;
+        uint256 refund = msg.value - accepted;
+
+        contributions[_paymentId][msg.sender] = accepted;
+        collectedAmount += uint128(accepted);
+        payment.collectedAmount = collectedAmount;
+
+        emit ContributionMade(_paymentId, msg.sender, accepted);
+
+        // All state is updated before any CELO leaves the contract;
+        // pull payments are settled later by withdraw
+        bool completed = collectedAmount == totalAmount;
+        if (completed) {
+            payment.isActive = false;
+            emit PaymentCompleted(_paymentId);
+        }
+        if (refund > 0) {
+            emit Refunded(_paymentId, msg.sender, refund);
+        }
+
+        if (completed && !payment.pullSettlement) {
+            _distributePayment(payment);
+        }
+        if (refund > 0) {
+            (bool sent, ) = payable(msg.sender).call{value: refund}("");
+            require(sent, "Refund failed");
+        }
+    }
+
+    // Pay out share `_index` of a completed pull payment to its recipient.
+    // Anyone may call it; the CELO always goes to the recipient.
+    function withdraw(uint256 _paymentId, uint256 _index) external {
+        Payment storage payment = payments[_paymentId];
+        require(payment.pullSettlement, "Not a pull payment");
+        require(payment.creator != address(0) && !payment.isActive, "Payment not completed");
+        require(_index < payment.shares.length, "No such share");
+
+        uint256 word = _index / 256;
+        uint256 bit = 1 << (_index % 256);
+        uint256 bits = withdrawnBitmap[_paymentId][word];
+        require(bits & bit == 0, "Already withdrawn");
+        withdrawnBitmap[_paymentId][word] = bits | bit;
+
+        address recipient = payment.shares[_index].recipient;
+        uint256 amount = _shareAmount(payment, _index);
+        emit Withdrawn(_paymentId, recipient, amount);
+
+        (bool success, ) = payable(recipient).call{value: amount}("");
+        require(success, "Transfer failed");
+    }
+
+    // Internal function to distribute payments: exactly totalAmount, the
+    // last share also receives the rounding dust of the others
+    function _distributePayment(Payment storage payment) internal {
+        uint256 totalAmount = payment.totalAmount;
+        Share[] storage shares = payment.shares;
+        uint256 last = shares.length - 1;
+        uint256 distributed = 0;
+
+        for (uint256 i = 0; i < last; i++) {
+            Share memory share = shares[i];
+            uint256 amount = (totalAmount * share.basisPoints) / SHARE_DENOMINATOR;
+            distributed += amount;
+            payable(share.recipient).transfer(amount);
+        }
+        payable(shares[last].recipient).transfer(totalAmount - distributed);
+    }
+
+    // Amount of share `_index`; the last one is the total minus the others,
+    // so withdrawing it reads every share
+    function _shareAmount(Payment storage payment, uint256 _index) internal view returns (uint256 amount) {
+        uint256 totalAmount = payment.totalAmount;
+        uint256 last = payment.shares.length - 1;
+        if (_index < last) {
+            return (totalAmount * payment.shares[_index].basisPoints) / SHARE_DENOMINATOR;
+        }
+        amount = totalAmount;
+        for (uint256 i = 0; i < last; i++) {
+            amount -= (totalAmount * payment.shares[i].basisPoints) / SHARE_DENOMINATOR;
+        }
+    }
+
+    // Get payment details; the description text is in the PaymentCreated event
+    function getPayment(uint256 _paymentId) external view returns (
+        bytes32 descriptionHash,
+        address[] memory recipients,
+        uint256[] memory percentages,
+        uint256 totalAmount,
+        uint256 collectedAmount,
+        bool isActive,
+        address creator
+    ) {
+        Payment storage payment = payments[_paymentId];
+        uint256 count = payment.shares.length;
+        recipients = new address[](count);
+        percentages = new uint256[](count);
+        for (uint256 i = 0; i < count; i++) {
+            Share memory share = payment.shares[i];
+            recipients[i] = share.recipient;
+            percentages[i] = share.basisPoints;
+        }
+        return (
+            payment.descriptionHash,
+            recipients,
+            percentages,
+            payment.totalAmount,
+            payment.collectedAmount,
+            payment.isActive,
+            payment.creator
+        );
+    }
+
+    // Amount each recipient is paid on completion, in recipient order
+    function getShareAmounts(uint256 _paymentId) external view returns (uint256[] memory amounts) {
+        Payment storage payment = payments[_paymentId];
+        uint256 count = payment.shares.length;
+        amounts = new uint256[](count);
+        if (count == 0) {
+            return amounts;
+        }
+        uint256 totalAmount = payment.totalAmount;
+        uint256 allocated = 0;
+        for (uint256 i = 0; i < count - 1; i++) {
+            amounts[i] = (totalAmount * payment.shares[i].basisPoints) / SHARE_DENOMINATOR;
+            allocated += amounts[i];
+        }
+        amounts[count - 1] = totalAmount - allocated;
+    }
+
+    // Check contribution amount
+    function getContribution(uint256 _paymentId, address _contributor)
+        external view returns (uint256) {
+        return contributions[_paymentId][_contributor];
+    }
+
+    // True if the payment settles by withdrawal
+    function isPullPayment(uint256 _paymentId) external view returns (bool) {
+        return payments[_paymentId].pullSettlement;
+    }
+
+    // True once share `_index` has been withdrawn
+    function withdrawn(uint256 _paymentId, uint256 _index) public view returns (bool) {
+        return withdrawnBitmap[_paymentId][_index / 256] & (1 << (_index % 256)) != 0;
+    }
+
+    // Total paid out so far: every share on push payments once completed,
+    // the withdrawn shares on pull payments
+    function releasedAmount(uint256 _paymentId) external view returns (uint256 released) {
+        Payment storage payment = payments[_paymentId];
+        if (payment.isActive || payment.creator == address(0)) {
+            return 0;
+        }
+        uint256 totalAmount = payment.totalAmount;
+        uint256 last = payment.shares.length - 1;
+        uint256 others = 0;
+        for (uint256 i = 0; i < last; i++) {
+            uint256 amount = (totalAmount * payment.shares[i].basisPoints) / SHARE_DENOMINATOR;
+            others += amount;
+            if (!payment.pullSettlement || withdrawn(_paymentId, i)) {
+                released += amount;
+            }
+        }
+        if (!payment.pullSettlement || withdrawn(_paymentId, last)) {
+            released += totalAmount - others;
+        }
+    }
+
+    // Contributions are always > 0, so a recorded one means the contributor paid
+    function hasPaid(uint256 _paymentId, address _contributor) external view returns (bool) {
+        return contributions[_paymentId][_contributor] != 0;
+    }
+}
@@ -5,9 +5,17 @@ Shows a complete workflow example
 """
 
 import os
-from brownie import PaymentSplitter, accounts, network, Wei
+from brownie import PaymentSplitter, accounts, chain, network, web3, Wei
 from dotenv import load_dotenv
 
+from scripts.shares import format_percent, share_denominator
+from scripts.tx_pipeline import TxPipeline
+
+# Gas limit for payInvoice, enough for the call that distributes to all 4 recipients.
+# Set up front because the contributors pay at once, so whichever call
+# completes the split cannot be known when estimating.
+PAY_INVOICE_GAS = 300000
+
 def main():
     """Demo the complete payment splitter workflow"""
     
@@ -54,19 +62,30 @@ def main():
         "0x90F79bf6EB2c4f870365E785982E1f101E93b906",  # Carol
         "0x15d34AAf54267DB7D7c367839AAf71A00a2C6A65"   # David
     ]
-    percentages = [30, 25, 25, 20]  # Must add up to 100
+    percentages = [3000, 2500, 2500, 2000]  # Basis points, must add up to 10000
     total_amount = Wei("0.05 ether")  # 0.05 CELO
     
-    tx = payment_splitter.createPayment(
-        description,
-        recipients,
-        percentages,
-        total_amount,
-        {"from": account}
-    )
+    # Contributors get their CELO in the same block as the split is created
+    # (in a real scenario they'd have their own CELO)
+    demo_accounts = [
+        accounts.add(),  # Contributor 1
+        accounts.add(),  # Contributor 2
+        accounts.add(),  # Contributor 3
+    ]
+    contributions = [Wei("0.015 ether"), Wei("0.0125 ether"), Wei("0.0125 ether")]  # Partial payments
+    gas_budget = PAY_INVOICE_GAS * web3.eth.gas_price
+    
+    with TxPipeline(web3, account) as pipeline:
+        created = pipeline.transact(payment_splitter, 'createPayment', description, recipients, percentages, total_amount)
+        for contributor, contribution in zip(demo_accounts, contributions):
+            pipeline.submit({"to": contributor.address, "value": contribution + gas_budget, "gas": 21000})
+        print(f"⏳ Sent createPayment and {len(demo_accounts)} funding transfers, waiting for receipts...")
+        created.wait()
     
+    tx = chain.get_transaction(created.tx_hash)
     payment_id = tx.events['PaymentCreated']['paymentId']
     print(f"✅ Payment split created! ID: {payment_id}")
+    print(f"✅ Funded {len(demo_accounts)} contributors")
     
     # Step 3: Show payment details
     print(f"\n📋 PAYMENT DETAILS:")
@@ -77,44 +96,40 @@ def main():
     print(f"Status: {'Active' if payment[5] else 'Completed'}")
     
     print(f"\n👥 Recipients:")
+    denominator = share_denominator(payment_splitter)
     for i, recipient in enumerate(payment[1]):
-        celo_amount = payment[3] * payment[2][i] / (100 * 1e18)
-        print(f"  {recipient[:6]}...: {payment[2][i]}% ({celo_amount:.4f} CELO)")
+        celo_amount = payment[3] * payment[2][i] / (denominator * 1e18)
+        print(f"  {recipient[:6]}...: {format_percent(payment[2][i], denominator)}% ({celo_amount:.4f} CELO)")
     
     # Step 4: Simulate payments
     print(f"\n💸 STEP 3: Simulating payments...")
-    
-    # Create additional accounts for demo
-    demo_accounts = [
-        accounts.add(),  # Contributor 1
-        accounts.add(),  # Contributor 2
-        accounts.add(),  # Contributor 3
-    ]
-    
-    # Fund demo accounts (in real scenario, they'd have their own CELO)
-    print(f"Note: In real scenario, contributors would have their own CELO")
-    print(f"For demo, we'll simulate payments from the main account")
-    
-    # Simulate payments
-    contributions = [0.015, 0.0125, 0.0125]  # Partial payments
-    
-    for i, contribution in enumerate(contributions):
-        print(f"\n💰 Payment {i+1}: {contribution} CELO")
-        
-        try:
-            tx = payment_splitter.payInvoice(
-                payment_id,
-                {"from": account, "value": Wei(f"{contribution} ether")}
-            )
-            print(f"✅ Payment successful! TX: {tx.txid}")
-            
-            # Check if payment completed
-            if 'PaymentCompleted' in tx.events:
-                print(f"🎉 PAYMENT COMPLETED! All recipients paid!")
-                break
+    print(f"All contributors pay at the same time, so this takes one block")
+    
+    pipelines = [TxPipeline(web3, contributor) for contributor in demo_accounts]
+    try:
+        payments = [
+            pipeline.transact(payment_splitter, 'payInvoice', payment_id, value=contribution, gas=PAY_INVOICE_GAS)
+            for pipeline, contribution in zip(pipelines, contributions)
+        ]
+        for i, (pending, contribution) in enumerate(zip(payments, contributions)):
+            print(f"\n💰 Payment {i+1}: {contribution / 1e18} CELO")
+            try:
+                pending.wait()
+                tx = chain.get_transaction(pending.tx_hash)
+                if tx.status != 1:
+                    print(f"❌ Payment failed: {tx.revert_msg}")
+                    continue
+                print(f"✅ Payment successful! TX: {tx.txid}")
                 
-        except Exception as e:
-            print(f"❌ Payment failed: {str(e)}")
+                # Check if payment completed
+                if 'PaymentCompleted' in tx.events:
+                    print(f"🎉 PAYMENT COMPLETED! All recipients paid!")
+                    
+            except Exception as e:
+                print(f"❌ Payment failed: {str(e)}")
+    finally:
+        for pipeline in pipelines:
+            pipeline.close()
     
     # Final status
     print(f"\n📊 FINAL STATUS:")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Bulk Create Benchmark for Payment Splitter DApp
+createPayment throughput: one transaction per receipt vs pipelined nonces
+Run on a local chain: brownie run bench_bulk_create --network development
+"""
+
+import os
+import time
+
+from brownie import PaymentSplitter, accounts, network, Wei
+
+from scripts.bulk_create_payments import submit_payments
+from scripts.shares import even_split
+
+ROWS = int(os.getenv("BENCH_ROWS", "200"))
+WINDOWS = [1, 8, 32, 128]
+# The development chain mines on every transaction, so poll for blocks often
+POLL_INTERVAL = 0.01
+
+def make_rows(count):
+    """Synthetic manifest rows with 2-5 recipients each"""
+    rows = []
+    for i in range(count):
+        recipients = [accounts[1 + (i + j) % 9].address for j in range(2 + i % 4)]
+        percentages = even_split(len(recipients))
+        rows.append({
+            'row': i + 1,
+            'description': f"Event split #{i}",
+            'total_amount': Wei("0.05 ether"),
+            'recipients': recipients,
+            'percentages': percentages,
+            'errors': [],
+        })
+    return rows
+
+def main():
+    if network.show_active() not in ("development", "ganache-local"):
+        print("❌ Run this benchmark on a local chain: --network development")
+        return
+
+    # A local key, so transactions are signed here like in bulk_create_payments
+    sender = accounts.add()
+    accounts[0].transfer(sender, Wei("50 ether"))
+    contract = PaymentSplitter.deploy({"from": accounts[0]})
+    rows = make_rows(ROWS)
+
+    print(f"📊 createPayment throughput, {ROWS} rows")
+    print(f"{'mode':<22} | {'seconds':>8} | {'tx/s':>7}")
+    print("-" * 44)
+
+    # Baseline: what create_payment.py does per split, waiting for each receipt
+    started = time.perf_counter()
+    for row in rows:
+        contract.createPayment(row['description'], row['recipients'], row['percentages'],
+                               row['total_amount'], {"from": sender})
+    elapsed = time.perf_counter() - started
+    print(f"{'sequential (brownie)':<22} | {elapsed:>8.2f} | {ROWS / elapsed:>7.1f}")
+
+    for window in WINDOWS:
+        started = time.perf_counter()
+        results = submit_payments(contract, sender, rows, window=window, poll_interval=POLL_INTERVAL)
+        elapsed = time.perf_counter() - started
+        assert all(result['status'] == 'created' for result in results), results
+        print(f"{f'pipelined, window {window}':<22} | {elapsed:>8.2f} | {ROWS / elapsed:>7.1f}")
+
+    print(f"\n✅ {contract.nextPaymentId()} payments created")
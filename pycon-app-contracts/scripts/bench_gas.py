@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Gas Benchmark for Payment Splitter DApp
+Per-function gas of PaymentSplitter vs PaymentSplitterV2 at 1, 10 and 100 recipients,
+push vs pull settlement on V2, and the cost of each recipient in the distribution loop
+Run on a local chain: brownie run bench_gas --network development
+"""
+
+from brownie import PaymentSplitter, PaymentSplitterV2, accounts, network, Wei
+
+from scripts.shares import even_split
+
+RECIPIENT_COUNTS = [1, 10, 100]
+DESCRIPTION = "Dinner at Cafe Javas - team of 12, drinks and dessert included"
+TOTAL_AMOUNT = Wei("0.1 ether")
+# Well above the precompiles (0x01-0x09), which a 2300 gas transfer() cannot pay
+RECIPIENT_BASE = 2**100
+
+def recipients_for(count, offset):
+    """Fresh addresses, so every contract pays the same new-account transfer cost"""
+    return [f"0x{RECIPIENT_BASE + offset + i:040x}" for i in range(count)]
+
+def percentages_for(count):
+    return even_split(count)
+
+def measure(contract, count, offset):
+    """Gas used by each function for one payment with `count` recipients"""
+    recipients = recipients_for(count, offset)
+    percentages = percentages_for(count)
+    created = contract.createPayment(DESCRIPTION, recipients, percentages, TOTAL_AMOUNT, {"from": accounts[0]})
+    payment_id = created.events['PaymentCreated']['paymentId']
+
+    partial = contract.payInvoice(payment_id, {"from": accounts[1], "value": TOTAL_AMOUNT // 2})
+    completing = contract.payInvoice(payment_id, {"from": accounts[2], "value": TOTAL_AMOUNT - TOTAL_AMOUNT // 2})
+    assert 'PaymentCompleted' in completing.events
+
+    return {
+        'createPayment': created.gas_used,
+        'payInvoice': partial.gas_used,
+        'payInvoice (distributes)': completing.gas_used,
+        'getPayment (eth_call)': contract.getPayment.estimate_gas(payment_id),
+    }
+
+def measure_pull(contract, count, offset):
+    """Completing payInvoice and per-share withdraw gas of a pull payment"""
+    recipients = recipients_for(count, offset)
+    created = contract.createPullPayment(DESCRIPTION, recipients, percentages_for(count), TOTAL_AMOUNT, {"from": accounts[0]})
+    payment_id = created.events['PaymentCreated']['paymentId']
+    completing = contract.payInvoice(payment_id, {"from": accounts[2], "value": TOTAL_AMOUNT})
+    withdrawals = [contract.withdraw(payment_id, i, {"from": accounts[0]}).gas_used for i in range(count)]
+    return completing.gas_used, sum(withdrawals) // count
+
+def main():
+    if network.show_active() not in ("development", "ganache-local"):
+        print("❌ Run this benchmark on a local chain: --network development")
+        return
+
+    v1 = PaymentSplitter.deploy({"from": accounts[0]})
+    v2 = PaymentSplitterV2.deploy({"from": accounts[0]})
+    print(f"📦 Deployment: v1 {v1.tx.gas_used:,} gas, v2 {v2.tx.gas_used:,} gas")
+
+    print(f"\n📊 Gas per call")
+    print(f"{'recipients':>10} | {'function':<26} | {'v1':>10} | {'v2':>10} | {'saved':>6}")
+    print("-" * 74)
+    distributes = {}
+    for index, count in enumerate(RECIPIENT_COUNTS):
+        # Separate address ranges per contract and size
+        before = measure(v1, count, offset=index * 1000)
+        after = measure(v2, count, offset=index * 1000 + 500)
+        distributes[count] = (before['payInvoice (distributes)'], after['payInvoice (distributes)'])
+        for function, gas in before.items():
+            saved = (gas - after[function]) / gas * 100
+            print(f"{count:>10} | {function:<26} | {gas:>10,} | {after[function]:>10,} | {saved:>5.1f}%")
+        print("-" * 74)
+
+    # v1 pays the amounts stored by createPayment, v2 works each one out from basis points
+    print(f"\n📊 Distribution loop: gas per recipient past the first")
+    print(f"{'recipients':>10} | {'v1':>10} | {'v2':>10}")
+    print("-" * 36)
+    first = RECIPIENT_COUNTS[0]
+    for count in RECIPIENT_COUNTS[1:]:
+        v1_each, v2_each = ((distributes[count][i] - distributes[first][i]) // (count - first) for i in (0, 1))
+        print(f"{count:>10} | {v1_each:>10,} | {v2_each:>10,}")
+
+    print(f"\n📊 V2 settlement: completing payInvoice, push vs pull")
+    print(f"{'recipients':>10} | {'push':>10} | {'pull':>10} | {'withdraw (each)':>15}")
+    print("-" * 56)
+    for index, count in enumerate(RECIPIENT_COUNTS):
+        push = measure(v2, count, offset=10000 + index * 1000)['payInvoice (distributes)']
+        pull, withdraw = measure_pull(v2, count, offset=10000 + index * 1000 + 500)
+        print(f"{count:>10} | {push:>10,} | {pull:>10,} | {withdraw:>15,}")
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Bulk Create Payments Script for Payment Splitter DApp
+Creates many payment splits from a CSV or JSONL manifest in one run
+"""
+
+import csv
+import json
+import math
+import os
+import time
+from decimal import Decimal, InvalidOperation, localcontext
+
+from brownie import PaymentSplitter, accounts, network, web3
+from dotenv import load_dotenv
+from eth_utils import is_address, is_checksum_address, to_checksum_address
+
+from scripts.shares import SHARE_DENOMINATOR, format_percent, share_denominator, share_unit, to_basis_points
+from scripts.tx_pipeline import POLL_INTERVAL, TxPipeline
+
+# Unconfirmed transactions allowed at once
+DEFAULT_WINDOW = 32
+# Added on top of eth_estimateGas
+GAS_MARGIN = 0.2
+# Descriptions are estimated per 64-byte bucket, at the bucket's longest length
+DESCRIPTION_BUCKET = 64
+RECEIPT_TIMEOUT = 300
+
+PAYMENT_CREATED = web3.keccak(text="PaymentCreated(uint256,string,address,uint256)")
+
+def load_manifest(path, denominator=SHARE_DENOMINATOR):
+    """Rows of a .csv or .jsonl manifest, numbered from 1.
+
+    CSV columns: description, total_celo, recipients, percentages; the last
+    two are ';'-separated, percentages in steps of one share out of
+    `denominator` (0.01 in basis points). JSONL objects use the same keys,
+    with lists or ';'-separated strings.
+    """
+    with open(path, newline='') as f:
+        if path.endswith('.jsonl'):
+            raw_rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            raw_rows = list(csv.DictReader(f))
+    return [parse_row(number, raw, denominator) for number, raw in enumerate(raw_rows, start=1)]
+
+def parse_row(number, raw, denominator=SHARE_DENOMINATOR):
+    """Validate one manifest row offline; problems are listed in row['errors']"""
+    errors = []
+    description = str(raw.get('description') or '').strip()
+    if not description:
+        errors.append("description is required")
+
+    total_amount = None
+    try:
+        with localcontext() as ctx:
+            # Exact for any uint256 amount
+            ctx.prec = 100
+            total_amount = Decimal(str(raw.get('total_celo', '')).strip()) * 10**18
+        if total_amount <= 0 or total_amount != total_amount.to_integral_value():
+            raise InvalidOperation
+        total_amount = int(total_amount)
+    except InvalidOperation:
+        errors.append(f"total_celo must be a positive amount with at most 18 decimals, got {raw.get('total_celo')!r}")
+        total_amount = None
+
+    recipients = _split(raw.get('recipients'))
+    percentages = _split(raw.get('percentages'))
+    if not recipients:
+        errors.append("at least one recipient is required")
+    if len(recipients) != len(percentages):
+        errors.append(f"{len(recipients)} recipients but {len(percentages)} percentages")
+
+    for recipient in recipients:
+        if not is_address(recipient):
+            errors.append(f"{recipient} is not an address")
+        elif not is_checksum_address(recipient):
+            errors.append(f"{recipient} fails the checksum, expected {to_checksum_address(recipient)}")
+
+    shares = []
+    for percentage in percentages:
+        try:
+            shares.append(to_basis_points(percentage, denominator))
+        except ValueError:
+            unit = share_unit(denominator)
+            errors.append(f"percentage {percentage!r} must be from {unit} to 100 in steps of {unit}")
+    if len(shares) == len(percentages) and percentages and sum(shares) != denominator:
+        errors.append(f"percentages add up to {format_percent(sum(shares), denominator)}, must be 100")
+
+    return {
+        'row': number,
+        'description': description,
+        'total_amount': total_amount,
+        'recipients': recipients,
+        'percentages': shares,
+        'errors': errors,
+    }
+
+def _split(value):
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(item).strip() for item in value]
+    return [item.strip() for item in str(value).split(';') if item.strip()]
+
+def submit_payments(contract, account, rows, window=DEFAULT_WINDOW, poll_interval=POLL_INTERVAL):
+    """Send createPayment for every row with at most `window` unconfirmed at once.
+
+    Returns one result per row, in order: status is 'created' (with
+    payment_id), 'reverted', 'failed' (never sent) or 'unconfirmed'.
+    """
+    gas_limits = {}
+    results = []
+    sent = []
+    pipeline = TxPipeline(web3, account, max_in_flight=window, poll_interval=poll_interval)
+    try:
+        for row in rows:
+            result = {'row': row['row'], 'description': row['description'],
+                      'status': 'failed', 'payment_id': None, 'tx': None, 'error': None}
+            results.append(result)
+
+            args = (row['description'], row['recipients'], row['percentages'], row['total_amount'])
+            try:
+                gas = gas_limit(contract, account, gas_limits, *args)
+            except Exception as e:
+                result['error'] = f"gas estimation failed: {str(e)}"
+                continue
+            sent.append((result, pipeline.transact(contract, 'createPayment', *args, gas=gas)))
+
+        for result, pending in sent:
+            confirm(contract, result, pending)
+    finally:
+        pipeline.close()
+    return results
+
+def gas_limit(contract, account, gas_limits, description, recipients, percentages, total_amount):
+    """Estimate once per (recipient count, description bucket), for the bucket's longest description"""
+    bucket = math.ceil(len(description.encode('utf-8')) / DESCRIPTION_BUCKET)
+    key = (len(recipients), bucket)
+    if key not in gas_limits:
+        estimate = web3.eth.estimate_gas({
+            'from': account.address,
+            'to': contract.address,
+            'data': contract.createPayment.encode_input(
+                'x' * (bucket * DESCRIPTION_BUCKET), recipients, percentages, total_amount),
+        })
+        gas_limits[key] = math.ceil(estimate * (1 + GAS_MARGIN))
+    return gas_limits[key]
+
+def confirm(contract, result, pending):
+    """Wait for a receipt and record the outcome in `result`"""
+    try:
+        receipt = pending.wait(timeout=RECEIPT_TIMEOUT)
+    except TimeoutError as e:
+        result['status'] = 'unconfirmed'
+        result['error'] = str(e)
+        return
+    except Exception as e:
+        result['error'] = str(e)
+        return
+    finally:
+        if pending.tx_hash is not None:
+            result['tx'] = pending.tx_hash.hex()
+    if receipt['status'] != 1:
+        result['status'] = 'reverted'
+        return
+    for log in receipt['logs']:
+        if log['address'] == contract.address and log['topics'][0] == PAYMENT_CREATED:
+            result['payment_id'] = int.from_bytes(log['topics'][1], 'big')
+    result['status'] = 'created'
+
+def write_results(path, results):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['row', 'description', 'status', 'payment_id', 'tx', 'error'])
+        writer.writeheader()
+        writer.writerows(results)
+
+def main(manifest=None, contract_address=None, window=DEFAULT_WINDOW):
+    # Load environment variables
+    load_dotenv()
+
+    # Get account from .env file
+    if os.getenv("PRIVATE_KEY"):
+        account = accounts.add(os.getenv("PRIVATE_KEY"))
+    else:
+        print("❌ No PRIVATE_KEY found in .env file")
+        print("Run: python scripts/create_account.py first")
+        return
+
+    print(f"📦 PAYMENT SPLITTER - BULK CREATE SPLITS 📦")
+    print(f"=" * 50)
+    print(f"Creator: {account}")
+    print(f"Network: {network.show_active()}")
+
+    manifest = manifest or os.getenv("BULK_MANIFEST")
+    contract_address = contract_address or os.getenv("CONTRACT_ADDRESS")
+    if not manifest or not contract_address:
+        print("❌ Usage: brownie run bulk_create_payments main <manifest.csv|.jsonl> <contract address>")
+        return
+
+    try:
+        contract = PaymentSplitter.at(contract_address)
+        print(f"✅ Connected to contract: {contract_address}")
+    except Exception as e:
+        print(f"❌ Failed to connect to contract: {str(e)}")
+        return
+
+    # Validate every row before sending anything, in the contract's share units
+    try:
+        rows = load_manifest(manifest, share_denominator(contract))
+    except (OSError, ValueError) as e:
+        print(f"❌ Could not read {manifest}: {str(e)}")
+        return
+    invalid = [row for row in rows if row['errors']]
+    if invalid:
+        print(f"\n❌ {len(invalid)} of {len(rows)} rows are invalid, nothing was sent:")
+        for row in invalid:
+            for error in row['errors']:
+                print(f"  row {row['row']}: {error}")
+        return
+    if not rows:
+        print(f"❌ {manifest} has no rows")
+        return
+
+    total_amount = sum(row['total_amount'] for row in rows)
+    print(f"\n📋 {len(rows)} splits, {total_amount / 1e18:.4f} CELO in total")
+
+    print(f"\n💳 Submitting with up to {window} transactions in flight...")
+    started = time.perf_counter()
+    results = submit_payments(contract, account, rows, window=int(window))
+    elapsed = time.perf_counter() - started
+
+    for result in results:
+        if result['status'] == 'created':
+            print(f"  ✅ row {result['row']}: payment {result['payment_id']} ({result['tx']})")
+        else:
+            print(f"  ❌ row {result['row']}: {result['status']} {result['error'] or result['tx'] or ''}")
+
+    created = sum(1 for result in results if result['status'] == 'created')
+    print(f"\n📊 {created}/{len(results)} created in {elapsed:.1f}s ({len(results) / elapsed:.1f} tx/s)")
+
+    results_path = f"{os.path.splitext(manifest)[0]}.results.csv"
+    write_results(results_path, results)
+    print(f"💾 Per-row results saved to {results_path}")
+    return results
+
+if __name__ == "__main__":
+    main()
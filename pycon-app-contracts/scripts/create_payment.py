@@ -5,9 +5,12 @@ Creates a new payment split with recipients and percentages
 """
 
 import os
-from brownie import PaymentSplitter, accounts, network, Wei
+from brownie import PaymentSplitter, accounts, chain, network, web3, Wei
 from dotenv import load_dotenv
 
+from scripts.shares import format_percent, share_denominator, share_unit, to_basis_points
+from scripts.tx_pipeline import TxPipeline
+
 def main():
     # Load environment variables
     load_dotenv()
@@ -38,6 +41,9 @@ def main():
         print(f"❌ Failed to connect to contract: {str(e)}")
         return
     
+    # Shares are basis points, or whole percentages on older deployments
+    denominator = share_denominator(contract)
+    
     # Get payment details
     print(f"\n📝 PAYMENT DETAILS")
     description = input("Enter description (e.g., 'Dinner at Cafe Javas'): ").strip()
@@ -57,12 +63,12 @@ def main():
         except ValueError:
             print("Please enter a valid number")
     
-    # Get recipients and percentages
+    # Get recipients and their shares in basis points
     recipients = []
     percentages = []
     
     print(f"\n👥 ADD RECIPIENTS")
-    print(f"Enter recipient addresses and their share percentages")
+    print(f"Enter recipient addresses and their share percentages (in steps of {share_unit(denominator)}%)")
     print(f"Type 'done' when finished")
     
     while True:
@@ -76,29 +82,26 @@ def main():
                 print("❌ Invalid address format. Should be 0x followed by 40 characters")
                 continue
                 
-            percentage = int(input(f"Enter percentage for {recipient[:6]}... (0-100): "))
-            if percentage <= 0 or percentage > 100:
-                print("❌ Percentage must be between 1 and 100")
-                continue
+            share = to_basis_points(input(f"Enter percentage for {recipient[:6]}... ({share_unit(denominator)}-100): "), denominator)
                 
             recipients.append(recipient)
-            percentages.append(percentage)
+            percentages.append(share)
             
             current_total = sum(percentages)
-            print(f"✅ Added: {recipient[:6]}... - {percentage}%")
-            print(f"📊 Current total: {current_total}%")
+            print(f"✅ Added: {recipient[:6]}... - {format_percent(share, denominator)}%")
+            print(f"📊 Current total: {format_percent(current_total, denominator)}%")
             
-            if current_total >= 100:
+            if current_total >= denominator:
                 print(f"🎯 Total reached 100% - stopping")
                 break
                 
         except ValueError:
-            print("❌ Please enter a valid number for percentage")
+            print(f"❌ Percentage must be from {share_unit(denominator)} to 100, in steps of {share_unit(denominator)}")
     
     # Validate total percentage
     total_percentage = sum(percentages)
-    if total_percentage != 100:
-        print(f"❌ Total percentage is {total_percentage}%. Must equal 100%")
+    if total_percentage != denominator:
+        print(f"❌ Total percentage is {format_percent(total_percentage, denominator)}%. Must equal 100%")
         return
     
     if len(recipients) == 0:
@@ -111,8 +114,8 @@ def main():
     print(f"Total Amount: {total_celo} CELO")
     print(f"Recipients:")
     for i, recipient in enumerate(recipients):
-        celo_amount = total_celo * percentages[i] / 100
-        print(f"  {recipient}: {percentages[i]}% ({celo_amount:.4f} CELO)")
+        celo_amount = total_celo * percentages[i] / denominator
+        print(f"  {recipient}: {format_percent(percentages[i], denominator)}% ({celo_amount:.4f} CELO)")
     
     # Confirm creation
     confirm = input(f"\nCreate this payment split? (y/n): ").strip().lower()
@@ -123,13 +126,13 @@ def main():
     # Create payment
     print(f"\n💳 Creating payment split...")
     try:
-        tx = contract.createPayment(
-            description,
-            recipients,
-            percentages,
-            total_amount,
-            {"from": account}
-        )
+        with TxPipeline(web3, account) as pipeline:
+            pending = pipeline.transact(contract, 'createPayment', description, recipients, percentages, total_amount)
+            pending.wait()
+        tx = chain.get_transaction(pending.tx_hash)
+        if tx.status != 1:
+            print(f"❌ Failed to create payment: {tx.revert_msg}")
+            return
         
         # Get payment ID from events
         payment_id = tx.events['PaymentCreated']['paymentId']
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Gas Regression Check for Payment Splitter DApp
+createPayment and payInvoice gas at several recipient counts and description lengths,
+compared against the checked-in gas_baseline.json
+Check:  brownie run gas_regression --network development
+Record: brownie run gas_regression main update --network development
+"""
+
+import json
+import os
+
+from brownie import PaymentSplitter, PaymentSplitterV2, accounts, network, Wei
+
+from scripts.bench_gas import percentages_for, recipients_for
+
+BASELINE_PATH = os.getenv("GAS_BASELINE", "gas_baseline.json")
+# Bump when the measured cases or how they are measured change; old baselines are then rejected
+BASELINE_VERSION = 2
+# Allowed increase over the baseline before a case counts as a regression
+THRESHOLD = float(os.getenv("GAS_REGRESSION_THRESHOLD", "0.02"))
+RECIPIENT_COUNTS = [1, 10, 50, 100]
+DESCRIPTION_LENGTHS = [16, 64, 256]
+TOTAL_AMOUNT = Wei("0.1 ether")
+
+CONTRACTS = {
+    'PaymentSplitter': PaymentSplitter,
+    'PaymentSplitterV2': PaymentSplitterV2,
+}
+
+def case_key(function, recipients, length):
+    return f"{function} r={recipients} d={length}"
+
+def measure_all(contract):
+    """Gas of createPayment, a partial payInvoice and the completing payInvoice, per case.
+
+    Cases run in a fixed order on a fresh deployment, so payment ids and
+    recipient addresses (all new accounts) are the same on every run.
+    """
+    measured = {}
+    for index, count in enumerate(RECIPIENT_COUNTS):
+        for position, length in enumerate(DESCRIPTION_LENGTHS):
+            recipients = recipients_for(count, offset=(index * len(DESCRIPTION_LENGTHS) + position) * 1000)
+            created = contract.createPayment("x" * length, recipients, percentages_for(count),
+                                             TOTAL_AMOUNT, {"from": accounts[0]})
+            payment_id = created.events['PaymentCreated']['paymentId']
+            partial = contract.payInvoice(payment_id, {"from": accounts[1], "value": TOTAL_AMOUNT // 2})
+            completing = contract.payInvoice(payment_id, {"from": accounts[2], "value": TOTAL_AMOUNT - TOTAL_AMOUNT // 2})
+            assert 'PaymentCompleted' in completing.events
+
+            measured[case_key('createPayment', count, length)] = created.gas_used
+            measured[case_key('payInvoice', count, length)] = partial.gas_used
+            measured[case_key('payInvoice (distributes)', count, length)] = completing.gas_used
+    return measured
+
+def compare(baseline, measured, threshold=THRESHOLD):
+    """(rows, regressions): rows are (case, baseline, measured, change), change is None for new cases"""
+    rows = []
+    for key, gas in measured.items():
+        before = baseline.get(key)
+        change = None if before is None else (gas - before) / before
+        rows.append((key, before, gas, change))
+    regressions = [row for row in rows if row[3] is not None and row[3] > threshold]
+    return rows, regressions
+
+def load_baseline(path=BASELINE_PATH):
+    """Baseline gas per contract; empty when the file is missing, which fails the check"""
+    if not os.path.exists(path):
+        return {'version': BASELINE_VERSION, 'contracts': {}}
+    with open(path) as f:
+        baseline = json.load(f)
+    if baseline.get('version') != BASELINE_VERSION:
+        raise ValueError(f"{path} is version {baseline.get('version')}, expected {BASELINE_VERSION}: "
+                         f"record a new baseline")
+    return baseline
+
+def save_baseline(measurements, path=BASELINE_PATH):
+    """Write the measurements as the new baseline"""
+    baseline = {
+        'version': BASELINE_VERSION,
+        'contracts': measurements,
+    }
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+def main(mode="check"):
+    if network.show_active() not in ("development", "ganache-local"):
+        print("❌ Run the gas check on a local chain: --network development")
+        return
+
+    baseline = load_baseline()
+    measurements = {}
+    for name, container in CONTRACTS.items():
+        print(f"⛽ Measuring {name}...")
+        measurements[name] = measure_all(container.deploy({"from": accounts[0]}))
+
+    if mode == "update":
+        save_baseline(measurements)
+        print(f"💾 Baseline saved to {BASELINE_PATH}")
+        return measurements
+
+    failed = False
+    for name, measured in measurements.items():
+        if name not in baseline['contracts']:
+            failed = True
+            print(f"❌ {BASELINE_PATH} has no baseline for {name}")
+        rows, regressions = compare(baseline['contracts'].get(name, {}), measured)
+        print(f"\n📊 {name} (fails above +{THRESHOLD * 100:.1f}%)")
+        print(f"{'case':<38} | {'baseline':>10} | {'now':>10} | {'change':>7}")
+        print("-" * 74)
+        for key, before, gas, change in rows:
+            shown = "new" if change is None else f"{change * 100:+.1f}%"
+            marker = " ❌" if change is not None and change > THRESHOLD else ""
+            print(f"{key:<38} | {before or '-':>10} | {gas:>10} | {shown:>7}{marker}")
+        if regressions:
+            failed = True
+            print(f"❌ {len(regressions)} cases of {name} use more gas than the baseline allows")
+
+    if failed:
+        raise AssertionError("gas regression or missing baseline; if the change is intended, record a new baseline")
+    print(f"\n✅ No gas regressions")
+    return measurements
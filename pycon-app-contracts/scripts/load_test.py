@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Load Test for Payment Splitter DApp
+Thousands of random splits and contribution sequences sent through the transaction pipeline,
+checked against the contract's invariants, with gas per operation and time per 1k transactions
+Run on a local chain: brownie run load_test --network development
+Compare contracts:    brownie run load_test main PaymentSplitterV2 --network development
+"""
+
+import json
+import os
+import random
+import time
+from collections import Counter, defaultdict
+
+from brownie import PaymentSplitter, PaymentSplitterV2, accounts, network, web3, Wei
+from eth_utils import to_checksum_address
+
+from scripts.bulk_create_payments import PAYMENT_CREATED
+from scripts.shares import SHARE_DENOMINATOR
+from scripts.tx_pipeline import TxPipeline
+
+SPLITS = int(os.getenv("LOAD_SPLITS", "1000"))
+MAX_RECIPIENTS = int(os.getenv("LOAD_MAX_RECIPIENTS", "200"))
+# Same seed, same splits: rerun a failing seed to reproduce it
+SEED = int(os.getenv("LOAD_SEED", "0"))
+REPORT_PATH = os.getenv("LOAD_REPORT", "load_test_report.json")
+# Development accounts 1-9 contribute; each pays a split at most once
+CONTRIBUTORS = 9
+MIN_TOTAL = Wei("0.001 ether")
+MAX_TOTAL = Wei("0.02 ether")
+# Gas statistics are grouped by recipient count
+RECIPIENT_BUCKETS = [(1, 1), (2, 10), (11, 50), (51, 100), (101, 200)]
+# The development chain mines on every transaction, so poll for blocks often
+POLL_INTERVAL = 0.01
+RECEIPT_TIMEOUT = 600
+
+CONTRACTS = {
+    'PaymentSplitter': PaymentSplitter,
+    'PaymentSplitterV2': PaymentSplitterV2,
+}
+
+def random_split(rng, base, offset):
+    """Fresh recipients, random basis points summing to 10000 and a contribution sequence"""
+    count = rng.randint(1, MAX_RECIPIENTS)
+    cuts = sorted(rng.randint(0, SHARE_DENOMINATOR) for _ in range(count - 1))
+    percentages = [high - low for low, high in zip([0] + cuts, cuts + [SHARE_DENOMINATOR])]
+    recipients = [to_checksum_address(f"0x{base + offset + i:040x}") for i in range(count)]
+    total = rng.randint(MIN_TOTAL, MAX_TOTAL)
+
+    # About half the splits are paid in full, some of those overpaid (refunded); the rest stay open
+    contributors = rng.randint(1, CONTRIBUTORS)
+    target = total + rng.randint(0, total // 10) if rng.random() < 0.5 else rng.randint(1, total - 1)
+    weights = [rng.random() + 0.01 for _ in range(contributors)]
+    amounts = [max(1, target * weight // sum(weights)) for weight in weights]
+    amounts[-1] += max(0, target - sum(amounts))
+    return {
+        'recipients': recipients,
+        'percentages': percentages,
+        'total': total,
+        'amounts': amounts,
+    }
+
+def bucket_for(count):
+    for low, high in RECIPIENT_BUCKETS:
+        if low <= count <= high:
+            return f"{low}-{high}" if low != high else f"{low}"
+    return f">{RECIPIENT_BUCKETS[-1][1]}"
+
+def stats(values):
+    values = sorted(values)
+    return {
+        'count': len(values),
+        'mean': sum(values) // len(values),
+        'p50': values[len(values) // 2],
+        'p95': values[min(len(values) - 1, len(values) * 95 // 100)],
+        'max': values[-1],
+    }
+
+def create_splits(contract, creator, splits):
+    """createPayment for every split through one pipeline; sets split['id'] and records gas"""
+    with TxPipeline(web3, creator, poll_interval=POLL_INTERVAL) as pipeline:
+        sent = [(split, pipeline.transact(contract, 'createPayment', "Load test split",
+                                          split['recipients'], split['percentages'], split['total']))
+                for split in splits]
+        pipeline.wait_all(timeout=RECEIPT_TIMEOUT)
+
+    for split, pending in sent:
+        receipt = pending.receipt
+        if pending.error is not None or receipt['status'] != 1:
+            raise AssertionError(f"createPayment failed: {pending.error or pending.tx_hash.hex()}")
+        for log in receipt['logs']:
+            if log['address'] == contract.address and log['topics'][0] == PAYMENT_CREATED:
+                split['id'] = int.from_bytes(log['topics'][1], 'big')
+        split['gas'] = {'createPayment': receipt['gasUsed']}
+    return len(sent)
+
+def contribute(contract, splits):
+    """Round r sends the r-th contribution of every open split, from contributor r.
+
+    Each split gets at most one transaction per round, so its contributions
+    are mined in sequence order and the harness knows which one completes it.
+    """
+    sent = 0
+    for round_number, contributor in enumerate(accounts[1:CONTRIBUTORS + 1]):
+        batch = []
+        with TxPipeline(web3, contributor, poll_interval=POLL_INTERVAL) as pipeline:
+            for split in splits:
+                if round_number >= len(split['amounts']) or split['collected'] == split['total']:
+                    continue
+                amount = split['amounts'][round_number]
+                batch.append((split, amount, pipeline.transact(contract, 'payInvoice', split['id'], value=amount)))
+            pipeline.wait_all(timeout=RECEIPT_TIMEOUT)
+
+        for split, amount, pending in batch:
+            receipt = pending.receipt
+            if pending.error is not None or receipt['status'] != 1:
+                raise AssertionError(f"payInvoice({split['id']}) failed: {pending.error or pending.tx_hash.hex()}")
+            # Only what was still missing is kept, the rest is refunded
+            accepted = min(amount, split['total'] - split['collected'])
+            split['collected'] += accepted
+            split['paid'].append((contributor, accepted))
+            if split['collected'] == split['total']:
+                split['gas']['payInvoice (distributes)'] = receipt['gasUsed']
+            else:
+                split['gas'].setdefault('payInvoice', []).append(receipt['gasUsed'])
+        sent += len(batch)
+    return sent
+
+def check_invariants(contract, splits):
+    """Compare the chain with what the harness sent; returns a list of failures"""
+    failures = []
+    expected_balances = Counter()
+    escrowed = 0
+    for split in splits:
+        payment = contract.getPayment(split['id'])
+        completed = split['collected'] == split['total']
+        if payment[3] != split['total']:
+            failures.append(f"payment {split['id']}: totalAmount {payment[3]} != {split['total']}")
+        if payment[4] != split['collected']:
+            failures.append(f"payment {split['id']}: collectedAmount {payment[4]} != {split['collected']}")
+        if payment[5] == completed:
+            failures.append(f"payment {split['id']}: isActive is {payment[5]} after collecting {split['collected']}")
+
+        for contributor, amount in split['paid']:
+            if contract.getContribution(split['id'], contributor) != amount:
+                failures.append(f"payment {split['id']}: contribution of {contributor} is not {amount}")
+            if not contract.hasPaid(split['id'], contributor):
+                failures.append(f"payment {split['id']}: hasPaid({contributor}) is false")
+            # The uniqueness guard: a second payment must revert
+            try:
+                contract.payInvoice.call(split['id'], {"from": contributor, "value": 1})
+                failures.append(f"payment {split['id']}: {contributor} could pay twice")
+            except Exception:
+                pass
+
+        if completed:
+            # Exactly the total is paid out, the last recipient gets the rounding dust
+            distributed = 0
+            for recipient, percentage in zip(split['recipients'][:-1], split['percentages'][:-1]):
+                share = split['total'] * percentage // SHARE_DENOMINATOR
+                expected_balances[recipient] += share
+                distributed += share
+            expected_balances[split['recipients'][-1]] += split['total'] - distributed
+        else:
+            escrowed += split['collected']
+
+    for recipient, balance in expected_balances.items():
+        actual = web3.eth.get_balance(recipient)
+        if actual != balance:
+            failures.append(f"{recipient}: balance {actual} != distributed {balance}")
+    # No overpayment or dust is left behind, only what open splits collected
+    if contract.balance() != escrowed:
+        failures.append(f"contract balance {contract.balance()} != {escrowed} collected by open splits")
+    return failures
+
+def gas_report(splits):
+    """Gas statistics per operation and recipient-count bucket"""
+    samples = defaultdict(lambda: defaultdict(list))
+    for split in splits:
+        bucket = bucket_for(len(split['recipients']))
+        for operation, gas in split['gas'].items():
+            samples[operation][bucket].extend(gas if isinstance(gas, list) else [gas])
+    order = [bucket_for(low) for low, _ in RECIPIENT_BUCKETS]
+    return {
+        operation: {bucket: stats(by_bucket[bucket]) for bucket in order if by_bucket.get(bucket)}
+        for operation, by_bucket in samples.items()
+    }
+
+def main(contract_name="PaymentSplitter"):
+    if network.show_active() not in ("development", "ganache-local"):
+        print("❌ Run the load test on a local chain: --network development")
+        return
+    if contract_name not in CONTRACTS:
+        print(f"❌ Unknown contract {contract_name}, choose one of: {', '.join(CONTRACTS)}")
+        return
+
+    print(f"🏋️ PAYMENT SPLITTER - LOAD TEST 🏋️")
+    print(f"=" * 50)
+    print(f"Contract: {contract_name}")
+    print(f"Splits:   {SPLITS} (1-{MAX_RECIPIENTS} recipients), seed {SEED}")
+
+    # A local key, so creates are signed here; contributors are signed by the node
+    creator = accounts.add()
+    accounts[0].transfer(creator, Wei("50 ether"))
+    contract = CONTRACTS[contract_name].deploy({"from": accounts[0]})
+
+    # Recipient addresses unique to this deployment, so their balances start at zero
+    base = int.from_bytes(bytes(web3.keccak(hexstr=contract.address))[:12], 'big') << 32
+    rng = random.Random(SEED)
+    splits = []
+    offset = 0
+    for _ in range(SPLITS):
+        split = random_split(rng, base, offset)
+        split.update(collected=0, paid=[])
+        offset += len(split['recipients'])
+        splits.append(split)
+
+    print(f"\n💳 Creating {SPLITS} splits...")
+    started = time.perf_counter()
+    created = create_splits(contract, creator, splits)
+    create_seconds = time.perf_counter() - started
+
+    print(f"💸 Sending contributions...")
+    started = time.perf_counter()
+    contributions = contribute(contract, splits)
+    contribute_seconds = time.perf_counter() - started
+
+    print(f"🔍 Checking invariants...")
+    failures = check_invariants(contract, splits)
+
+    completed = sum(1 for split in splits if split['collected'] == split['total'])
+    transactions = created + contributions
+    report = {
+        'contract': contract_name,
+        'seed': SEED,
+        'splits': SPLITS,
+        'max_recipients': MAX_RECIPIENTS,
+        'completed': completed,
+        'transactions': {'createPayment': created, 'payInvoice': contributions},
+        'seconds_per_1k_tx': {
+            'createPayment': round(create_seconds / created * 1000, 2),
+            'payInvoice': round(contribute_seconds / contributions * 1000, 2),
+            'all': round((create_seconds + contribute_seconds) / transactions * 1000, 2),
+        },
+        'gas': gas_report(splits),
+        'invariant_failures': failures,
+    }
+
+    print(f"\n📊 Gas per operation")
+    print(f"{'function':<26} | {'recipients':>10} | {'count':>6} | {'mean':>10} | {'p95':>10} | {'max':>10}")
+    print("-" * 86)
+    for operation, by_bucket in report['gas'].items():
+        for bucket, row in by_bucket.items():
+            print(f"{operation:<26} | {bucket:>10} | {row['count']:>6} | {row['mean']:>10,} | "
+                  f"{row['p95']:>10,} | {row['max']:>10,}")
+
+    print(f"\n⏱️  Wall time per 1k transactions")
+    for operation, seconds in report['seconds_per_1k_tx'].items():
+        print(f"  {operation:<14} {seconds:>8.2f}s")
+
+    with open(REPORT_PATH, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Report saved to {REPORT_PATH}")
+
+    if failures:
+        print(f"\n❌ {len(failures)} invariant failures (seed {SEED}):")
+        for failure in failures[:20]:
+            print(f"  {failure}")
+        raise AssertionError(f"{len(failures)} invariant failures")
+    print(f"✅ {transactions} transactions, {completed}/{SPLITS} splits completed, all invariants hold")
+    return report
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Nonce Manager for Payment Splitter DApp
+Hands out consecutive nonces so many transactions can be in flight at once
+"""
+
+import threading
+
+
+class NonceManager:
+    """Local nonce counter for one sender.
+
+    The first nonce comes from the node's pending transaction count; after
+    that nonces are assigned locally, so the next transaction can be sent
+    without waiting for the previous receipt. If a send is rejected before
+    it reaches the mempool, release() hands its nonce out again so the
+    sequence has no gap.
+    """
+
+    def __init__(self, web3, address):
+        self.web3 = web3
+        self.address = str(address)
+        self._next = None
+        self._lock = threading.Lock()
+
+    def next(self):
+        """Nonce for the next transaction"""
+        with self._lock:
+            if self._next is None:
+                self._next = self.web3.eth.get_transaction_count(self.address, 'pending')
+            nonce = self._next
+            self._next += 1
+            return nonce
+
+    def release(self, nonce):
+        """Give back a nonce whose transaction was never accepted by the node"""
+        with self._lock:
+            if self._next is not None and nonce == self._next - 1:
+                self._next = nonce
+            else:
+                # Later nonces are already out; ask the node where the sequence stands
+                self._next = None
+
+    def issued_after(self, nonce):
+        """True if nonces after ``nonce`` were already handed out"""
+        with self._lock:
+            return self._next is not None and self._next > nonce + 1
+
+    def resync(self):
+        """Catch up with transactions sent from elsewhere.
+
+        The node's pending count only covers broadcast transactions, so the
+        local counter is kept when it is ahead: nonces handed out here but
+        not sent yet must not be handed out again.
+        """
+        pending = self.web3.eth.get_transaction_count(self.address, 'pending')
+        with self._lock:
+            self._next = max(pending, self._next or 0)
@@ -5,9 +5,12 @@ Pay your share of a payment split
 """
 
 import os
-from brownie import PaymentSplitter, accounts, network, Wei
+from brownie import PaymentSplitter, accounts, chain, network, web3, Wei
 from dotenv import load_dotenv
 
+from scripts.shares import format_percent, share_denominator
+from scripts.tx_pipeline import TxPipeline
+
 def main():
     # Load environment variables
     load_dotenv()
@@ -81,9 +84,10 @@ def main():
     print(f"Created by: {creator}")
     
     print(f"\n💰 RECIPIENTS:")
+    denominator = share_denominator(contract)
     for i, recipient in enumerate(recipients):
-        celo_amount = total_amount * percentages[i] / (100 * 1e18)
-        print(f"  {recipient}: {percentages[i]}% ({celo_amount:.4f} CELO)")
+        celo_amount = total_amount * percentages[i] / (denominator * 1e18)
+        print(f"  {recipient}: {format_percent(percentages[i], denominator)}% ({celo_amount:.4f} CELO)")
     
     # Get payment amount
     while True:
@@ -117,11 +121,21 @@ def main():
     # Make payment
     print(f"\n💸 Processing payment...")
     try:
-        tx = contract.payInvoice(payment_id, {"from": account, "value": pay_amount})
+        with TxPipeline(web3, account) as pipeline:
+            pending = pipeline.transact(contract, 'payInvoice', payment_id, value=pay_amount)
+            pending.wait()
+        tx = chain.get_transaction(pending.tx_hash)
+        if tx.status != 1:
+            print(f"❌ Payment failed: {tx.revert_msg}")
+            return
         
         print(f"\n✅ SUCCESS! Payment sent!")
         print(f"Transaction: {tx.txid}")
         
+        # Only the remaining amount is kept
+        if 'Refunded' in tx.events:
+            print(f"↩️  {tx.events['Refunded']['amount'] / 1e18:.4f} CELO over the total was refunded")
+        
         if network.show_active() != "development":
             explorer_url = f"https://alfajores.celoscan.io/tx/{tx.txid}"
             print(f"Explorer: {explorer_url}")
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Payment Shares
+Percentages as people write them, converted to the shares createPayment takes
+"""
+
+from decimal import Decimal, InvalidOperation
+
+# PaymentSplitter.SHARE_DENOMINATOR: shares are basis points and add up to 100%
+SHARE_DENOMINATOR = 10000
+# Whole percentages, on contracts deployed before SHARE_DENOMINATOR
+LEGACY_SHARE_DENOMINATOR = 100
+
+def share_denominator(contract):
+    """What the contract's shares add up to, 100 if it predates SHARE_DENOMINATOR"""
+    # Imported here so the conversions below can be used without brownie
+    from brownie.exceptions import VirtualMachineError
+    try:
+        return int(contract.SHARE_DENOMINATOR())
+    except (AttributeError, VirtualMachineError):
+        # Not in the ABI the contract was loaded with, or not in its bytecode
+        return LEGACY_SHARE_DENOMINATOR
+
+def to_basis_points(percentage, denominator=SHARE_DENOMINATOR):
+    """Share of a percentage like 25, "33.33" or "0.5", out of `denominator`.
+
+    Raises ValueError unless it is a positive multiple of one share unit
+    (0.01% in basis points, 1% on legacy contracts) and at most 100.
+    """
+    try:
+        share = Decimal(str(percentage).strip()) * denominator / 100
+    except InvalidOperation:
+        raise ValueError(f"{percentage!r} is not a number")
+    if not share.is_finite():
+        raise ValueError(f"{percentage!r} is not a number")
+    if share != share.to_integral_value():
+        raise ValueError(f"{percentage!r} is not a multiple of {share_unit(denominator)}%")
+    if not 1 <= share <= denominator:
+        raise ValueError(f"{percentage!r} is not from {share_unit(denominator)} to 100")
+    return int(share)
+
+def share_unit(denominator=SHARE_DENOMINATOR):
+    """The smallest percentage that can be written: "0.01" in basis points, "1" on legacy contracts"""
+    return format_percent(1, denominator)
+
+def format_percent(share, denominator=SHARE_DENOMINATOR):
+    """The percentage for a share: 3333 -> "33.33", 2500 -> "25" """
+    text = f"{Decimal(share) * 100 / denominator:f}"
+    return text.rstrip('0').rstrip('.') if '.' in text else text
+
+def even_split(count, denominator=SHARE_DENOMINATOR):
+    """count shares adding up to denominator, the remainder on the first"""
+    shares = [denominator // count] * count
+    shares[0] += denominator - sum(shares)
+    return shares
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+"""
+Transaction Pipeline for Payment Splitter DApp
+Sends many transactions from one account without waiting for each receipt
+"""
+
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from web3.exceptions import TransactionNotFound
+
+from scripts.nonce_manager import NonceManager
+
+# Unconfirmed transactions allowed at once
+DEFAULT_MAX_IN_FLIGHT = 32
+# Threads broadcasting signed transactions
+BROADCAST_WORKERS = 8
+# Added on top of eth_estimateGas when the caller gives no gas limit
+GAS_MARGIN = 0.2
+# Nodes only accept a replacement that raises the gas price by at least 10%
+PRICE_BUMP = 0.125
+# Seconds without a receipt before the transaction is resent at a higher price
+RESUBMIT_AFTER = 60
+# Underpriced/replacement attempts per transaction before giving up
+MAX_RESUBMITS = 5
+# Seconds between eth_blockNumber checks; receipts are only fetched on new blocks
+POLL_INTERVAL = 0.2
+# Gas for the 0-value self transfer that fills a nonce left unused by a failed send
+FILLER_GAS = 21000
+
+
+class PendingTx:
+    """One transaction handed to the pipeline.
+
+    ``hashes`` lists every broadcast of this nonce, newest last; whichever
+    is mined first becomes ``receipt``. ``error`` is set instead if the
+    transaction could not be sent.
+    """
+
+    def __init__(self, nonce, tx):
+        self.nonce = nonce
+        self.tx = tx
+        self.hashes = []
+        self.receipt = None
+        self.error = None
+        self.sent_at = None
+        self.resubmits = 0
+        self._done = threading.Event()
+
+    @property
+    def tx_hash(self):
+        """Hash of the mined transaction, or of the latest broadcast while pending"""
+        if self.receipt is not None:
+            return self.receipt['transactionHash']
+        return self.hashes[-1] if self.hashes else None
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Receipt once mined; raises the send error, or TimeoutError"""
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Transaction with nonce {self.nonce} not mined after {timeout}s")
+        if self.error is not None:
+            raise self.error
+        return self.receipt
+
+    def _finish(self, receipt=None, error=None):
+        self.receipt = receipt
+        self.error = error
+        self._done.set()
+
+
+class TxPipeline:
+    """Nonce-ordered, concurrently broadcast transactions for one account.
+
+    submit() assigns the next nonce and returns a PendingTx right away;
+    signing and broadcasting happen on worker threads, and one watcher
+    thread collects receipts whenever a new block appears. At most
+    ``max_in_flight`` transactions are unconfirmed at once, submit() blocks
+    beyond that.
+
+    A rejected "underpriced" send is retried at a higher gas price. A
+    transaction without a receipt after ``resubmit_after`` seconds is
+    replaced: same nonce, gas price raised by ``PRICE_BUMP``. If a send
+    fails for good after later nonces were handed out, a 0-value transfer
+    to self takes its nonce so the later transactions are not stuck.
+
+    Accounts that hold a private key (``accounts.add()``) are signed
+    locally; others, like the development accounts, are signed by the node.
+    """
+
+    def __init__(self, web3, account, max_in_flight=DEFAULT_MAX_IN_FLIGHT, gas_price=None,
+                 max_gas_price=None, resubmit_after=RESUBMIT_AFTER, poll_interval=POLL_INTERVAL):
+        self.web3 = web3
+        self.account = account
+        self.address = str(account)
+        self.max_in_flight = max_in_flight
+        self.gas_price = gas_price
+        self.max_gas_price = max_gas_price
+        self.resubmit_after = resubmit_after
+        self.poll_interval = poll_interval
+        self.nonces = NonceManager(web3, self.address)
+        self.chain_id = web3.eth.chain_id
+
+        self._pending = []
+        self._submitted = []
+        self._lock = threading.Lock()
+        self._slots = threading.Condition(self._lock)
+        self._executor = ThreadPoolExecutor(max_workers=BROADCAST_WORKERS)
+        self._closed = threading.Event()
+        self._watcher = threading.Thread(target=self._watch, daemon=True)
+        self._watcher.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if exc[0] is None:
+                self.wait_all()
+        finally:
+            self.close()
+
+    def submit(self, tx):
+        """Queue a transaction dict ('to', 'data', 'value', optional 'gas'); returns its PendingTx.
+
+        Gas is estimated here when missing, so a call that would revert
+        raises before a nonce is used.
+        """
+        tx = dict(tx)
+        tx.setdefault('value', 0)
+        tx['from'] = self.address
+        if 'gas' not in tx:
+            tx['gas'] = math.ceil(self.web3.eth.estimate_gas(tx) * (1 + GAS_MARGIN))
+        if 'gasPrice' not in tx:
+            if self.gas_price is None:
+                self.gas_price = self.web3.eth.gas_price
+            tx['gasPrice'] = self.gas_price
+        tx['chainId'] = self.chain_id
+
+        with self._slots:
+            while len(self._pending) >= self.max_in_flight:
+                self._slots.wait()
+            tx['nonce'] = self.nonces.next()
+            pending = PendingTx(tx['nonce'], tx)
+            self._pending.append(pending)
+            self._submitted.append(pending)
+        self._executor.submit(self._first_broadcast, pending)
+        return pending
+
+    def transact(self, contract, method, *args, value=0, gas=None):
+        """submit() a call to ``contract.<method>(*args)``"""
+        tx = {
+            'to': contract.address,
+            'data': getattr(contract, method).encode_input(*args),
+            'value': value,
+        }
+        if gas is not None:
+            tx['gas'] = gas
+        return self.submit(tx)
+
+    def wait_all(self, timeout=None):
+        """Block until everything submitted so far is mined or failed; returns them in order"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._lock:
+            submitted = list(self._submitted)
+        for pending in submitted:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            if not pending._done.wait(remaining):
+                raise TimeoutError(f"{sum(not p.done() for p in submitted)} transactions still pending")
+        return submitted
+
+    def close(self):
+        """Stop the worker threads; transactions not yet mined are no longer tracked"""
+        self._closed.set()
+        self._executor.shutdown(wait=True)
+        self._watcher.join()
+
+    def _sign_and_send(self, tx):
+        if hasattr(self.account, 'private_key'):
+            signed = self.web3.eth.account.sign_transaction(tx, self.account.private_key)
+            try:
+                return self.web3.eth.send_raw_transaction(signed.rawTransaction)
+            except ValueError as e:
+                if _is_known(e):
+                    return signed.hash
+                raise
+        return self.web3.eth.send_transaction(tx)
+
+    def _first_broadcast(self, pending):
+        while True:
+            try:
+                tx_hash = self._sign_and_send(pending.tx)
+            except ValueError as e:
+                if pending.resubmits < MAX_RESUBMITS:
+                    if _is_underpriced(e) and self._bump(pending):
+                        continue
+                    if _is_nonce_used(e):
+                        # Sent from elsewhere meanwhile; take a fresh nonce
+                        self._renumber(pending)
+                        continue
+                self._fail(pending, e)
+                return
+            except Exception as e:
+                self._fail(pending, e)
+                return
+            with self._lock:
+                pending.hashes.append(tx_hash)
+                pending.sent_at = time.monotonic()
+            return
+
+    def _bump(self, pending):
+        """Raise the gas price for a resend; False once it would pass max_gas_price"""
+        price = max(math.ceil(pending.tx['gasPrice'] * (1 + PRICE_BUMP)), self.web3.eth.gas_price)
+        if self.max_gas_price is not None and price > self.max_gas_price:
+            return False
+        pending.tx = dict(pending.tx, gasPrice=price)
+        pending.resubmits += 1
+        with self._lock:
+            # Later transactions start from the price the node accepts
+            self.gas_price = max(self.gas_price or 0, price)
+        return True
+
+    def _renumber(self, pending):
+        self.nonces.resync()
+        nonce = self.nonces.next()
+        pending.nonce = nonce
+        pending.tx = dict(pending.tx, nonce=nonce)
+        pending.resubmits += 1
+
+    def _replace(self, pending):
+        """Resend a stuck transaction with the same nonce at a higher gas price"""
+        if pending.resubmits >= MAX_RESUBMITS or not self._bump(pending):
+            return
+        try:
+            tx_hash = self._sign_and_send(pending.tx)
+        except ValueError as e:
+            # Still underpriced is bumped again next time; a used nonce
+            # means an earlier broadcast was mined, which the receipt poll
+            # will find. Anything else stops replacing, the earlier
+            # broadcasts can still be mined.
+            if not (_is_underpriced(e) or _is_nonce_used(e)):
+                pending.resubmits = MAX_RESUBMITS
+            tx_hash = None
+        with self._lock:
+            if tx_hash is not None:
+                pending.hashes.append(tx_hash)
+            pending.sent_at = time.monotonic()
+
+    def _fail(self, pending, error):
+        if self.nonces.issued_after(pending.nonce) and not _is_nonce_used(error):
+            # The node will hold every later nonce until this one is used
+            filler = {
+                'from': self.address,
+                'to': self.address,
+                'value': 0,
+                'gas': FILLER_GAS,
+                'gasPrice': pending.tx['gasPrice'],
+                'nonce': pending.nonce,
+                'chainId': self.chain_id,
+            }
+            try:
+                self._sign_and_send(filler)
+            except Exception:
+                self.nonces.resync()
+        else:
+            self.nonces.release(pending.nonce)
+        self._settle(pending, error=error)
+
+    def _settle(self, pending, receipt=None, error=None):
+        with self._slots:
+            if pending in self._pending:
+                self._pending.remove(pending)
+            self._slots.notify_all()
+        pending._finish(receipt, error)
+
+    def _watch(self):
+        last_block = None
+        while not self._closed.is_set():
+            try:
+                block = self.web3.eth.block_number
+            except Exception:
+                block = last_block
+            with self._lock:
+                sent = [p for p in self._pending if p.hashes]
+            if block != last_block:
+                for pending in sent:
+                    self._check(pending)
+            now = time.monotonic()
+            for pending in sent:
+                if not pending.done() and now - pending.sent_at > self.resubmit_after:
+                    self._replace(pending)
+            last_block = block
+            self._closed.wait(self.poll_interval)
+
+    def _check(self, pending):
+        with self._lock:
+            hashes = list(pending.hashes)
+        for tx_hash in reversed(hashes):
+            try:
+                receipt = self.web3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                continue
+            if receipt is not None:
+                self._settle(pending, receipt=receipt)
+                return
+
+
+def _message(error):
+    if error.args and isinstance(error.args[0], dict):
+        return str(error.args[0].get('message', '')).lower()
+    return str(error).lower()
+
+def _is_underpriced(error):
+    return 'underpriced' in _message(error)
+
+def _is_known(error):
+    message = _message(error)
+    return 'already known' in message or 'known transaction' in message
+
+def _is_nonce_used(error):
+    return 'nonce too low' in _message(error)
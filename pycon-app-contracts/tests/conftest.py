@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Shared Test Fixtures
+One deployment per module, rolled back after every test with chain snapshots
+"""
+
+import pytest
+from brownie import PaymentSplitter, accounts, web3, Wei
+
+from scripts.shares import even_split
+from scripts.tx_pipeline import TxPipeline
+
+# Payments in the pre-seeded contract
+SEEDED_PAYMENTS = 1000
+# The development chain mines on every transaction, so poll for blocks often
+SEED_POLL_INTERVAL = 0.01
+
+@pytest.fixture(autouse=True)
+def isolation(fn_isolation):
+    """Snapshot before each test and revert after it, instead of redeploying"""
+    pass
+
+@pytest.fixture(scope="module")
+def payment_splitter():
+    """PaymentSplitter deployed once per test module"""
+    return PaymentSplitter.deploy({"from": accounts[0]})
+
+@pytest.fixture(scope="session")
+def alice():
+    """Test account Alice"""
+    return accounts[0]
+
+@pytest.fixture(scope="session")
+def bob():
+    """Test account Bob"""
+    return accounts[1]
+
+@pytest.fixture(scope="session")
+def carol():
+    """Test account Carol"""
+    return accounts[2]
+
+@pytest.fixture(scope="session")
+def seeded_payments():
+    """Number of payments in seeded_splitter"""
+    return SEEDED_PAYMENTS
+
+@pytest.fixture(scope="module")
+def seeded_splitter():
+    """PaymentSplitter holding SEEDED_PAYMENTS open payments, built once per module.
+
+    brownie's module_isolation resets the chain at the start of every
+    module, so a longer-lived contract would not survive into the next one.
+    Keep the tests that use it in one module (test_payment_splitter.py) to
+    build it only once.
+
+    Payment i is "Seeded i", split evenly between 1-3 of accounts[1:4],
+    with a total of 0.01 CELO + i Wei. Tests that change it are reverted
+    like any other test.
+    """
+    contract = PaymentSplitter.deploy({"from": accounts[0]})
+    with TxPipeline(web3, accounts[0], poll_interval=SEED_POLL_INTERVAL) as pipeline:
+        gas = {}
+        for i in range(SEEDED_PAYMENTS):
+            count = 1 + i % 3
+            recipients = accounts[1:1 + count]
+            args = (f"Seeded {i}", recipients, even_split(count), Wei("0.01 ether") + i)
+            if count not in gas:
+                gas[count] = contract.createPayment.estimate_gas(*args, {"from": accounts[0]}) * 2
+            pipeline.transact(contract, 'createPayment', *args, gas=gas[count])
+        assert all(pending.receipt['status'] == 1 for pending in pipeline.wait_all())
+    return contract
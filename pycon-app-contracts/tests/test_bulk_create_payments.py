@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test Bulk Create Payments
+Manifest validation and pipelined createPayment submission
+"""
+
+import json
+
+import pytest
+from brownie import accounts, Wei
+
+from scripts.bulk_create_payments import load_manifest, parse_row, submit_payments
+
+ALICE = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+BOB = "0x3C44CdDdB6a900fa2b585dd299e03d12FA4293BC"
+
+def row(**overrides):
+    raw = {'description': "Team lunch", 'total_celo': "0.05",
+           'recipients': f"{ALICE};{BOB}", 'percentages': "60;40"}
+    raw.update(overrides)
+    return parse_row(1, raw)
+
+def test_valid_row():
+    """Amounts are converted to Wei exactly, without floats"""
+    parsed = row(total_celo="0.1")
+    assert parsed['errors'] == []
+    assert parsed['total_amount'] == Wei("0.1 ether")
+    assert parsed['recipients'] == [ALICE, BOB]
+    assert parsed['percentages'] == [6000, 4000]  # basis points
+
+def test_bad_checksum():
+    """Mis-cased addresses are rejected with the checksummed form"""
+    parsed = row(recipients=f"{ALICE.lower()};{BOB}")
+    assert parsed['errors'] == [f"{ALICE.lower()} fails the checksum, expected {ALICE}"]
+
+@pytest.mark.parametrize('overrides, message', [
+    ({'percentages': "60;30"}, "percentages add up to 90, must be 100"),
+    ({'percentages': "100"}, "2 recipients but 1 percentages"),
+    ({'percentages': "50;half"}, "percentage 'half' must be from 0.01 to 100 in steps of 0.01"),
+    ({'percentages': "50;49.995"}, "percentage '49.995' must be from 0.01 to 100 in steps of 0.01"),
+    ({'percentages': "60.5;39.4"}, "percentages add up to 99.9, must be 100"),
+    ({'recipients': "", 'percentages': ""}, "at least one recipient is required"),
+    ({'recipients': f"0x1234;{BOB}"}, "0x1234 is not an address"),
+    ({'description': " "}, "description is required"),
+])
+def test_invalid_rows(overrides, message):
+    assert message in row(**overrides)['errors']
+
+def test_legacy_row():
+    """Contracts without SHARE_DENOMINATOR take whole percentages"""
+    assert parse_row(1, {'description': "Team lunch", 'total_celo': "0.05", 'recipients': f"{ALICE};{BOB}",
+                         'percentages': "60;40"}, 100)['percentages'] == [60, 40]
+    assert "percentage '33.5' must be from 1 to 100 in steps of 1" in parse_row(
+        1, {'description': "Team lunch", 'total_celo': "0.05", 'recipients': f"{ALICE};{BOB}",
+            'percentages': "33.5;66.5"}, 100)['errors']
+
+@pytest.mark.parametrize('amount', ["0", "-1", "abc", "0.0000000000000000001"])
+def test_invalid_amounts(amount):
+    assert row(total_celo=amount)['errors'][0].startswith("total_celo must be")
+
+def test_load_manifest_formats(tmp_path):
+    """CSV and JSONL manifests give the same rows"""
+    csv_path = tmp_path / "splits.csv"
+    csv_path.write_text("description,total_celo,recipients,percentages\n"
+                        f"Dinner,0.05,{ALICE};{BOB},50;50\n")
+    jsonl_path = tmp_path / "splits.jsonl"
+    jsonl_path.write_text(json.dumps({'description': "Dinner", 'total_celo': "0.05",
+                                      'recipients': [ALICE, BOB], 'percentages': [50, 50]}) + "\n")
+    assert load_manifest(str(csv_path)) == load_manifest(str(jsonl_path))
+
+def test_submit_pipelined(payment_splitter):
+    """Every row is created, in manifest order, with a window smaller than the batch"""
+    rows = [row(description=f"Split {i}") for i in range(10)]
+    for number, parsed in enumerate(rows, start=1):
+        parsed['row'] = number
+
+    results = submit_payments(payment_splitter, accounts[0], rows, window=4)
+
+    assert [result['status'] for result in results] == ['created'] * 10
+    assert [result['payment_id'] for result in results] == list(range(10))
+    assert payment_splitter.getPayment(9)[0] == "Split 9"
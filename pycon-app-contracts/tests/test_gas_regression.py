@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Test Gas Regression
+Current gas per function against the checked-in gas_baseline.json
+"""
+
+import pytest
+from brownie import accounts
+
+from scripts.gas_regression import CONTRACTS, THRESHOLD, compare, load_baseline, measure_all, save_baseline
+
+@pytest.mark.parametrize('name', list(CONTRACTS))
+def test_gas_within_baseline(name):
+    """No case uses more than THRESHOLD over its recorded gas, and a missing baseline fails"""
+    baseline = load_baseline()['contracts'].get(name)
+    assert baseline, f"no baseline for {name}: brownie run gas_regression main update"
+
+    measured = measure_all(CONTRACTS[name].deploy({"from": accounts[0]}))
+    _, regressions = compare(baseline, measured)
+    assert not regressions, "\n".join(
+        f"{key}: {before} -> {gas} ({change * 100:+.1f}%)" for key, before, gas, change in regressions)
+
+def test_compare():
+    """Increases above the threshold are regressions; savings and new cases are not"""
+    baseline = {'createPayment r=1 d=16': 100000, 'payInvoice r=1 d=16': 50000}
+    measured = {
+        'createPayment r=1 d=16': int(100000 * (1 + THRESHOLD)) + 1,
+        'payInvoice r=1 d=16': 40000,
+        'payInvoice (distributes) r=1 d=16': 80000,
+    }
+    rows, regressions = compare(baseline, measured)
+    assert [row[0] for row in regressions] == ['createPayment r=1 d=16']
+    assert rows[2] == ('payInvoice (distributes) r=1 d=16', None, 80000, None)
+
+def test_saved_baseline_loads(tmp_path):
+    """A recorded baseline reads back as written; a missing file has no contracts"""
+    path = str(tmp_path / "gas_baseline.json")
+    assert load_baseline(path)['contracts'] == {}
+    save_baseline({'PaymentSplitter': {'createPayment r=1 d=16': 100000}}, path)
+    assert load_baseline(path)['contracts'] == {'PaymentSplitter': {'createPayment r=1 d=16': 100000}}
@@ -4,34 +4,17 @@ Test Payment Splitter Contract
 Unit tests for the PaymentSplitter smart contract
 """
 
+import brownie
 import pytest
-from brownie import PaymentSplitter, accounts, Wei
+from brownie import Wei
 
-@pytest.fixture
-def payment_splitter():
-    """Deploy PaymentSplitter contract for testing"""
-    return PaymentSplitter.deploy({"from": accounts[0]})
-
-@pytest.fixture
-def alice():
-    """Test account Alice"""
-    return accounts[0]
-
-@pytest.fixture
-def bob():
-    """Test account Bob"""
-    return accounts[1]
-
-@pytest.fixture
-def carol():
-    """Test account Carol"""
-    return accounts[2]
+from scripts.shares import SHARE_DENOMINATOR, share_denominator
 
 def test_create_payment(payment_splitter, alice, bob, carol):
     """Test creating a payment split"""
     description = "Dinner at Cafe Javas"
     recipients = [alice, bob, carol]
-    percentages = [40, 30, 30]  # Must add up to 100
+    percentages = [4000, 3000, 3000]  # Basis points, must add up to 10000
     total_amount = Wei("0.1 ether")
     
     # Create payment
@@ -62,7 +45,7 @@ def test_pay_invoice(payment_splitter, alice, bob, carol):
     # Create payment first
     description = "Group lunch"
     recipients = [alice, bob]
-    percentages = [60, 40]
+    percentages = [6000, 4000]
     total_amount = Wei("0.05 ether")
     
     tx = payment_splitter.createPayment(
@@ -95,7 +78,7 @@ def test_payment_completion(payment_splitter, alice, bob, carol):
     # Create payment
     description = "Small bill"
     recipients = [alice, bob]
-    percentages = [50, 50]
+    percentages = [5000, 5000]
     total_amount = Wei("0.02 ether")
     
     tx = payment_splitter.createPayment(
@@ -128,28 +111,80 @@ def test_payment_completion(payment_splitter, alice, bob, carol):
     assert alice.balance() > alice_initial
     assert bob.balance() > bob_initial
 
-def test_invalid_percentages(payment_splitter, alice, bob):
-    """Test that percentages must add up to 100"""
-    description = "Invalid payment"
-    recipients = [alice, bob]
-    percentages = [60, 30]  # Only 90%, should fail
-    total_amount = Wei("0.1 ether")
+def test_overpayment_refunded(payment_splitter, alice, bob, carol):
+    """Only the missing amount is kept; the rest goes back to the contributor"""
+    total_amount = Wei("0.02 ether")
+    tx = payment_splitter.createPayment("Overpaid bill", [alice], [10000], total_amount, {"from": alice})
+    payment_id = tx.events['PaymentCreated']['paymentId']
+    payment_splitter.payInvoice(payment_id, {"from": bob, "value": Wei("0.015 ether")})
+    
+    carol_initial = carol.balance()
+    tx = payment_splitter.payInvoice(payment_id, {"from": carol, "value": Wei("0.01 ether")})
     
+    assert tx.events['ContributionMade']['amount'] == Wei("0.005 ether")
+    assert tx.events['Refunded']['amount'] == Wei("0.005 ether")
+    assert carol_initial - carol.balance() == Wei("0.005 ether") + tx.gas_used * tx.gas_price
+    assert payment_splitter.getContribution(payment_id, carol) == Wei("0.005 ether")
+    assert payment_splitter.getPayment(payment_id)[4] == total_amount
+    assert payment_splitter.balance() == 0
+
+def test_dust_to_last_recipient(payment_splitter, alice, bob, carol):
+    """Rounding dust is paid to the last recipient, nothing stays in the contract"""
+    total_amount = 101  # Wei: 33% of it is 33.33
+    tx = payment_splitter.createPayment("Odd bill", [alice, bob, carol], [3300, 3300, 3400], total_amount, {"from": alice})
+    payment_id = tx.events['PaymentCreated']['paymentId']
+    
+    bob_initial = bob.balance()
+    carol_initial = carol.balance()
+    tx = payment_splitter.payInvoice(payment_id, {"from": alice, "value": total_amount})
+    
+    assert bob.balance() - bob_initial == 33
+    assert carol.balance() - carol_initial == 101 - 33 - 33
+    assert payment_splitter.balance() == 0
+
+@pytest.mark.parametrize('percentages', [[60, 40], [6000, 3000], [6000, 5000], [2**16 + 5000, 5000]])
+def test_invalid_percentages(payment_splitter, alice, bob, percentages):
+    """Shares must add up to 10000 basis points, and cannot wrap around uint16"""
     with pytest.raises(Exception):
         payment_splitter.createPayment(
-            description,
-            recipients,
+            "Invalid payment",
+            [alice, bob],
             percentages,
-            total_amount,
+            Wei("0.1 ether"),
             {"from": alice}
         )
 
+@pytest.mark.parametrize('percentages', [[10000, 10000, 5000], [6000, 5000, 0], [2**16, 0, 0]])
+def test_shares_over_10000_rejected_in_loop(payment_splitter, alice, bob, carol, percentages):
+    """Shares past 10000 basis points revert with the message, not an arithmetic panic"""
+    with brownie.reverts("Shares must add up to 10000 basis points"):
+        payment_splitter.createPayment("Too many shares", [alice, bob, carol], percentages, 100, {"from": alice})
+
+def test_amount_too_large(payment_splitter, alice):
+    """Totals are bounded like V2's, well inside the uint240 stored per share"""
+    with brownie.reverts("Amount too large"):
+        payment_splitter.createPayment("Too much", [alice], [10000], 2**128, {"from": alice})
+
+def test_share_amounts_precomputed(payment_splitter, alice, bob, carol):
+    """createPayment stores each recipient's amount, the last one takes the dust"""
+    tx = payment_splitter.createPayment("Fine split", [alice, bob, carol], [3333, 3333, 3334], 10001, {"from": alice})
+    payment_id = tx.events['PaymentCreated']['paymentId']
+    assert payment_splitter.getShareAmounts(payment_id) == [3333, 3333, 10001 - 3333 - 3333]
+    assert payment_splitter.getPayment(payment_id)[2] == [3333, 3333, 3334]
+    
+    alice_initial = alice.balance()
+    bob_initial = bob.balance()
+    payment_splitter.payInvoice(payment_id, {"from": carol, "value": 10001})
+    assert alice.balance() - alice_initial == 3333
+    assert bob.balance() - bob_initial == 3333
+    assert payment_splitter.balance() == 0
+
 def test_double_payment_prevention(payment_splitter, alice, bob, carol):
     """Test that same person cannot pay twice"""
     # Create payment
     description = "Test payment"
     recipients = [alice, bob]
-    percentages = [50, 50]
+    percentages = [5000, 5000]
     total_amount = Wei("0.1 ether")
     
     tx = payment_splitter.createPayment(
@@ -180,7 +215,7 @@ def test_payment_id_increment(payment_splitter, alice, bob):
     tx1 = payment_splitter.createPayment(
         "First payment",
         [alice],
-        [100],
+        [10000],
         Wei("0.01 ether"),
         {"from": alice}
     )
@@ -191,7 +226,7 @@ def test_payment_id_increment(payment_splitter, alice, bob):
     tx2 = payment_splitter.createPayment(
         "Second payment",
         [bob],
-        [100],
+        [10000],
         Wei("0.01 ether"),
         {"from": alice}
     )
@@ -200,3 +235,59 @@ def test_payment_id_increment(payment_splitter, alice, bob):
     
     # Check nextPaymentId
     assert payment_splitter.nextPaymentId() == 2
+
+def test_get_payments_range(payment_splitter, alice, bob, carol):
+    """getPayments returns summaries for a page of ids, clamped to existing payments"""
+    for i in range(3):
+        payment_splitter.createPayment(f"Bill {i}", [alice, bob], [5000, 5000], Wei("0.01 ether"), {"from": alice})
+    payment_splitter.payInvoice(1, {"from": carol, "value": Wei("0.01 ether")})
+    
+    summaries = payment_splitter.getPayments(1, 5)
+    assert len(summaries) == 2
+    assert summaries[0] == ("Bill 1", 1, 2, Wei("0.01 ether"), Wei("0.01 ether"), False, alice)
+    assert summaries[1] == ("Bill 2", 2, 2, Wei("0.01 ether"), 0, True, alice)
+    
+    # Same positions as getPayment for description, amounts, status and creator
+    payment = payment_splitter.getPayment(2)
+    assert [summaries[1][i] for i in (0, 3, 4, 5, 6)] == [payment[i] for i in (0, 3, 4, 5, 6)]
+    
+    assert payment_splitter.getPayments(3, 5) == []
+    assert payment_splitter.getPayments(0, 0) == []
+    assert len(payment_splitter.getPayments(0, 2**256 - 1)) == 3
+
+def test_get_payment_summaries(payment_splitter, alice, bob):
+    """getPaymentSummaries keeps the order of the ids it is given"""
+    for i in range(3):
+        payment_splitter.createPayment(f"Bill {i}", [alice], [10000], Wei("0.01 ether"), {"from": alice})
+    
+    summaries = payment_splitter.getPaymentSummaries([2, 0, 7])
+    assert [summary[1] for summary in summaries] == [2, 0, 7]
+    assert summaries[0][0] == "Bill 2"
+    assert summaries[1][0] == "Bill 0"
+    # Unknown ids come back empty, like getPayment
+    assert summaries[2] == ("", 7, 0, 0, 0, False, "0x0000000000000000000000000000000000000000")
+
+def test_seeded_listing(seeded_splitter, seeded_payments):
+    """The last page of the pre-seeded contract stops at the last payment"""
+    assert seeded_splitter.nextPaymentId() == seeded_payments
+    summaries = seeded_splitter.getPayments(seeded_payments - 10, 50)
+    assert [summary[1] for summary in summaries] == list(range(seeded_payments - 10, seeded_payments))
+    assert summaries[-1][0] == f"Seeded {seeded_payments - 1}"
+
+def test_seeded_payment_completes(seeded_splitter, carol):
+    """Paying one seeded payment in full completes it"""
+    total = seeded_splitter.getPayment(500)[3]
+    tx = seeded_splitter.payInvoice(500, {"from": carol, "value": total})
+    assert 'PaymentCompleted' in tx.events
+    assert seeded_splitter.getPayment(500)[5] == False
+
+def test_seeded_state_is_restored(seeded_splitter, carol):
+    """The previous test's payment was rolled back, not carried over"""
+    payment = seeded_splitter.getPayment(500)
+    assert payment[4] == 0
+    assert payment[5] == True
+    assert seeded_splitter.hasPaid(500, carol) == False
+
+def test_share_denominator_read_from_contract(payment_splitter):
+    """Scripts take the share units from the contract"""
+    assert share_denominator(payment_splitter) == SHARE_DENOMINATOR
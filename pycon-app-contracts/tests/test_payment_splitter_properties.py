@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Property Tests for Payment Splitter
+Random splits and contribution sequences checked against the contract's invariants
+"""
+
+from collections import Counter
+
+import pytest
+from brownie import accounts, web3, Wei
+from brownie.test import given
+from eth_utils import to_checksum_address
+from hypothesis import settings, strategies as st
+
+MAX_RECIPIENTS = 200
+# PaymentSplitter.SHARE_DENOMINATOR: percentages are basis points
+SHARE_DENOMINATOR = 10000
+# Contributors are accounts[1:]; each may pay a split once
+MAX_CONTRIBUTIONS = 9
+
+@st.composite
+def splits(draw, max_recipients=MAX_RECIPIENTS):
+    """(recipients, percentages, total) with basis points summing to 10000, zeros allowed"""
+    count = draw(st.integers(1, max_recipients))
+    cuts = sorted(draw(st.lists(st.integers(0, SHARE_DENOMINATOR), min_size=count - 1, max_size=count - 1)))
+    percentages = [high - low for low, high in zip([0] + cuts, cuts + [SHARE_DENOMINATOR])]
+    # Well above the precompiles, so the 2300 gas transfer stipend always suffices
+    numbers = draw(st.lists(st.integers(2**100, 2**160 - 1), min_size=count, max_size=count))
+    recipients = [to_checksum_address(number.to_bytes(20, 'big')) for number in numbers]
+    total = draw(st.integers(1, Wei("1 ether")))
+    return recipients, percentages, total
+
+contributions = st.lists(st.integers(1, Wei("0.5 ether")), min_size=1, max_size=MAX_CONTRIBUTIONS)
+
+@given(split=splits(), amounts=contributions)
+def test_contribution_sequence(payment_splitter, split, amounts):
+    """collectedAmount, contributions, the one-payment-per-account guard and the final distribution"""
+    recipients, percentages, total = split
+    tx = payment_splitter.createPayment("Property split", recipients, percentages, total, {"from": accounts[0]})
+    payment_id = tx.events['PaymentCreated']['paymentId']
+
+    # Worked out in createPayment; the last recipient also gets the rounding
+    # dust, so exactly `total` is paid out
+    share_amounts = [total * percentage // SHARE_DENOMINATOR for percentage in percentages[:-1]]
+    share_amounts.append(total - sum(share_amounts))
+    assert payment_splitter.getShareAmounts(payment_id) == share_amounts
+    expected = Counter()
+    for recipient, share_amount in zip(recipients, share_amounts):
+        expected[recipient] += share_amount
+    before = {recipient: web3.eth.get_balance(recipient) for recipient in expected}
+    contract_before = payment_splitter.balance()
+
+    collected = 0
+    for contributor, amount in zip(accounts[1:], amounts):
+        if collected == total:
+            # Completed: nobody can pay any more
+            with pytest.raises(Exception):
+                payment_splitter.payInvoice(payment_id, {"from": contributor, "value": amount})
+            continue
+
+        contributor_before = contributor.balance()
+        tx = payment_splitter.payInvoice(payment_id, {"from": contributor, "value": amount})
+        accepted = min(amount, total - collected)
+        collected += accepted
+
+        # Anything past the total comes straight back
+        assert contributor_before - contributor.balance() == accepted + tx.gas_used * tx.gas_price
+        assert ('Refunded' in tx.events) == (amount > accepted)
+        assert payment_splitter.getContribution(payment_id, contributor) == accepted
+        assert payment_splitter.hasPaid(payment_id, contributor) == True
+        assert payment_splitter.getPayment(payment_id)[4] == collected
+        assert ('PaymentCompleted' in tx.events) == (collected == total)
+
+        # hasPaid guard: a second payment from the same account always reverts
+        with pytest.raises(Exception):
+            payment_splitter.payInvoice(payment_id, {"from": contributor, "value": 1})
+
+    completed = collected == total
+    assert payment_splitter.getPayment(payment_id)[5] == (not completed)
+
+    for recipient, share in expected.items():
+        assert web3.eth.get_balance(recipient) - before[recipient] == (share if completed else 0)
+    # Open payments hold what was collected, completed ones nothing
+    assert payment_splitter.balance() - contract_before == (0 if completed else collected)
+
+@given(percentages=st.lists(st.integers(0, SHARE_DENOMINATOR), min_size=1, max_size=20)
+       .filter(lambda p: sum(p) != SHARE_DENOMINATOR))
+@settings(max_examples=50)
+def test_percentages_must_sum_to_10000(payment_splitter, percentages):
+    """Any basis point vector that does not add up to 10000 is rejected"""
+    recipients = [accounts[i % 10] for i in range(len(percentages))]
+    with pytest.raises(Exception):
+        payment_splitter.createPayment("Bad split", recipients, percentages, Wei("0.01 ether"), {"from": accounts[0]})
+
+@given(split=splits(max_recipients=10))
+@settings(max_examples=50)
+def test_mismatched_arrays_rejected(payment_splitter, split):
+    """A recipient without a percentage (or the reverse) is rejected"""
+    recipients, percentages, total = split
+    with pytest.raises(Exception):
+        payment_splitter.createPayment("Mismatched", recipients + [accounts[1]], percentages, total, {"from": accounts[0]})
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Test Payment Splitter V2 Contract
+The PaymentSplitter behaviour, on the packed-storage contract
+"""
+
+import pytest
+from brownie import PaymentSplitter, PaymentSplitterV2, accounts, web3, Wei
+
+@pytest.fixture(scope="module")
+def payment_splitter():
+    """PaymentSplitterV2 deployed once for this module"""
+    return PaymentSplitterV2.deploy({"from": accounts[0]})
+
+def test_create_payment(payment_splitter, alice, bob, carol):
+    """Only the description hash is stored, the text is in the event"""
+    description = "Dinner at Cafe Javas"
+    recipients = [alice, bob, carol]
+    percentages = [4000, 3000, 3000]
+    total_amount = Wei("0.1 ether")
+
+    tx = payment_splitter.createPayment(description, recipients, percentages, total_amount, {"from": alice})
+
+    payment_id = tx.events['PaymentCreated']['paymentId']
+    assert payment_id == 0
+    assert tx.events['PaymentCreated']['description'] == description
+
+    payment = payment_splitter.getPayment(payment_id)
+    assert payment[0] == web3.keccak(text=description).hex()
+    assert payment[1] == recipients
+    assert payment[2] == percentages
+    assert payment[3] == total_amount
+    assert payment[4] == 0
+    assert payment[5] == True
+    assert payment[6] == alice
+
+def test_pay_invoice(payment_splitter, alice, bob, carol):
+    """Test paying an invoice"""
+    tx = payment_splitter.createPayment("Group lunch", [alice, bob], [6000, 4000], Wei("0.05 ether"), {"from": alice})
+    payment_id = tx.events['PaymentCreated']['paymentId']
+
+    contribution = Wei("0.02 ether")
+    payment_splitter.payInvoice(payment_id, {"from": carol, "value": contribution})
+
+    assert payment_splitter.getContribution(payment_id, carol) == contribution
+    assert payment_splitter.hasPaid(payment_id, carol) == True
+    assert payment_splitter.hasPaid(payment_id, bob) == False
+
+    payment = payment_splitter.getPayment(payment_id)
+    assert payment[4] == contribution
+    assert payment[5] == True
+
+def test_payment_completion(payment_splitter, alice, bob, carol):
+    """Recipients receive their percentage of the total"""
+    total_amount = Wei("0.02 ether")
+    tx = payment_splitter.createPayment("Small bill", [alice, bob], [7000, 3000], total_amount, {"from": alice})
+    payment_id = tx.events['PaymentCreated']['paymentId']
+
+    alice_initial = alice.balance()
+    bob_initial = bob.balance()
+
+    tx = payment_splitter.payInvoice(payment_id, {"from": carol, "value": total_amount})
+
+    assert 'PaymentCompleted' in tx.events
+    assert payment_splitter.getPayment(payment_id)[5] == False
+    assert alice.balance() - alice_initial == total_amount * 7000 // 10000
+    assert bob.balance() - bob_initial == total_amount * 3000 // 10000
+
+def test_overpayment_refunded(payment_splitter, alice, bob, carol):
+    """Only the missing amount is kept; the rest goes back to the contributor"""
+    tx = payment_splitter.createPayment("Overpaid bill", [alice], [10000], Wei("0.02 ether"), {"from": alice})
+    payment_id = tx.events['PaymentCreated']['paymentId']
+
+    carol_initial = carol.balance()
+    tx = payment_splitter.payInvoice(payment_id, {"from": carol, "value": Wei("0.03 ether")})
+
+    assert tx.events['Refunded']['amount'] == Wei("0.01 ether")
+    assert carol_initial - carol.balance() == Wei("0.02 ether") + tx.gas_used * tx.gas_price
+    assert payment_splitter.getContribution(payment_id, carol) == Wei("0.02 ether")
+    assert payment_splitter.balance() == 0
+
+def test_dust_to_last_recipient(payment_splitter, alice, bob, carol):
+    """Rounding dust is paid to the last share, on push and pull payments"""
+    for create, released in [(payment_splitter.createPayment, 101), (payment_splitter.createPullPayment, 35)]:
+        tx = create("Odd bill", [alice, bob, carol], [3300, 3300, 3400], 101, {"from": alice})
+        payment_id = tx.events['PaymentCreated']['paymentId']
+        carol_initial = carol.balance()
+        payment_splitter.payInvoice(payment_id, {"from": bob, "value": 101})
+        if payment_splitter.isPullPayment(payment_id):
+            payment_splitter.withdraw(payment_id, 2, {"from": alice})
+        assert carol.balance() - carol_initial == 101 - 33 - 33
+        assert payment_splitter.releasedAmount(payment_id) == released
+
+@pytest.mark.parametrize('percentages', [[60, 40], [6000, 3000], [6000, 5000], [2**96 + 5000, 5000]])
+def test_invalid_percentages(payment_splitter, alice, bob, percentages):
+    """Shares must add up to 10000 basis points, and cannot wrap around uint96"""
+    with pytest.raises(Exception):
+        payment_splitter.createPayment("Invalid payment", [alice, bob], percentages, Wei("0.1 ether"), {"from": alice})
+
+def test_share_amounts(payment_splitter, alice, bob, carol):
+    """getShareAmounts works out the same amounts the payout sends"""
+    tx = payment_splitter.createPayment("Fine split", [alice, bob, carol], [3333, 3333, 3334], 10001, {"from": alice})
+    assert payment_splitter.getShareAmounts(tx.events['PaymentCreated']['paymentId']) == [3333, 3333, 3335]
+    assert payment_splitter.getShareAmounts(99) == []
+
+def test_amount_too_large(payment_splitter, alice):
+    """Totals are stored as uint128"""
+    with pytest.raises(Exception):
+        payment_splitter.createPayment("Too much", [alice], [10000], 2**128, {"from": alice})
+
+def test_double_payment_prevention(payment_splitter, alice, bob, carol):
+    """Test that same person cannot pay twice"""
+    tx = payment_splitter.createPayment("Test payment", [alice, bob], [5000, 5000], Wei("0.1 ether"), {"from": alice})
+    payment_id = tx.events['PaymentCreated']['paymentId']
+
+    payment_splitter.payInvoice(payment_id, {"from": carol, "value": Wei("0.05 ether")})
+
+    with pytest.raises(Exception):
+        payment_splitter.payInvoice(payment_id, {"from": carol, "value": Wei("0.05 ether")})
+
+def test_payment_id_increment(payment_splitter, alice, bob):
+    """Test that payment IDs increment correctly"""
+    tx1 = payment_splitter.createPayment("First payment", [alice], [10000], Wei("0.01 ether"), {"from": alice})
+    assert tx1.events['PaymentCreated']['paymentId'] == 0
+
+    tx2 = payment_splitter.createPayment("Second payment", [bob], [10000], Wei("0.01 ether"), {"from": alice})
+    assert tx2.events['PaymentCreated']['paymentId'] == 1
+
+    assert payment_splitter.nextPaymentId() == 2
+
+def test_cheaper_than_v1(payment_splitter, alice, bob, carol):
+    """createPayment and the distributing payInvoice both use less gas than v1"""
+    v1 = PaymentSplitter.deploy({"from": alice})
+    args = ("Gas comparison", [alice, bob, carol], [4000, 3000, 3000], Wei("0.01 ether"), {"from": alice})
+
+    created_v1 = v1.createPayment(*args)
+    created_v2 = payment_splitter.createPayment(*args)
+    assert created_v2.gas_used < created_v1.gas_used
+
+    paid_v1 = v1.payInvoice(0, {"from": carol, "value": Wei("0.01 ether")})
+    paid_v2 = payment_splitter.payInvoice(0, {"from": carol, "value": Wei("0.01 ether")})
+    assert paid_v2.gas_used < paid_v1.gas_used
+
+@pytest.fixture
+def pull_payment(payment_splitter, alice, bob, carol):
+    """A completed 0.02 CELO pull payment split 70/30 between Alice and Bob"""
+    tx = payment_splitter.createPullPayment("Pull bill", [alice, bob], [7000, 3000], Wei("0.02 ether"), {"from": alice})
+    payment_id = tx.events['PaymentCreated']['paymentId']
+    payment_splitter.payInvoice(payment_id, {"from": carol, "value": Wei("0.02 ether")})
+    return payment_id
+
+def test_pull_completion_keeps_funds(payment_splitter, alice, bob, carol):
+    """Completing a pull payment marks it done without paying anyone"""
+    tx = payment_splitter.createPullPayment("Pull bill", [alice, bob], [7000, 3000], Wei("0.02 ether"), {"from": alice})
+    payment_id = tx.events['PaymentCreated']['paymentId']
+    assert payment_splitter.isPullPayment(payment_id) == True
+
+    alice_initial = alice.balance()
+    tx = payment_splitter.payInvoice(payment_id, {"from": carol, "value": Wei("0.02 ether")})
+
+    assert 'PaymentCompleted' in tx.events
+    assert payment_splitter.getPayment(payment_id)[5] == False
+    assert alice.balance() == alice_initial
+    assert payment_splitter.balance() == Wei("0.02 ether")
+    assert payment_splitter.releasedAmount(payment_id) == 0
+
+def test_withdraw(payment_splitter, pull_payment, alice, bob, carol):
+    """Each share is paid to its recipient once, whoever calls withdraw"""
+    bob_initial = bob.balance()
+    tx = payment_splitter.withdraw(pull_payment, 1, {"from": carol})
+
+    assert tx.events['Withdrawn']['recipient'] == bob
+    assert tx.events['Withdrawn']['amount'] == Wei("0.006 ether")
+    assert bob.balance() - bob_initial == Wei("0.006 ether")
+    assert payment_splitter.withdrawn(pull_payment, 1) == True
+    assert payment_splitter.withdrawn(pull_payment, 0) == False
+    assert payment_splitter.releasedAmount(pull_payment) == Wei("0.006 ether")
+
+    with pytest.raises(Exception):
+        payment_splitter.withdraw(pull_payment, 1, {"from": bob})
+
+    payment_splitter.withdraw(pull_payment, 0, {"from": alice})
+    assert payment_splitter.releasedAmount(pull_payment) == Wei("0.02 ether")
+    assert payment_splitter.balance() == 0
+
+def test_withdraw_rejected(payment_splitter, pull_payment, alice, bob, carol):
+    """No withdrawals before completion, from push payments, or past the last share"""
+    tx = payment_splitter.createPullPayment("Open", [alice], [10000], Wei("0.02 ether"), {"from": alice})
+    open_id = tx.events['PaymentCreated']['paymentId']
+    tx = payment_splitter.createPayment("Push", [alice], [10000], Wei("0.01 ether"), {"from": alice})
+    push_id = tx.events['PaymentCreated']['paymentId']
+    payment_splitter.payInvoice(push_id, {"from": carol, "value": Wei("0.01 ether")})
+
+    for payment_id, index in [(open_id, 0), (push_id, 0), (pull_payment, 2), (99, 0)]:
+        with pytest.raises(Exception):
+            payment_splitter.withdraw(payment_id, index, {"from": alice})
+
+def test_pull_completion_gas_is_constant(payment_splitter, alice, carol):
+    """The completing payInvoice costs the same for 1 and 50 recipients"""
+    gas_used = []
+    for count in [1, 50]:
+        recipients = [f"0x{i + 1:040x}" for i in range(count)]
+        percentages = [10000 // count] * count
+        percentages[0] += 10000 - sum(percentages)
+        tx = payment_splitter.createPullPayment("Gas", recipients, percentages, Wei("0.01 ether"), {"from": alice})
+        payment_id = tx.events['PaymentCreated']['paymentId']
+        tx = payment_splitter.payInvoice(payment_id, {"from": carol, "value": Wei("0.01 ether")})
+        gas_used.append(tx.gas_used)
+    # Only the payment id's calldata bytes differ
+    assert abs(gas_used[0] - gas_used[1]) < 100
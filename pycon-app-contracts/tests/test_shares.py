@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test Payment Shares
+Percentages to basis points and back, and whole percentages on legacy contracts
+"""
+
+import pytest
+
+from scripts.shares import (LEGACY_SHARE_DENOMINATOR, SHARE_DENOMINATOR, even_split, format_percent,
+                            share_unit, to_basis_points)
+
+@pytest.mark.parametrize('percentage, basis_points', [
+    (25, 2500), ("33.33", 3333), ("0.5", 50), (" 100 ", 10000), ("0.01", 1), (12.5, 1250),
+])
+def test_to_basis_points(percentage, basis_points):
+    assert to_basis_points(percentage) == basis_points
+    assert to_basis_points(format_percent(basis_points)) == basis_points
+
+@pytest.mark.parametrize('percentage', ["0.001", "33.333", "0", "100.01", "-5", "half", "", "inf", "nan"])
+def test_invalid_percentages(percentage):
+    with pytest.raises(ValueError):
+        to_basis_points(percentage)
+
+def test_legacy_percentages():
+    """Contracts deployed before SHARE_DENOMINATOR take whole percentages"""
+    assert to_basis_points("40", LEGACY_SHARE_DENOMINATOR) == 40
+    assert format_percent(40, LEGACY_SHARE_DENOMINATOR) == "40"
+    assert share_unit(LEGACY_SHARE_DENOMINATOR) == "1"
+    with pytest.raises(ValueError, match="multiple of 1%"):
+        to_basis_points("33.33", LEGACY_SHARE_DENOMINATOR)
+    assert even_split(3, LEGACY_SHARE_DENOMINATOR) == [34, 33, 33]
+
+def test_format_percent():
+    assert [format_percent(b) for b in [3333, 2500, 50, 1, 10000]] == ["33.33", "25", "0.5", "0.01", "100"]
+    assert share_unit() == "0.01"
+
+@pytest.mark.parametrize('count', [1, 3, 7, 200])
+def test_even_split(count):
+    """Adds up to 100% and differs by at most the remainder on the first share"""
+    shares = even_split(count)
+    assert len(shares) == count
+    assert sum(shares) == SHARE_DENOMINATOR
+    assert set(shares[1:]) <= {SHARE_DENOMINATOR // count}
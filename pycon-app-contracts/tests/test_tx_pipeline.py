@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Test Transaction Pipeline
+Nonce assignment, in-flight limit, resubmission and gap filling against a scripted node
+"""
+
+import hashlib
+import json
+import threading
+import time
+
+import pytest
+from web3.exceptions import TransactionNotFound
+
+from scripts.nonce_manager import NonceManager
+from scripts.tx_pipeline import TxPipeline
+
+SENDER = "0x70997970C51812dc3A010C7d01b50e0d17dc79C8"
+
+
+class Signed:
+    def __init__(self, tx):
+        self.rawTransaction = json.dumps(tx, sort_keys=True).encode()
+        self.hash = hashlib.sha256(self.rawTransaction).digest()
+
+
+class FakeEth:
+    """Just enough of web3.eth for the pipeline; mines on demand.
+
+    ``reject`` maps a nonce to a list of error messages returned by the
+    next sends of that nonce ("already known" still keeps the transaction);
+    ``stuck`` holds nonces whose first broadcast is accepted but never mined.
+    """
+
+    chain_id = 1337
+    gas_price = 10
+
+    def __init__(self, start_nonce=5):
+        self.start_nonce = start_nonce
+        self.sent = []
+        self.mined = {}
+        self.block_number = 0
+        self.reject = {}
+        self.stuck = set()
+        self.never_mined = set()
+        self.account = self
+        self.lock = threading.Lock()
+        # Cleared to hold broadcasts until the test has submitted everything
+        self.accepting = threading.Event()
+        self.accepting.set()
+
+    def sign_transaction(self, tx, key):
+        return Signed(tx)
+
+    def get_transaction_count(self, address, block):
+        return self.start_nonce
+
+    def estimate_gas(self, tx):
+        return 100000
+
+    def send_raw_transaction(self, raw):
+        tx = json.loads(raw)
+        self.accepting.wait()
+        with self.lock:
+            errors = self.reject.get(tx['nonce'])
+            if errors:
+                message = errors.pop(0)
+                if message == "already known":
+                    self.sent.append(tx)
+                raise ValueError({'code': -32000, 'message': message})
+            self.sent.append(tx)
+            tx_hash = hashlib.sha256(raw).digest()
+            if tx['nonce'] in self.stuck:
+                self.stuck.discard(tx['nonce'])
+                self.never_mined.add(tx_hash)
+            return tx_hash
+
+    def mine(self):
+        """Mine every sent transaction whose nonce is not already used"""
+        with self.lock:
+            used = {tx['nonce'] for tx, _ in self.mined.values()}
+            for tx in self.sent:
+                raw = json.dumps(tx, sort_keys=True).encode()
+                tx_hash = hashlib.sha256(raw).digest()
+                if tx['nonce'] in used or tx_hash in self.never_mined:
+                    continue
+                used.add(tx['nonce'])
+                self.mined[tx_hash] = (tx, {'transactionHash': tx_hash, 'status': 1, 'nonce': tx['nonce']})
+            self.block_number += 1
+
+    def get_transaction_receipt(self, tx_hash):
+        with self.lock:
+            if tx_hash not in self.mined:
+                raise TransactionNotFound(tx_hash)
+            return self.mined[tx_hash][1]
+
+
+class FakeWeb3:
+    def __init__(self, **kwargs):
+        self.eth = FakeEth(**kwargs)
+
+
+class Account:
+    address = SENDER
+    private_key = "0x" + "11" * 32
+
+    def __str__(self):
+        return self.address
+
+
+def miner(eth, stop):
+    while not stop.is_set():
+        eth.mine()
+        time.sleep(0.01)
+
+@pytest.fixture
+def node():
+    web3 = FakeWeb3()
+    stop = threading.Event()
+    thread = threading.Thread(target=miner, args=(web3.eth, stop), daemon=True)
+    thread.start()
+    yield web3
+    stop.set()
+    thread.join()
+
+def transfer(value):
+    return {'to': SENDER, 'value': value, 'gas': 21000}
+
+def test_consecutive_nonces(node):
+    """Nonces start at the pending count and every transaction is mined"""
+    with TxPipeline(node, Account(), max_in_flight=4, poll_interval=0.01) as pipeline:
+        pending = [pipeline.submit(transfer(i)) for i in range(20)]
+    assert [p.nonce for p in pending] == list(range(5, 25))
+    assert all(p.receipt['status'] == 1 for p in pending)
+    assert [p.receipt['nonce'] for p in pending] == list(range(5, 25))
+
+def test_in_flight_limit():
+    """submit() blocks while max_in_flight transactions are unmined"""
+    web3 = FakeWeb3()
+    pipeline = TxPipeline(web3, Account(), max_in_flight=3, poll_interval=0.01)
+    for i in range(3):
+        pipeline.submit(transfer(i))
+    blocked = threading.Thread(target=pipeline.submit, args=(transfer(3),))
+    blocked.start()
+    blocked.join(0.2)
+    assert blocked.is_alive()
+
+    web3.eth.mine()
+    blocked.join(2)
+    assert not blocked.is_alive()
+    # The fourth broadcast happens on a worker thread; mine only once it is sent
+    deadline = time.monotonic() + 2
+    while len(web3.eth.sent) < 4 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    web3.eth.mine()
+    assert len(pipeline.wait_all(timeout=2)) == 4
+    pipeline.close()
+
+def test_underpriced_is_resent_higher(node):
+    """An underpriced send is retried at a bumped price, later sends start from it"""
+    node.eth.reject[5] = ["transaction underpriced"]
+    with TxPipeline(node, Account(), poll_interval=0.01) as pipeline:
+        first = pipeline.submit(transfer(1))
+        first.wait(timeout=2)
+        second = pipeline.submit(transfer(2))
+    assert first.tx['gasPrice'] == 12
+    assert second.tx['gasPrice'] == first.tx['gasPrice']
+    assert second.receipt['status'] == 1
+
+def test_stuck_transaction_replaced(node):
+    """Without a receipt after resubmit_after, the same nonce is sent at a higher price"""
+    node.eth.stuck.add(5)
+    with TxPipeline(node, Account(), poll_interval=0.01, resubmit_after=0.1) as pipeline:
+        pending = pipeline.submit(transfer(1))
+        receipt = pending.wait(timeout=2)
+    assert len(pending.hashes) == 2
+    assert pending.tx_hash == receipt['transactionHash'] == pending.hashes[1]
+    assert [tx['gasPrice'] for tx in node.eth.sent] == [10, 12]
+
+def test_failed_send_fills_nonce_gap(node):
+    """A send that fails after later nonces went out is replaced by a self transfer"""
+    node.eth.reject[5] = ["insufficient funds for gas * price + value"]
+    node.eth.accepting.clear()
+    with TxPipeline(node, Account(), poll_interval=0.01) as pipeline:
+        pending = [pipeline.submit(transfer(i)) for i in range(1, 4)]
+        node.eth.accepting.set()
+        pipeline.wait_all(timeout=2)
+    assert "insufficient funds" in str(pending[0].error)
+    with pytest.raises(ValueError):
+        pending[0].wait()
+    assert [p.receipt['status'] for p in pending[1:]] == [1, 1]
+    filler = next(tx for tx in node.eth.sent if tx['nonce'] == 5)
+    assert filler['to'] == SENDER and filler['value'] == 0 and filler['gas'] == 21000
+
+def test_known_transaction_counts_as_sent(node):
+    """'already known' from a re-broadcast keeps the locally computed hash"""
+    node.eth.reject[5] = ["already known"]
+    with TxPipeline(node, Account(), poll_interval=0.01) as pipeline:
+        pending = pipeline.submit(transfer(1))
+        time.sleep(0.1)
+    assert pending.error is None
+    assert pending.hashes == [Signed(pending.tx).hash]
+
+def test_resync_keeps_issued_nonces():
+    """resync() moves up to the node's pending count, never back below nonces already handed out"""
+    web3 = FakeWeb3()
+    nonces = NonceManager(web3, SENDER)
+    assert [nonces.next() for _ in range(3)] == [5, 6, 7]
+    web3.eth.start_nonce = 6
+    nonces.resync()
+    assert nonces.next() == 8
+    web3.eth.start_nonce = 20
+    nonces.resync()
+    assert nonces.next() == 20
+
+def test_used_nonce_renumbered_past_issued_ones(node):
+    """A nonce used from elsewhere gets a fresh one after those other sends already hold"""
+    node.eth.accepting.clear()
+    with TxPipeline(node, Account(), poll_interval=0.01) as pipeline:
+        pending = [pipeline.submit(transfer(i)) for i in range(1, 4)]
+        # Nonce 5 was sent from another process; 6 and 7 are held here, not broadcast yet
+        node.eth.start_nonce = 6
+        node.eth.reject[5] = ["nonce too low"]
+        node.eth.accepting.set()
+        pipeline.wait_all(timeout=2)
+    assert [p.nonce for p in pending] == [8, 6, 7]
+    assert all(p.receipt['status'] == 1 for p in pending)
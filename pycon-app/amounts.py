@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Wei Amounts
+Integer-only CELO amounts and payment progress, formatted exactly like the Decimal path
+"""
+
+# Wei per CELO is 10**18
+ETHER_DECIMALS = 18
+
+# Precision of decimal's default context, which the Decimal progress division ran in
+DECIMAL_PRECISION = 28
+
+# Powers of ten, past the largest shift two uint256 amounts can need
+_POW10 = [10**n for n in range(160)]
+
+
+def format_ether(wei):
+    """JSON value of w3.from_wei(wei, 'ether'): the Decimal's str(), or int 0.
+
+    from_wei divides exactly and strips trailing zeros down to exponent 0,
+    which is the same as dropping up to 18 trailing zeros from the digits.
+    """
+    if wei == 0:
+        return 0
+    return _to_sci_string(*_ether_digits(wei))
+
+
+def format_progress(collected, total):
+    """JSON value of ``from_wei(collected) / from_wei(total) * 100``, or 0 without a total.
+
+    Reproduces decimal's division and multiplication at 28 significant digits
+    (round half even), including the exponent of exact and zero results.
+    """
+    return format_amounts(collected, total)[2]
+
+
+def format_amounts(collected, total):
+    """(total, collected, progress) JSON values, sharing the digit work between them"""
+    if total == 0:
+        return 0, format_ether(collected), 0
+    total_digits = _ether_digits(total)
+    if collected == 0:
+        # 0 / x keeps the ideal exponent; * 100 does not change it
+        return _to_sci_string(*total_digits), 0, _to_sci_string('0', -total_digits[1])
+    collected_digits = _ether_digits(collected)
+    return (_to_sci_string(*total_digits),
+            _to_sci_string(*collected_digits),
+            _progress(collected, total, collected_digits, total_digits))
+
+
+def _progress(collected, total, collected_digits, total_digits):
+    if collected == total:
+        return '100'
+
+    # Scale so the quotient has 29 or 30 digits, one or two more than kept
+    shift = (len(total_digits[0]) + total_digits[1]) - (len(collected_digits[0]) + collected_digits[1])
+    shift += DECIMAL_PRECISION + 1
+    if shift >= 0:
+        coefficient, remainder = divmod(collected * _POW10[shift], total)
+    else:
+        coefficient, remainder = divmod(collected, total * _POW10[-shift])
+    if not remainder:
+        return _exact_progress(collected_digits, total_digits)
+
+    # Inexact: the result is the quotient correctly rounded to 28 digits
+    drop = 2 if coefficient >= _POW10[DECIMAL_PRECISION + 1] else 1
+    coefficient, kept = divmod(coefficient, _POW10[drop])
+    half = 5 * _POW10[drop - 1]
+    if kept > half or (kept == half and (remainder or coefficient % 2)):
+        coefficient += 1
+    exponent = drop - shift
+    if coefficient == _POW10[DECIMAL_PRECISION]:
+        coefficient //= 10
+        exponent += 1
+    # A full-precision coefficient times 100 only shifts the exponent
+    return _to_sci_string(str(coefficient), exponent + 2)
+
+
+def _exact_progress(collected_digits, total_digits):
+    # Decimal's exact division: strip zeros towards the ideal exponent, then round and multiply
+    (collected, collected_exponent), (total, total_exponent) = collected_digits, total_digits
+    ideal_exponent = collected_exponent - total_exponent
+    shift = len(total) - len(collected) + DECIMAL_PRECISION + 1
+    exponent = ideal_exponent - shift
+    if shift >= 0:
+        coefficient = int(collected) * _POW10[shift] // int(total)
+    else:
+        coefficient = int(collected) // (int(total) * _POW10[-shift])
+    while exponent < ideal_exponent and coefficient % 10 == 0:
+        coefficient //= 10
+        exponent += 1
+    coefficient, exponent = _round(coefficient, exponent)
+    coefficient, exponent = _round(coefficient * 100, exponent)
+    return _to_sci_string(str(coefficient), exponent)
+
+
+def _ether_digits(wei):
+    digits = str(wei)
+    zeros = min(len(digits) - len(digits.rstrip('0')), ETHER_DECIMALS)
+    if zeros:
+        digits = digits[:-zeros]
+    return digits, zeros - ETHER_DECIMALS
+
+
+def _round(coefficient, exponent):
+    # Round half even to DECIMAL_PRECISION digits, like Decimal._fix()
+    drop = len(str(coefficient)) - DECIMAL_PRECISION
+    if drop <= 0:
+        return coefficient, exponent
+    coefficient, remainder = divmod(coefficient, 10**drop)
+    half = 5 * 10**(drop - 1)
+    if remainder > half or (remainder == half and coefficient % 2):
+        coefficient += 1
+    exponent += drop
+    if coefficient == 10**DECIMAL_PRECISION:
+        coefficient //= 10
+        exponent += 1
+    return coefficient, exponent
+
+
+def _to_sci_string(digits, exponent):
+    # str(Decimal) for a non-negative coefficient string and exponent
+    left_digits = exponent + len(digits)
+    if exponent <= 0 and left_digits > -6:
+        if exponent == 0:
+            return digits
+        if left_digits > 0:
+            return digits[:left_digits] + '.' + digits[left_digits:]
+        return '0.' + '0' * -left_digits + digits
+    number = digits[0] + '.' + digits[1:] if len(digits) > 1 else digits
+    return f"{number}E{left_digits - 1:+d}"
@@ -4,25 +4,74 @@ Payment Splitter Flask App
 A beautiful web interface for the PaymentSplitter DApp
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+from flask import Flask, Response, g, render_template, request, session, jsonify, redirect, url_for, flash
+import functools
 import os
+import queue
+import time
 from dotenv import load_dotenv
 from web3 import Web3
+from web3.exceptions import ContractLogicError
 import json
+from eth_utils import event_abi_to_log_topic
+from hexbytes import HexBytes
+from amounts import format_amounts
+from batch_reads import DEFAULT_SUMMARY_PAGE_SIZE, BatchReader, SummaryReader
+from calldata import CalldataEncoder
+from indexer import PaymentIndex
+from json_provider import STREAM_CHUNK_ROWS, FastJSONProvider
+from live_feed import PaymentFeed, sse_message
+from paging import PAGING_ARGS, encode_cursor, page_by_id, parse_page_query
+from payment_cache import PaymentCache
+from gas_oracle import GasOracle
+from gas_estimator import GasEstimator
+from rpc_pool import PooledHTTPProvider, register_metrics
+from shares import LEGACY_SHARE_DENOMINATOR, parse_percentage, share_percent
+from metrics import APP_ERRORS, CONTENT_TYPE, REGISTRY, observe_request
+from page_cache import PageCache, not_modified
+from static_assets import IMMUTABLE_MAX_AGE, StaticAssets
 
 # Load environment variables
 load_dotenv()
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 app.secret_key = os.getenv('SECRET_KEY', 'your-secret-key-here')
 
 # Contract configuration
 CONTRACT_ADDRESS = os.getenv('CONTRACT_ADDRESS', '0x074adfDF9e5330d4fB63A33C84217E338c47C03A')
-CELO_RPC_URL = "https://alfajores-forno.celo-testnet.org"
-EXPLORER_URL = "https://alfajores.celoscan.io"
+CELO_RPC_URL = os.getenv('CELO_RPC_URL', "https://alfajores-forno.celo-testnet.org")
+EXPLORER_URL = os.getenv('EXPLORER_URL', "https://alfajores.celoscan.io")
+
+# RPC endpoints to spread reads over and fail over between, comma-separated
+CELO_RPC_URLS = [url.strip() for url in os.getenv('CELO_RPC_URLS', CELO_RPC_URL).split(',') if url.strip()]
+RPC_POOL_OPTIONS = {
+    'pool_size': int(os.getenv('RPC_POOL_SIZE', '32')),
+    'timeout': float(os.getenv('RPC_TIMEOUT', '10')),
+    'hedge_delay': float(os.getenv('RPC_HEDGE_DELAY', '0.3')),
+    'failure_threshold': int(os.getenv('RPC_BREAKER_FAILURES', '3')),
+    'cooldown': float(os.getenv('RPC_BREAKER_COOLDOWN', '30')),
+}
 
 # Initialize Web3
-w3 = Web3(Web3.HTTPProvider(CELO_RPC_URL))
+w3 = Web3(PooledHTTPProvider(CELO_RPC_URLS, **RPC_POOL_OPTIONS))
+
+# PaymentSummary[] returned by getPayments/getPaymentSummaries; fields 0 and 3-6
+# are at the same positions as in a getPayment() tuple
+PAYMENT_SUMMARY_OUTPUT = {
+    "components": [
+        {"internalType": "string", "name": "description", "type": "string"},
+        {"internalType": "uint256", "name": "id", "type": "uint256"},
+        {"internalType": "uint256", "name": "recipientCount", "type": "uint256"},
+        {"internalType": "uint256", "name": "totalAmount", "type": "uint256"},
+        {"internalType": "uint256", "name": "collectedAmount", "type": "uint256"},
+        {"internalType": "bool", "name": "isActive", "type": "bool"},
+        {"internalType": "address", "name": "creator", "type": "address"}
+    ],
+    "internalType": "struct PaymentSplitter.PaymentSummary[]",
+    "name": "summaries",
+    "type": "tuple[]"
+}
 
 # Contract ABI (simplified for the web interface)
 CONTRACT_ABI = [
@@ -60,29 +109,466 @@ CONTRACT_ABI = [
         "stateMutability": "view",
         "type": "function"
     },
+    {
+        "inputs": [
+            {"internalType": "uint256", "name": "_start", "type": "uint256"},
+            {"internalType": "uint256", "name": "_count", "type": "uint256"}
+        ],
+        "name": "getPayments",
+        "outputs": [PAYMENT_SUMMARY_OUTPUT],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [{"internalType": "uint256[]", "name": "_paymentIds", "type": "uint256[]"}],
+        "name": "getPaymentSummaries",
+        "outputs": [PAYMENT_SUMMARY_OUTPUT],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "REFUNDS_OVERPAYMENT",
+        "outputs": [{"internalType": "bool", "name": "", "type": "bool"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
+    {
+        "inputs": [],
+        "name": "SHARE_DENOMINATOR",
+        "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
+        "stateMutability": "view",
+        "type": "function"
+    },
     {
         "inputs": [],
         "name": "nextPaymentId",
         "outputs": [{"internalType": "uint256", "name": "", "type": "uint256"}],
         "stateMutability": "view",
         "type": "function"
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "internalType": "uint256", "name": "paymentId", "type": "uint256"},
+            {"indexed": False, "internalType": "string", "name": "description", "type": "string"},
+            {"indexed": False, "internalType": "address", "name": "creator", "type": "address"},
+            {"indexed": False, "internalType": "uint256", "name": "totalAmount", "type": "uint256"}
+        ],
+        "name": "PaymentCreated",
+        "type": "event"
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "internalType": "uint256", "name": "paymentId", "type": "uint256"},
+            {"indexed": False, "internalType": "address", "name": "contributor", "type": "address"},
+            {"indexed": False, "internalType": "uint256", "name": "amount", "type": "uint256"}
+        ],
+        "name": "ContributionMade",
+        "type": "event"
+    },
+    {
+        "anonymous": False,
+        "inputs": [
+            {"indexed": True, "internalType": "uint256", "name": "paymentId", "type": "uint256"}
+        ],
+        "name": "PaymentCompleted",
+        "type": "event"
     }
 ]
 
 # Initialize contract
 contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
 
+@functools.lru_cache(maxsize=None)
+def share_denominator():
+    """What the contract's percentages[] add up to, read once per process.
+
+    10000 (basis points) on current contracts; those deployed before
+    SHARE_DENOMINATOR revert the call and use whole percentages. Other
+    errors are raised, and the read is retried on the next call.
+    """
+    try:
+        return contract.functions.SHARE_DENOMINATOR().call()
+    except ContractLogicError:
+        return LEGACY_SHARE_DENOMINATOR
+
+# createPayment/payInvoice calldata is encoded locally, the node is not involved
+calldata = CalldataEncoder(CONTRACT_ABI, codec=w3.codec)
+
+# Batched reader for listing endpoints (getPayment calls per JSON-RPC batch)
+RPC_BATCH_SIZE = int(os.getenv('RPC_BATCH_SIZE', '100'))
+batch_reader = BatchReader(w3, contract, batch_size=RPC_BATCH_SIZE)
+
+# Listings read a page of summaries per eth_call (getPayments/getPaymentSummaries),
+# or batched getPayment calls on contracts deployed without those views
+SUMMARY_PAGE_SIZE = int(os.getenv('SUMMARY_PAGE_SIZE', str(DEFAULT_SUMMARY_PAGE_SIZE)))
+summary_reader = SummaryReader(batch_reader, page_size=SUMMARY_PAGE_SIZE)
+
+# Optional local event index, kept up to date by `python indexer.py`
+INDEX_DB_PATH = os.getenv('INDEX_DB_PATH')
+payment_index = PaymentIndex(INDEX_DB_PATH) if INDEX_DB_PATH else None
+
+# Contract deployment block, where event log scans start
+CONTRACT_START_BLOCK = int(os.getenv('INDEXER_START_BLOCK', '0'))
+
+# getPayment cache: completed payments are final, active ones live for one block,
+# and a new block is noticed up to PAYMENT_CACHE_TTL seconds late
+PAYMENT_CACHE_SIZE = int(os.getenv('PAYMENT_CACHE_SIZE', '4096'))
+PAYMENT_CACHE_TTL = float(os.getenv('PAYMENT_CACHE_TTL', '5'))
+payment_cache = PaymentCache(lambda: w3.eth.block_number,
+                             max_size=PAYMENT_CACHE_SIZE,
+                             block_ttl=PAYMENT_CACHE_TTL)
+# Listing summaries, cached the same way and sharing the block number
+summary_cache = PaymentCache(payment_cache.current_block,
+                             max_size=PAYMENT_CACHE_SIZE,
+                             block_ttl=0)
+
+# Shared gas quote, refreshed in the background instead of per request
+gas_oracle = GasOracle(w3,
+                       refresh_interval=float(os.getenv('GAS_ORACLE_INTERVAL', '10')),
+                       max_age=float(os.getenv('GAS_ORACLE_MAX_AGE', '60')))
+
+# Gas limits from eth_estimateGas, memoized by recipient count and description size.
+# GAS_ESTIMATE_RPC_URL can point at a local fork (e.g. anvil --fork-url) to keep simulations off the node
+GAS_ESTIMATE_RPC_URL = os.getenv('GAS_ESTIMATE_RPC_URL')
+gas_estimator = GasEstimator(Web3(Web3.HTTPProvider(GAS_ESTIMATE_RPC_URL)) if GAS_ESTIMATE_RPC_URL else w3,
+                             CONTRACT_ADDRESS,
+                             calldata,
+                             margin=float(os.getenv('GAS_ESTIMATE_MARGIN', '0.2')),
+                             share_denominator=share_denominator,
+                             logger=app.logger,
+                             failure_ttl=float(os.getenv('GAS_ESTIMATE_FAILURE_TTL', '30')))
+
+# Rendered index/view_payment pages, keyed on the chain state they show
+page_cache = PageCache(max_size=int(os.getenv('PAGE_CACHE_SIZE', '1024')))
+
+# static/ files are linked by content hash and cached by browsers for a year
+static_assets = StaticAssets(app.static_folder)
+
+# Live progress for view_payment: one log poller per process feeds every open event stream
+LIVE_FEED_INTERVAL = float(os.getenv('LIVE_FEED_INTERVAL', '2'))
+LIVE_FEED_KEEPALIVE = float(os.getenv('LIVE_FEED_KEEPALIVE', '15'))
+payment_feed = PaymentFeed(w3, contract, payment_cache, batch_reader.get_payments,
+                           lambda payment_id, payment: payment_progress(payment_id, payment),
+                           poll_interval=LIVE_FEED_INTERVAL)
+
+# /metrics: cache and estimator counters are read at scrape time, not on the hot path
+register_metrics(w3.provider)
+REGISTRY.callback('payment_cache_hits_total', "getPayment cache hits",
+                  lambda: payment_cache.hits, kind='counter')
+REGISTRY.callback('payment_cache_misses_total', "getPayment cache misses",
+                  lambda: payment_cache.misses, kind='counter')
+REGISTRY.callback('payment_cache_hit_ratio', "getPayment cache hits / lookups since start",
+                  lambda: payment_cache.stats()['hit_ratio'])
+REGISTRY.callback('payment_cache_entries', "getPayment results currently cached",
+                  lambda: payment_cache.stats()['size'])
+REGISTRY.callback('gas_estimate_cache_hits_total', "Gas limits served from the estimate cache",
+                  lambda: gas_estimator.hits, kind='counter')
+REGISTRY.callback('gas_estimate_cache_misses_total', "Gas limits that needed eth_estimateGas",
+                  lambda: gas_estimator.misses, kind='counter')
+REGISTRY.callback('gas_estimate_failures_total', "eth_estimateGas simulations that failed (fallback limit used)",
+                  lambda: gas_estimator.failures, kind='counter')
+REGISTRY.callback('page_cache_hits_total', "Pages served without rendering the template",
+                  lambda: page_cache.hits, kind='counter')
+REGISTRY.callback('page_cache_misses_total', "Pages rendered because their state changed",
+                  lambda: page_cache.misses, kind='counter')
+REGISTRY.callback('live_feed_subscribers', "Open payment event streams",
+                  payment_feed.subscriber_count)
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    # Streamed responses (/api/export) are timed to the first byte
+    observe_request(request.endpoint or 'unmatched', request.method, response.status_code,
+                    time.perf_counter() - g.request_started)
+    return response
+
+@app.url_defaults
+def hashed_static_url(endpoint, values):
+    if endpoint == 'static' and 'filename' in values:
+        values['filename'] = static_assets.hashed_name(values['filename'])
+
+def serve_static(filename):
+    """static/ files; under their current hashed name they are cached as immutable"""
+    filename, hashed = static_assets.resolve(filename)
+    response = app.send_static_file(filename)
+    if hashed:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
+app.view_functions['static'] = serve_static
+
+def cached_page(template, key, version, **context):
+    """render_template() through the page cache; conditional GETs get 304 Not Modified.
+
+    ``version`` identifies the chain state the page shows. Pages carrying
+    flash messages are per user and always rendered.
+    """
+    if session.get('_flashes'):
+        return render_template(template, **context)
+    page = page_cache.get(template, key, version, lambda: render_template(template, **context))
+    if not_modified(page, request.headers.get('If-None-Match'), request.headers.get('If-Modified-Since')):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(page.body, mimetype='text/html')
+    response.set_etag(page.etag)
+    response.last_modified = page.last_modified
+    response.cache_control.no_cache = True
+    return response
+
+def get_payment_count():
+    """nextPaymentId() from the local index when enabled, otherwise from the chain (once per block)"""
+    if payment_index is not None:
+        return payment_index.payment_count()
+    return payment_cache.payment_count(lambda: contract.functions.nextPaymentId().call())
+
+def get_payment(payment_id):
+    """getPayment() from the local index, falling back to the chain if not indexed yet"""
+    if payment_index is not None:
+        payment = payment_index.get_payment(payment_id)
+        if payment is not None:
+            return payment
+    return payment_cache.get(payment_id, lambda i: contract.functions.getPayment(i).call())
+
+def iter_payments():
+    """Yield (id, payment) for every payment; payment is a getPayment() tuple or a summary"""
+    if payment_index is not None:
+        return payment_index.list_payments()
+    total_payments = contract.functions.nextPaymentId().call()
+    return enumerate(summary_cache.get_many(range(total_payments), summary_reader.get_summaries))
+
+def page_payments(sort, descending, after, limit, is_active, creator):
+    """One page of (id, payment) rows and the key of the next page (None on the last page)"""
+    if payment_index is not None:
+        return payment_index.page_payments(sort, descending, after, limit, is_active, creator)
+    if sort != 'id':
+        raise ValueError("sort=progress and sort=total_amount need the payment index (INDEX_DB_PATH)")
+    
+    # Without the index, walk ids in page-sized batches of cached summaries
+    return page_by_id(contract.functions.nextPaymentId().call(),
+                      lambda ids: summary_cache.get_many(ids, summary_reader.get_summaries),
+                      descending, after, limit, is_active, creator)
+
+def get_logs(topics, from_block, to_block):
+    """eth_getLogs for the contract, halving the block range if the node refuses it"""
+    try:
+        return w3.eth.get_logs({
+            'address': CONTRACT_ADDRESS,
+            'fromBlock': from_block,
+            'toBlock': to_block,
+            'topics': topics,
+        })
+    except Exception:
+        if from_block >= to_block:
+            raise
+        middle = (from_block + to_block) // 2
+        return get_logs(topics, from_block, middle) + get_logs(topics, middle + 1, to_block)
+
+def get_contributions_many(payment_ids):
+    """(contributor, amount) pairs per payment id, from the index or the ContributionMade events"""
+    if payment_index is not None:
+        return payment_index.get_contributions_many(payment_ids)
+    
+    contributions = {payment_id: [] for payment_id in payment_ids}
+    if not contributions:
+        return contributions
+    event = contract.events.ContributionMade()
+    topics = [
+        HexBytes(event_abi_to_log_topic(event.abi)).hex(),
+        ['0x' + payment_id.to_bytes(32, 'big').hex() for payment_id in contributions],
+    ]
+    for log in get_logs(topics, CONTRACT_START_BLOCK, w3.eth.block_number):
+        args = event.process_log(log)['args']
+        contributions[args['paymentId']].append((args['contributor'], args['amount']))
+    return contributions
+
+def iter_export(start=0):
+    """Yield (id, payment, contributions) from payment id `start` on, reading RPC_BATCH_SIZE at a time"""
+    if payment_index is not None:
+        after = (start - 1, start - 1)
+        while after is not None:
+            rows, after = payment_index.page_payments(after=after, limit=RPC_BATCH_SIZE)
+            contributions = get_contributions_many([payment_id for payment_id, _ in rows])
+            for payment_id, payment in rows:
+                yield payment_id, payment, contributions[payment_id]
+        return
+    
+    total_payments = contract.functions.nextPaymentId().call()
+    for batch_start in range(start, total_payments, RPC_BATCH_SIZE):
+        ids = range(batch_start, min(batch_start + RPC_BATCH_SIZE, total_payments))
+        payments = payment_cache.get_many(ids, batch_reader.get_payments)
+        contributions = get_contributions_many(list(ids))
+        for payment_id, payment in zip(ids, payments):
+            if payment is not None:
+                yield payment_id, payment, contributions[payment_id]
+
+def read_settlement():
+    """(refunds_overpayment, share denominator, getPayment tuples) in one batched read.
+
+    REFUNDS_OVERPAYMENT and SHARE_DENOMINATOR go in the same batch as the
+    payments; contracts deployed before them fail those calls, which read as
+    False and whole percentages.
+    """
+    total_payments = contract.functions.nextPaymentId().call()
+    functions = [contract.functions.REFUNDS_OVERPAYMENT(), contract.functions.SHARE_DENOMINATOR()]
+    functions.extend(contract.functions.getPayment(i) for i in range(total_payments))
+    refunds_overpayment, denominator, *payments = batch_reader.call(functions)
+    return refunds_overpayment is True, denominator or LEGACY_SHARE_DENOMINATOR, payments
+
+def payment_summary(payment_id, payment):
+    """Listing representation of a getPayment() tuple or a getPayments() summary.
+
+    Amounts and progress are formatted from the Wei integers, giving the
+    same strings as the Decimal math in payment_details() at a fraction of the cost.
+    """
+    total_amount, collected_amount, progress = format_amounts(payment[4], payment[3])
+    
+    return {
+        'id': payment_id,
+        'description': payment[0],
+        'total_amount': total_amount,
+        'collected_amount': collected_amount,
+        'is_active': payment[5],
+        'progress': progress
+    }
+
+def payment_progress(payment_id, payment):
+    """Live feed representation of a getPayment() tuple: only what a contribution changes"""
+    summary = payment_summary(payment_id, payment)
+    return {key: summary[key] for key in ('id', 'collected_amount', 'progress', 'is_active')}
+
+def payment_details(payment_id, payment, denominator):
+    """Detail page representation of a getPayment() tuple, shares as percentages"""
+    # Convert from Wei to CELO
+    total_amount_celo = w3.from_wei(payment[3], 'ether')
+    collected_amount_celo = w3.from_wei(payment[4], 'ether')
+    
+    return {
+        'id': payment_id,
+        'description': payment[0],
+        'recipients': payment[1],
+        'percentages': [share_percent(share, denominator) for share in payment[2]],
+        'total_amount': total_amount_celo,
+        'collected_amount': collected_amount_celo,
+        'is_active': payment[5],
+        'creator': payment[6],
+        'progress': (collected_amount_celo / total_amount_celo * 100) if total_amount_celo > 0 else 0
+    }
+
+def payment_export(payment_id, payment, contributions, denominator):
+    """Export representation: the full split and every contribution, amounts in Wei.
+
+    Percentages are the stored shares, out of `share_denominator`.
+    """
+    return {
+        'id': payment_id,
+        'description': payment[0],
+        'creator': payment[6],
+        'recipients': payment[1],
+        'percentages': payment[2],
+        'share_denominator': denominator,
+        'total_amount_wei': str(payment[3]),
+        'collected_amount_wei': str(payment[4]),
+        'is_active': payment[5],
+        'contributions': [
+            {'contributor': contributor, 'amount_wei': str(amount)}
+            for contributor, amount in contributions
+        ]
+    }
+
+def payment_settlement(payment_id, payment, refunds_overpayment, denominator):
+    """Settlement accounting of a getPayment() tuple, amounts in Wei.
+
+    An open payment holds everything collected so far. A completed one has
+    paid out exactly its total when the contract refunds overpayment;
+    earlier deployments paid out the rounded-down shares (out of
+    `denominator`) and keep the overpayment and the rounding dust locked
+    for good.
+    """
+    percentages, total_amount, collected_amount, is_active = payment[2:6]
+    if is_active:
+        distributed = 0
+    elif refunds_overpayment:
+        distributed = total_amount
+    else:
+        distributed = sum(total_amount * percentage // denominator for percentage in percentages)
+    
+    return {
+        'id': payment_id,
+        'is_active': is_active,
+        'total_amount_wei': str(total_amount),
+        'collected_amount_wei': str(collected_amount),
+        'distributed_wei': str(distributed),
+        'locked_wei': str(collected_amount - distributed),
+    }
+
+class FormError(Exception):
+    """Invalid form input, the message is shown to the user"""
+
+def gas_price_fields(quote):
+    """Fee fields for the wallet: legacy gasPrice, plus EIP-1559 fees when available"""
+    fields = {'gasPrice': hex(quote.gas_price)}
+    if quote.max_fee_per_gas is not None:
+        fields['maxFeePerGas'] = hex(quote.max_fee_per_gas)
+        fields['maxPriorityFeePerGas'] = hex(quote.max_priority_fee_per_gas)
+    return fields
+
+def form_sender(form):
+    """The connected wallet the frontend posts as 'sender', or None if it is missing or not an address"""
+    sender = form.get('sender', '')
+    return Web3.to_checksum_address(sender) if Web3.is_address(sender) else None
+
+def parse_payment_form(form, denominator):
+    """Validate the create payment form; raises FormError with a user-facing message.
+
+    Percentages are entered as percent (e.g. 33.33) and returned as shares
+    out of `denominator`, the contract's SHARE_DENOMINATOR.
+    """
+    description = form['description']
+    total_amount = float(form['total_amount'])
+    recipients = form.getlist('recipients[]')
+    
+    if not description or total_amount <= 0:
+        raise FormError("Please provide valid description and amount")
+    
+    if len(recipients) == 0:
+        raise FormError("Please add at least one recipient")
+    
+    try:
+        percentages = [parse_percentage(p, denominator) for p in form.getlist('percentages[]')]
+    except ValueError:
+        unit = share_percent(1, denominator)
+        raise FormError(f"Percentages must be between {unit} and 100, in steps of {unit}")
+    
+    if len(percentages) != len(recipients):
+        raise FormError("Every recipient needs a percentage")
+    
+    if sum(percentages) != denominator:
+        raise FormError("Percentages must add up to 100%")
+    
+    # Convert to Wei
+    return description, w3.to_wei(total_amount, 'ether'), recipients, percentages
+
 @app.route('/')
 def index():
     """Home page with payment splitter interface"""
     try:
         # Get total payments created
-        total_payments = contract.functions.nextPaymentId().call()
-        return render_template('index.html', 
-                             total_payments=total_payments,
-                             contract_address=CONTRACT_ADDRESS,
-                             explorer_url=f"{EXPLORER_URL}/address/{CONTRACT_ADDRESS}")
+        total_payments = get_payment_count()
+        return cached_page('index.html', None, total_payments,
+                           total_payments=total_payments,
+                           contract_address=CONTRACT_ADDRESS,
+                           explorer_url=f"{EXPLORER_URL}/address/{CONTRACT_ADDRESS}")
     except Exception as e:
+        APP_ERRORS.inc('index')
         flash(f"Error connecting to contract: {str(e)}", "error")
         return render_template('index.html', 
                              total_payments=0,
@@ -94,52 +580,38 @@ def create_payment():
     """Create a new payment split"""
     if request.method == 'POST':
         try:
-            description = request.form['description']
-            total_amount = float(request.form['total_amount'])
-            recipients = request.form.getlist('recipients[]')
-            percentages = [int(p) for p in request.form.getlist('percentages[]')]
-            
-            # Validate inputs
-            if not description or total_amount <= 0:
-                flash("Please provide valid description and amount", "error")
-                return redirect(url_for('create_payment'))
-            
-            if len(recipients) == 0:
-                flash("Please add at least one recipient", "error")
-                return redirect(url_for('create_payment'))
-            
-            if sum(percentages) != 100:
-                flash("Percentages must add up to 100%", "error")
+            try:
+                description, total_amount_wei, recipients, percentages = parse_payment_form(
+                    request.form, share_denominator())
+            except FormError as e:
+                flash(str(e), "error")
                 return redirect(url_for('create_payment'))
             
-            # Convert to Wei
-            total_amount_wei = w3.to_wei(total_amount, 'ether')
+            gas_quote = gas_oracle.quote()
+            gas_limit = gas_estimator.create_payment(description, len(recipients), form_sender(request.form))
             
             # Prepare transaction data for MetaMask
-            tx_data = contract.functions.createPayment(
+            data = calldata.encode(
+                'createPayment',
                 description,
                 recipients,
                 percentages,
                 total_amount_wei
-            ).build_transaction({
-                'from': '0x0000000000000000000000000000000000000000',  # Will be replaced by MetaMask
-                'gas': 2000000,
-                'gasPrice': w3.eth.gas_price,
-                'nonce': 0  # Will be replaced by MetaMask
-            })
+            )
             
             # Return transaction data for frontend to sign with MetaMask
             return jsonify({
                 'success': True,
                 'tx_data': {
                     'to': CONTRACT_ADDRESS,
-                    'data': tx_data['data'],
-                    'gas': hex(2000000),
-                    'gasPrice': hex(w3.eth.gas_price)
+                    'data': data,
+                    'gas': hex(gas_limit),
+                    **gas_price_fields(gas_quote)
                 }
             })
             
         except Exception as e:
+            APP_ERRORS.inc('create_payment')
             flash(f"Error creating payment: {str(e)}", "error")
             return redirect(url_for('create_payment'))
     
@@ -156,28 +628,26 @@ def pay_invoice():
             # Convert to Wei
             amount_wei = w3.to_wei(amount, 'ether')
             
+            gas_quote = gas_oracle.quote()
+            gas_limit = gas_estimator.pay_invoice(payment_id, get_payment(payment_id), form_sender(request.form))
+            
             # Prepare transaction data for MetaMask
-            tx_data = contract.functions.payInvoice(payment_id).build_transaction({
-                'from': '0x0000000000000000000000000000000000000000',  # Will be replaced by MetaMask
-                'value': amount_wei,
-                'gas': 2000000,
-                'gasPrice': w3.eth.gas_price,
-                'nonce': 0  # Will be replaced by MetaMask
-            })
+            data = calldata.encode('payInvoice', payment_id)
             
             # Return transaction data for frontend to sign with MetaMask
             return jsonify({
                 'success': True,
                 'tx_data': {
                     'to': CONTRACT_ADDRESS,
-                    'data': tx_data['data'],
+                    'data': data,
                     'value': hex(amount_wei),
-                    'gas': hex(2000000),
-                    'gasPrice': hex(w3.eth.gas_price)
+                    'gas': hex(gas_limit),
+                    **gas_price_fields(gas_quote)
                 }
             })
             
         except Exception as e:
+            APP_ERRORS.inc('pay_invoice')
             flash(f"Error processing payment: {str(e)}", "error")
             return redirect(url_for('pay_invoice'))
     
@@ -187,58 +657,175 @@ def pay_invoice():
 def view_payment(payment_id):
     """View payment details"""
     try:
-        payment = contract.functions.getPayment(payment_id).call()
-        
-        # Convert from Wei to CELO
-        total_amount_celo = w3.from_wei(payment[3], 'ether')
-        collected_amount_celo = w3.from_wei(payment[4], 'ether')
+        payment = get_payment(payment_id)
+        payment_data = payment_details(payment_id, payment, share_denominator())
         
-        payment_data = {
-            'id': payment_id,
-            'description': payment[0],
-            'recipients': payment[1],
-            'percentages': payment[2],
-            'total_amount': total_amount_celo,
-            'collected_amount': collected_amount_celo,
-            'is_active': payment[5],
-            'creator': payment[6],
-            'progress': (collected_amount_celo / total_amount_celo * 100) if total_amount_celo > 0 else 0
-        }
-        
-        return render_template('view_payment.html', payment=payment_data, contract_address=CONTRACT_ADDRESS)
+        # Only contributions change a payment; a completed one is final
+        return cached_page('view_payment.html', payment_id, (payment[4], payment[5]),
+                           payment=payment_data, contract_address=CONTRACT_ADDRESS)
         
     except Exception as e:
+        APP_ERRORS.inc('view_payment')
         flash(f"Error loading payment: {str(e)}", "error")
         return redirect(url_for('index'))
 
 @app.route('/api/payments')
 def api_payments():
-    """API endpoint to get all payments"""
+    """API endpoint to get payments.
+
+    Without query arguments every payment is returned. With any of
+    limit, cursor, is_active, creator, sort or order a single page is
+    returned and the next page's cursor is sent in the X-Next-Cursor header.
+    """
+    if not PAGING_ARGS.isdisjoint(request.args):
+        return api_payments_page()
+    
     try:
-        total_payments = contract.functions.nextPaymentId().call()
         payments = []
         
-        for i in range(total_payments):
+        for i, payment in iter_payments():
             try:
-                payment = contract.functions.getPayment(i).call()
-                total_amount_celo = w3.from_wei(payment[3], 'ether')
-                collected_amount_celo = w3.from_wei(payment[4], 'ether')
-                
-                payments.append({
-                    'id': i,
-                    'description': payment[0],
-                    'total_amount': total_amount_celo,
-                    'collected_amount': collected_amount_celo,
-                    'is_active': payment[5],
-                    'progress': (collected_amount_celo / total_amount_celo * 100) if total_amount_celo > 0 else 0
-                })
-            except:
+                if payment is None:
+                    continue
+                payments.append(payment_summary(i, payment))
+            except Exception:
+                APP_ERRORS.inc('api_payments_row')
                 continue
         
+        if len(payments) > STREAM_CHUNK_ROWS:
+            # Encode chunk by chunk instead of holding the whole body
+            return app.json.stream_list(payments)
         return jsonify(payments)
         
     except Exception as e:
+        APP_ERRORS.inc('api_payments')
+        return jsonify({'error': str(e)}), 500
+
+def api_payments_page():
+    """One page of /api/payments"""
+    try:
+        query = parse_page_query(request.args)
+        rows, next_after = page_payments(**query)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        APP_ERRORS.inc('api_payments_page')
         return jsonify({'error': str(e)}), 500
+    
+    response = jsonify([payment_summary(i, payment) for i, payment in rows])
+    if next_after is not None:
+        response.headers['X-Next-Cursor'] = encode_cursor(query['sort'], query['descending'], next_after)
+    return response
+
+@app.route('/api/export')
+def api_export():
+    """Stream every payment with its recipients, percentages and contributions.
+
+    One JSON object per line (NDJSON) in id order, read in batches so memory
+    stays flat however many payments exist. Pass ?start=<id> to resume an
+    interrupted export; a failure mid-stream ends with an error line that
+    says where to resume from.
+    """
+    try:
+        start = int(request.args.get('start', 0))
+        if start < 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': 'start must be a non-negative payment id'}), 400
+    
+    def generate():
+        resume_from = start
+        try:
+            denominator = share_denominator()
+            for payment_id, payment, contributions in iter_export(start):
+                yield app.json.dumps(payment_export(payment_id, payment, contributions, denominator)) + '\n'
+                resume_from = payment_id + 1
+        except Exception as e:
+            APP_ERRORS.inc('api_export')
+            yield app.json.dumps({'error': str(e), 'resume_from': resume_from}) + '\n'
+    
+    return Response(generate(), mimetype='application/x-ndjson',
+                    headers={'Content-Disposition': 'attachment; filename=payments.ndjson'})
+
+@app.route('/api/settlement')
+def api_settlement():
+    """CELO held by the contract, per payment.
+
+    Lists every payment still holding funds, from one batched read of all
+    payments, with the totals checked against the contract balance.
+    `unaccounted_wei` is CELO that no payment accounts for (sent to the
+    contract directly, for example).
+    """
+    try:
+        refunds_overpayment, denominator, payments = read_settlement()
+        balance = w3.eth.get_balance(CONTRACT_ADDRESS)
+    except Exception as e:
+        APP_ERRORS.inc('api_settlement')
+        return jsonify({'error': str(e)}), 500
+    
+    rows = [payment_settlement(i, payment, refunds_overpayment, denominator)
+            for i, payment in enumerate(payments) if payment is not None]
+    locked = sum(int(row['locked_wei']) for row in rows)
+    return jsonify({
+        'refunds_overpayment': refunds_overpayment,
+        'share_denominator': denominator,
+        'contract_balance_wei': str(balance),
+        'locked_wei': str(locked),
+        'unaccounted_wei': str(balance - locked),
+        'payments': [row for row in rows if row['locked_wei'] != '0'],
+    })
+
+@app.route('/api/payments/<int:payment_id>/events')
+def payment_events(payment_id):
+    """Server-Sent Events stream of a payment's collected amount and progress.
+
+    The current state is sent first, then a `progress` event each time the
+    shared live feed sees it change. The stream ends after the event that
+    reports the payment as completed.
+    """
+    updates = queue.Queue()
+    
+    def generate():
+        # Subscribe before the first read so no contribution falls in between
+        subscription = payment_feed.subscribe(payment_id, updates.put)
+        try:
+            update = payment_progress(payment_id, get_payment(payment_id))
+            sent = None
+            while True:
+                if update is None:
+                    yield ': keep-alive\n\n'
+                elif update != sent:
+                    yield sse_message('progress', app.json.dumps(update))
+                    sent = update
+                    if not update['is_active']:
+                        return
+                try:
+                    update = updates.get(timeout=LIVE_FEED_KEEPALIVE)
+                except queue.Empty:
+                    update = None
+        except Exception as e:
+            APP_ERRORS.inc('payment_events')
+            yield sse_message('error', app.json.dumps({'error': str(e)}))
+        finally:
+            payment_feed.unsubscribe(subscription)
+    
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus metrics: route latency, RPC calls, errors and cache ratios"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+@app.route('/api/cache_stats')
+def api_cache_stats():
+    """Hit/miss counters of the getPayment cache"""
+    return jsonify(payment_cache.stats())
+
+@app.route('/api/rpc_stats')
+def api_rpc_stats():
+    """Health, latency and breaker state of each RPC endpoint"""
+    return jsonify(w3.provider.stats())
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
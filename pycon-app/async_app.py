@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+Payment Splitter ASGI App
+Async variant of app.py on AsyncWeb3 - run with: uvicorn async_app:app
+"""
+
+import asyncio
+import os
+import time
+
+from jinja2 import pass_context
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.responses import HTMLResponse, JSONResponse, RedirectResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+from starlette.templating import Jinja2Templates
+from web3 import AsyncWeb3
+from werkzeug.http import http_date
+
+from app import (
+    CELO_RPC_URLS,
+    CONTRACT_ABI,
+    CONTRACT_ADDRESS,
+    EXPLORER_URL,
+    LIVE_FEED_KEEPALIVE,
+    RPC_BATCH_SIZE,
+    RPC_POOL_OPTIONS,
+    SUMMARY_PAGE_SIZE,
+    FormError,
+    calldata,
+    form_sender,
+    gas_estimator,
+    gas_oracle,
+    gas_price_fields,
+    get_payment_count,
+    page_cache,
+    page_payments,
+    payment_cache,
+    payment_details,
+    payment_feed,
+    payment_index,
+    payment_progress,
+    payment_summary,
+    parse_payment_form,
+    share_denominator,
+    static_assets,
+    summary_cache,
+)
+from batch_reads import AsyncBatchReader, AsyncSummaryReader
+from json_provider import STREAM_CHUNK_ROWS, dumps_bytes, iter_json_list
+from live_feed import sse_message
+from metrics import APP_ERRORS, MEDIA_TYPE, REGISTRY, observe_request
+from page_cache import not_modified
+from rpc_pool import AsyncPooledHTTPProvider, register_metrics
+from paging import PAGING_ARGS, encode_cursor, page_by_id_async, parse_page_query
+from static_assets import IMMUTABLE_MAX_AGE
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Max RPCs in flight per worker process
+RPC_CONCURRENCY = int(os.getenv('RPC_CONCURRENCY', '32'))
+
+w3 = AsyncWeb3(AsyncPooledHTTPProvider(CELO_RPC_URLS, **RPC_POOL_OPTIONS))
+register_metrics(w3.provider)
+contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+rpc_slots = asyncio.Semaphore(RPC_CONCURRENCY)
+# The Flask app's batched and summary reads, with the JSON-RPC batches sent concurrently
+batch_reader = AsyncBatchReader(w3, contract, batch_size=RPC_BATCH_SIZE, slots=rpc_slots)
+summary_reader = AsyncSummaryReader(batch_reader, page_size=SUMMARY_PAGE_SIZE)
+
+
+async def rpc(call):
+    """Await an RPC coroutine while holding a concurrency slot"""
+    async with rpc_slots:
+        return await call
+
+
+async def current_block():
+    """The block the shared payment caches are valid for, re-read at most once per PAYMENT_CACHE_TTL"""
+    return await payment_cache.current_block_async(lambda: rpc(w3.eth.block_number))
+
+
+async def read_payment(payment_id):
+    """getPayment from the local index, falling back to the chain (through the shared cache) if not indexed yet"""
+    payment = None
+    if payment_index is not None:
+        # SQLite blocks, keep it off the event loop
+        payment = await run_in_threadpool(payment_index.get_payment, payment_id)
+    if payment is None:
+        payment = await payment_cache.get_async(
+            payment_id, lambda i: rpc(contract.functions.getPayment(i).call()), await current_block())
+    return payment
+
+
+async def read_payments():
+    """app.iter_payments() as a list: the SQLite index, or cached summaries read with concurrent batches"""
+    if payment_index is not None:
+        return await run_in_threadpool(lambda: list(payment_index.list_payments()))
+    total_payments, block = await asyncio.gather(rpc(contract.functions.nextPaymentId().call()), current_block())
+    return list(enumerate(await summary_cache.get_many_async(range(total_payments),
+                                                             summary_reader.get_summaries, block)))
+
+
+async def read_page(sort, descending, after, limit, is_active, creator):
+    """app.page_payments(): the SQLite index, or cached summaries read with concurrent batches"""
+    if payment_index is not None:
+        return await run_in_threadpool(page_payments, sort, descending, after, limit, is_active, creator)
+    if sort != 'id':
+        raise ValueError("sort=progress and sort=total_amount need the payment index (INDEX_DB_PATH)")
+
+    total_payments, block = await asyncio.gather(rpc(contract.functions.nextPaymentId().call()), current_block())
+    return await page_by_id_async(total_payments,
+                                  lambda ids: summary_cache.get_many_async(ids, summary_reader.get_summaries, block),
+                                  descending, after, limit, is_active, creator)
+
+
+async def read_share_denominator():
+    """app.share_denominator(); its one contract read runs off the event loop"""
+    if share_denominator.cache_info().currsize:
+        return share_denominator()
+    return await run_in_threadpool(share_denominator)
+
+
+# Templates are shared with the Flask app, so provide Flask's template helpers
+
+templates = Jinja2Templates(directory=os.path.join(BASE_DIR, 'templates'))
+
+
+def url_for(endpoint, **values):
+    if endpoint == 'static':
+        values = {'path': static_assets.hashed_name(values['filename'])}
+    return app.url_path_for(endpoint, **values)
+
+
+@pass_context
+def get_flashed_messages(context, with_categories=False):
+    flashes = context['request'].session.pop('_flashes', [])
+    if with_categories:
+        return [tuple(message) for message in flashes]
+    return [message for _, message in flashes]
+
+
+templates.env.globals['url_for'] = url_for
+templates.env.globals['get_flashed_messages'] = get_flashed_messages
+
+
+def flash(request, message, category='message'):
+    request.session.setdefault('_flashes', []).append([category, message])
+
+
+def redirect(endpoint):
+    return RedirectResponse(url_for(endpoint), status_code=302)
+
+
+def render(request, template, **context):
+    return templates.TemplateResponse(template, {'request': request, **context})
+
+
+def cached_page(request, template, key, version, **context):
+    """render() through the shared page cache; conditional GETs get 304 Not Modified"""
+    if request.session.get('_flashes'):
+        return render(request, template, **context)
+    page = page_cache.get(template, key, version,
+                          lambda: templates.get_template(template).render({'request': request, **context}))
+    headers = {
+        'ETag': f'"{page.etag}"',
+        'Last-Modified': http_date(page.last_modified),
+        'Cache-Control': 'no-cache',
+    }
+    if not_modified(page, request.headers.get('if-none-match'), request.headers.get('if-modified-since')):
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(page.body, headers=headers)
+
+
+class HashedStaticFiles(StaticFiles):
+    """StaticFiles that also serves content-hashed names, caching those as immutable"""
+
+    async def get_response(self, path, scope):
+        filename, hashed = static_assets.resolve(path)
+        response = await super().get_response(filename, scope)
+        if hashed:
+            response.headers['Cache-Control'] = f'public, max-age={IMMUTABLE_MAX_AGE}, immutable'
+        return response
+
+
+class FlaskJSONResponse(JSONResponse):
+    """JSON rendered like the Flask app's jsonify (Decimals as strings, sorted keys)"""
+
+    def render(self, content):
+        return dumps_bytes(content) + b'\n'
+
+
+def dumps(content):
+    return dumps_bytes(content).decode('utf-8')
+
+
+class MetricsMiddleware:
+    """Per-route latency and status counts, labelled like the Flask app's endpoints"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        started = time.perf_counter()
+        path = scope['path']  # Mount rewrites it for the static files
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get('endpoint'), '__name__', None) or \
+                ('static' if path.startswith('/static/') else 'unmatched')
+            observe_request(route, scope['method'], status, time.perf_counter() - started)
+
+
+# Routes
+
+async def index(request):
+    """Home page with payment splitter interface"""
+    try:
+        # Shared with the Flask app: read at most once per block
+        total_payments = await run_in_threadpool(get_payment_count)
+    except Exception as e:
+        APP_ERRORS.inc('index')
+        flash(request, f"Error connecting to contract: {str(e)}", "error")
+        return render(request, 'index.html',
+                      total_payments=0,
+                      contract_address=CONTRACT_ADDRESS,
+                      explorer_url=f"{EXPLORER_URL}/address/{CONTRACT_ADDRESS}")
+    return cached_page(request, 'index.html', None, total_payments,
+                       total_payments=total_payments,
+                       contract_address=CONTRACT_ADDRESS,
+                       explorer_url=f"{EXPLORER_URL}/address/{CONTRACT_ADDRESS}")
+
+
+async def create_payment(request):
+    """Create a new payment split"""
+    if request.method == 'POST':
+        try:
+            form = await request.form()
+            denominator = await read_share_denominator()
+            try:
+                description, total_amount_wei, recipients, percentages = parse_payment_form(form, denominator)
+            except FormError as e:
+                flash(request, str(e), "error")
+                return redirect('create_payment')
+
+            # The shared oracle may have to refresh synchronously, keep it off the event loop
+            gas_quote = await run_in_threadpool(gas_oracle.quote)
+            gas_limit = await run_in_threadpool(gas_estimator.create_payment, description, len(recipients),
+                                              form_sender(form))
+            data = calldata.encode('createPayment', description, recipients, percentages, total_amount_wei)
+
+            return FlaskJSONResponse({
+                'success': True,
+                'tx_data': {
+                    'to': CONTRACT_ADDRESS,
+                    'data': data,
+                    'gas': hex(gas_limit),
+                    **gas_price_fields(gas_quote)
+                }
+            })
+
+        except Exception as e:
+            APP_ERRORS.inc('create_payment')
+            flash(request, f"Error creating payment: {str(e)}", "error")
+            return redirect('create_payment')
+
+    return render(request, 'create_payment.html', contract_address=CONTRACT_ADDRESS)
+
+
+async def pay_invoice(request):
+    """Pay an invoice"""
+    if request.method == 'POST':
+        try:
+            form = await request.form()
+            payment_id = int(form['payment_id'])
+            amount = float(form['amount'])
+
+            # Convert to Wei
+            amount_wei = AsyncWeb3.to_wei(amount, 'ether')
+
+            # The shared oracle may have to refresh synchronously, keep it off the event loop
+            gas_quote, payment = await asyncio.gather(run_in_threadpool(gas_oracle.quote), read_payment(payment_id))
+            gas_limit = await run_in_threadpool(gas_estimator.pay_invoice, payment_id, payment, form_sender(form))
+            data = calldata.encode('payInvoice', payment_id)
+
+            return FlaskJSONResponse({
+                'success': True,
+                'tx_data': {
+                    'to': CONTRACT_ADDRESS,
+                    'data': data,
+                    'value': hex(amount_wei),
+                    'gas': hex(gas_limit),
+                    **gas_price_fields(gas_quote)
+                }
+            })
+
+        except Exception as e:
+            APP_ERRORS.inc('pay_invoice')
+            flash(request, f"Error processing payment: {str(e)}", "error")
+            return redirect('pay_invoice')
+
+    return render(request, 'pay_invoice.html', contract_address=CONTRACT_ADDRESS)
+
+
+async def view_payment(request):
+    """View payment details"""
+    payment_id = request.path_params['payment_id']
+    try:
+        payment, denominator = await asyncio.gather(read_payment(payment_id), read_share_denominator())
+        return cached_page(request, 'view_payment.html', payment_id, (payment[4], payment[5]),
+                           payment=payment_details(payment_id, payment, denominator),
+                           contract_address=CONTRACT_ADDRESS)
+
+    except Exception as e:
+        APP_ERRORS.inc('view_payment')
+        flash(request, f"Error loading payment: {str(e)}", "error")
+        return redirect('index')
+
+
+async def api_payments(request):
+    """API endpoint to get payments (see the Flask app for the paging arguments)"""
+    if not PAGING_ARGS.isdisjoint(request.query_params):
+        return await api_payments_page(request)
+
+    try:
+        rows = await read_payments()
+
+        payments = [payment_summary(i, payment) for i, payment in rows if payment is not None]
+        if len(payments) > STREAM_CHUNK_ROWS:
+            return StreamingResponse(iter_json_list(payments), media_type='application/json')
+        return FlaskJSONResponse(payments)
+
+    except Exception as e:
+        APP_ERRORS.inc('api_payments')
+        return FlaskJSONResponse({'error': str(e)}, status_code=500)
+
+
+async def api_payments_page(request):
+    """One page of /api/payments"""
+    try:
+        query = parse_page_query(request.query_params)
+        rows, next_after = await read_page(**query)
+    except ValueError as e:
+        return FlaskJSONResponse({'error': str(e)}, status_code=400)
+    except Exception as e:
+        APP_ERRORS.inc('api_payments_page')
+        return FlaskJSONResponse({'error': str(e)}, status_code=500)
+
+    response = FlaskJSONResponse([payment_summary(i, payment) for i, payment in rows])
+    if next_after is not None:
+        response.headers['X-Next-Cursor'] = encode_cursor(query['sort'], query['descending'], next_after)
+    return response
+
+
+async def payment_events(request):
+    """Server-Sent Events stream of a payment's collected amount and progress (see the Flask app)"""
+    payment_id = request.path_params['payment_id']
+    loop = asyncio.get_running_loop()
+    updates = asyncio.Queue()
+
+    async def generate():
+        # The shared feed runs in its own thread; hand its updates over to this loop
+        subscription = payment_feed.subscribe(
+            payment_id, lambda update: loop.call_soon_threadsafe(updates.put_nowait, update))
+        try:
+            update = payment_progress(payment_id, await read_payment(payment_id))
+            sent = None
+            while True:
+                if update is None:
+                    yield ': keep-alive\n\n'
+                elif update != sent:
+                    yield sse_message('progress', dumps(update))
+                    sent = update
+                    if not update['is_active']:
+                        return
+                try:
+                    update = await asyncio.wait_for(updates.get(), LIVE_FEED_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    update = None
+        except Exception as e:
+            APP_ERRORS.inc('payment_events')
+            yield sse_message('error', dumps({'error': str(e)}))
+        finally:
+            payment_feed.unsubscribe(subscription)
+
+    return StreamingResponse(generate(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+async def metrics(request):
+    """Prometheus metrics: route latency, RPC calls, errors and cache ratios"""
+    return Response(REGISTRY.render(), media_type=MEDIA_TYPE)
+
+
+async def api_rpc_stats(request):
+    """Health, latency and breaker state of each RPC endpoint"""
+    return FlaskJSONResponse(w3.provider.stats())
+
+
+app = Starlette(
+    routes=[
+        Route('/', index, name='index'),
+        Route('/create_payment', create_payment, methods=['GET', 'POST'], name='create_payment'),
+        Route('/pay_invoice', pay_invoice, methods=['GET', 'POST'], name='pay_invoice'),
+        Route('/view_payment/{payment_id:int}', view_payment, name='view_payment'),
+        Route('/api/payments', api_payments, name='api_payments'),
+        Route('/api/payments/{payment_id:int}/events', payment_events, name='payment_events'),
+        Route('/api/rpc_stats', api_rpc_stats, name='api_rpc_stats'),
+        Route('/metrics', metrics, name='metrics'),
+        Mount('/static', HashedStaticFiles(directory=os.path.join(BASE_DIR, 'static')), name='static'),
+    ],
+    middleware=[
+        Middleware(MetricsMiddleware),
+        Middleware(SessionMiddleware, secret_key=os.getenv('SECRET_KEY', 'your-secret-key-here')),
+    ],
+    on_shutdown=[w3.provider.close],
+)
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run('async_app:app', host='0.0.0.0', port=5000)
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Batched Contract Reads
+Packs many eth_call requests into JSON-RPC batch requests
+"""
+
+import asyncio
+import itertools
+
+import aiohttp
+import requests
+from hexbytes import HexBytes
+from web3._utils.abi import get_abi_output_types, map_abi_data
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+from web3.exceptions import BadFunctionCallOutput, ContractLogicError
+
+from rpc_pool import AsyncPooledHTTPProvider, PooledHTTPProvider
+
+DEFAULT_BATCH_SIZE = 100
+# Payments per getPayments/getPaymentSummaries call, well under the nodes' eth_call gas cap
+DEFAULT_SUMMARY_PAGE_SIZE = 200
+
+
+class BatchReader:
+    """Read many contract view functions with a few HTTP round trips"""
+
+    def __init__(self, w3, contract, batch_size=DEFAULT_BATCH_SIZE, session=None):
+        self.w3 = w3
+        self.contract = contract
+        self.batch_size = max(1, int(batch_size))
+        self.session = session
+        self.round_trips = 0
+        self._request_ids = itertools.count(1)
+
+    def call(self, functions, block_identifier='latest'):
+        """Call bound contract functions, returning one result per function.
+
+        A function whose call fails yields ``None`` in its slot so callers
+        can skip it the same way the sequential loop skipped exceptions.
+        """
+        functions = list(functions)
+        results = []
+        for start in range(0, len(functions), self.batch_size):
+            chunk = functions[start:start + self.batch_size]
+            results.extend(self._call_chunk(chunk, block_identifier))
+        return results
+
+    def get_payments(self, payment_ids):
+        """Fetch getPayment for every id, identical to calling them one by one"""
+        return self.call(self.contract.functions.getPayment(i) for i in payment_ids)
+
+    def _call_chunk(self, functions, block_identifier):
+        """Send one JSON-RPC batch for a chunk of calls and decode the replies"""
+        payload = self._build_payload(functions, block_identifier)
+        return self._decode_responses(payload, functions, self._post(payload))
+
+    def _build_payload(self, functions, block_identifier):
+        payload = []
+        for function in functions:
+            payload.append({
+                'jsonrpc': '2.0',
+                'id': next(self._request_ids),
+                'method': 'eth_call',
+                'params': [
+                    {'to': function.address, 'data': function._encode_transaction_data()},
+                    block_identifier,
+                ],
+            })
+        return payload
+
+    def _decode_responses(self, payload, functions, responses):
+        # Some nodes answer a batch with a single error object
+        if isinstance(responses, dict):
+            raise ValueError(responses.get('error', responses))
+        by_id = {response.get('id'): response for response in responses}
+
+        results = []
+        for request, function in zip(payload, functions):
+            response = by_id.get(request['id'])
+            try:
+                results.append(self._decode(function, response['result']))
+            except Exception:
+                results.append(None)
+        return results
+
+    def _post(self, payload):
+        """POST a batch to the provider endpoint"""
+        provider = self.w3.provider
+        self.round_trips += 1
+        if isinstance(provider, PooledHTTPProvider):
+            return provider.post(payload)
+        if self.session is None:
+            self.session = requests.Session()
+        response = self.session.post(
+            provider.endpoint_uri,
+            json=payload,
+            **provider.get_request_kwargs()
+        )
+        response.raise_for_status()
+        return response.json()
+
+    def _decode(self, function, result):
+        """Decode return data the same way ContractFunction.call() does"""
+        output_types = get_abi_output_types(function.abi)
+        output_data = self.w3.codec.decode(output_types, HexBytes(result))
+        normalized = map_abi_data(BASE_RETURN_NORMALIZERS, output_types, output_data)
+        if len(normalized) == 1:
+            return normalized[0]
+        return normalized
+
+
+class SummaryReader:
+    """Listing reads through the contract's getPayments/getPaymentSummaries views.
+
+    One eth_call returns a whole page of summaries instead of one getPayment
+    call per payment; the pages themselves go out in JSON-RPC batches. A
+    summary has description, total, collected, isActive and creator at the
+    same positions as a getPayment() tuple (recipient arrays replaced by the
+    id and recipient count), so listing code can read either.
+
+    Contracts deployed before these views existed are detected on the first
+    read, and every read then falls back to batched getPayment calls.
+    """
+
+    def __init__(self, batch_reader, page_size=DEFAULT_SUMMARY_PAGE_SIZE):
+        self.batch_reader = batch_reader
+        self.contract = batch_reader.contract
+        self.page_size = max(1, int(page_size))
+        self._supported = None
+
+    def supported(self):
+        """True if the deployed contract has the summary views (checked once)"""
+        if self._supported is None:
+            try:
+                self.contract.functions.getPayments(0, 0).call()
+                self._supported = True
+            except (BadFunctionCallOutput, ContractLogicError):
+                self._supported = False
+        return self._supported
+
+    def get_summaries(self, payment_ids):
+        """One summary per id (None for ids past the last payment), in the order given"""
+        payment_ids = list(payment_ids)
+        if not payment_ids:
+            return []
+        if not self.supported():
+            return self.batch_reader.get_payments(payment_ids)
+
+        pages = self._pages(payment_ids)
+        found = {}
+        for page, summaries in zip(pages, self.batch_reader.call(self._page_call(page) for page in pages)):
+            if summaries is None:
+                # The page failed, e.g. over the node's gas cap: read it item by item
+                found.update(zip(page, self.batch_reader.get_payments(page)))
+                continue
+            for summary in summaries:
+                found[summary[1]] = summary
+        return [found.get(payment_id) for payment_id in payment_ids]
+
+    def _pages(self, payment_ids):
+        return [payment_ids[start:start + self.page_size]
+                for start in range(0, len(payment_ids), self.page_size)]
+
+    def _page_call(self, page):
+        """getPayments for a run of consecutive ids (either direction), otherwise getPaymentSummaries"""
+        low, high = min(page), max(page)
+        if high - low + 1 == len(page) and (page == sorted(page) or page == sorted(page, reverse=True)):
+            return self.contract.functions.getPayments(low, len(page))
+        return self.contract.functions.getPaymentSummaries(page)
+
+
+class AsyncBatchReader(BatchReader):
+    """BatchReader for AsyncWeb3; chunks are sent concurrently.
+
+    ``slots`` is an asyncio.Semaphore bounding the batches in flight, so it
+    can be shared with the app's other RPCs.
+    """
+
+    def __init__(self, w3, contract, batch_size=DEFAULT_BATCH_SIZE, slots=None):
+        super().__init__(w3, contract, batch_size=batch_size)
+        self._slots = slots or asyncio.Semaphore(8)
+
+    async def call(self, functions, block_identifier='latest'):
+        functions = list(functions)
+        chunks = [functions[start:start + self.batch_size]
+                  for start in range(0, len(functions), self.batch_size)]
+        replies = await asyncio.gather(*(self._call_chunk(chunk, block_identifier) for chunk in chunks))
+        return [result for reply in replies for result in reply]
+
+    async def get_payments(self, payment_ids):
+        return await self.call(self.contract.functions.getPayment(i) for i in payment_ids)
+
+    async def _call_chunk(self, functions, block_identifier):
+        payload = self._build_payload(functions, block_identifier)
+        async with self._slots:
+            responses = await self._post(payload)
+        return self._decode_responses(payload, functions, responses)
+
+    async def _post(self, payload):
+        provider = self.w3.provider
+        self.round_trips += 1
+        if isinstance(provider, AsyncPooledHTTPProvider):
+            return await provider.post(payload)
+        if self.session is None:
+            self.session = aiohttp.ClientSession()
+        async with self.session.post(provider.endpoint_uri, json=payload,
+                                     headers=provider.get_request_kwargs()['headers']) as response:
+            response.raise_for_status()
+            return await response.json(content_type=None)
+
+
+class AsyncSummaryReader(SummaryReader):
+    """SummaryReader over an AsyncBatchReader; pages, and the fallback reads of failed pages, go out concurrently"""
+
+    async def supported(self):
+        if self._supported is None:
+            try:
+                async with self.batch_reader._slots:
+                    await self.contract.functions.getPayments(0, 0).call()
+                self._supported = True
+            except (BadFunctionCallOutput, ContractLogicError):
+                self._supported = False
+        return self._supported
+
+    async def get_summaries(self, payment_ids):
+        payment_ids = list(payment_ids)
+        if not payment_ids:
+            return []
+        if not await self.supported():
+            return await self.batch_reader.get_payments(payment_ids)
+
+        pages = self._pages(payment_ids)
+        replies = await self.batch_reader.call(self._page_call(page) for page in pages)
+        # Failed pages, e.g. over the node's gas cap, are read item by item
+        failed = [page for page, summaries in zip(pages, replies) if summaries is None]
+        fallbacks = await asyncio.gather(*(self.batch_reader.get_payments(page) for page in failed))
+        found = {}
+        for page, payments in zip(failed, fallbacks):
+            found.update(zip(page, payments))
+        for summaries in replies:
+            for summary in summaries or ():
+                found[summary[1]] = summary
+        return [found.get(payment_id) for payment_id in payment_ids]
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Decimal from_wei/progress vs integer formatting per /api/payments row
+Run from pycon-app/: python benchmarks/bench_amounts.py [--profile]
+"""
+
+import cProfile
+import os
+import pstats
+import sys
+import time
+
+from web3 import Web3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, payment_summary  # noqa: E402
+from benchmarks.stand_in_node import make_payments  # noqa: E402
+
+PAYMENTS = int(os.getenv('BENCH_PAYMENTS', '100000'))
+
+
+def decimal_summary(payment_id, payment):
+    """The original payment_summary"""
+    total_amount_celo = Web3.from_wei(payment[3], 'ether')
+    collected_amount_celo = Web3.from_wei(payment[4], 'ether')
+
+    return {
+        'id': payment_id,
+        'description': payment[0],
+        'total_amount': total_amount_celo,
+        'collected_amount': collected_amount_celo,
+        'is_active': payment[5],
+        'progress': (collected_amount_celo / total_amount_celo * 100) if total_amount_celo > 0 else 0
+    }
+
+
+def timed(function, payments):
+    started = time.perf_counter()
+    rows = [function(i, payment) for i, payment in enumerate(payments)]
+    return rows, time.perf_counter() - started
+
+
+def main():
+    payments = make_payments(PAYMENTS)
+    print(f"📊 payment_summary over {PAYMENTS} synthetic payments")
+
+    before_rows, before = timed(decimal_summary, payments)
+    after_rows, after = timed(payment_summary, payments)
+    with app.app_context():
+        started = time.perf_counter()
+        before_json = app.json.dumps(before_rows)
+        before_encode = time.perf_counter() - started
+        started = time.perf_counter()
+        after_json = app.json.dumps(after_rows)
+        after_encode = time.perf_counter() - started
+    assert before_json == after_json, "integer formatting differs from the Decimal output"
+    print("✅ JSON output is byte-identical")
+
+    print(f"{'path':<8} | {'rows µs/row':>11} | {'rows s':>7} | {'jsonify s':>9}")
+    print("-" * 45)
+    print(f"{'Decimal':<8} | {before / PAYMENTS * 1e6:>11.2f} | {before:>7.3f} | {before_encode:>9.3f}")
+    print(f"{'integer':<8} | {after / PAYMENTS * 1e6:>11.2f} | {after:>7.3f} | {after_encode:>9.3f}")
+    print(f"speedup: rows {before / after:.1f}x, rows + jsonify "
+          f"{(before + before_encode) / (after + after_encode):.1f}x")
+
+    if '--profile' in sys.argv:
+        for name, function in (('Decimal', decimal_summary), ('integer', payment_summary)):
+            print(f"\n🔎 {name} path, top functions by own time")
+            profiler = cProfile.Profile()
+            profiler.runcall(timed, function, payments)
+            pstats.Stats(profiler).sort_stats('tottime').print_stats(8)
+
+
+if __name__ == '__main__':
+    main()
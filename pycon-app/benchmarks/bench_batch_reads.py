@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sequential getPayment loop vs batched JSON-RPC reads
+Run from pycon-app/: python benchmarks/bench_batch_reads.py
+"""
+
+import os
+import sys
+import time
+
+from web3 import Web3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import CONTRACT_ABI, CONTRACT_ADDRESS  # noqa: E402
+from batch_reads import BatchReader  # noqa: E402
+from benchmarks.stand_in_node import StandInNode, make_payments  # noqa: E402
+
+SIZES = [10, 100, 1000, 2000]
+LATENCY = float(os.getenv('BENCH_RPC_LATENCY', '0.005'))  # simulated network RTT
+BATCH_SIZE = int(os.getenv('RPC_BATCH_SIZE', '100'))
+
+
+def sequential(contract, total):
+    """The original api_payments loop"""
+    results = []
+    for i in range(total):
+        try:
+            results.append(contract.functions.getPayment(i).call())
+        except Exception:
+            results.append(None)
+    return results
+
+
+def main():
+    print(f"📊 getPayment reads (latency {LATENCY * 1000:.0f} ms, batch size {BATCH_SIZE})")
+    print(f"{'N':>6} | {'loop trips':>10} | {'loop s':>8} | {'batch trips':>11} | {'batch s':>8} | speedup")
+    print("-" * 66)
+
+    for size in SIZES:
+        with StandInNode(make_payments(size), latency=LATENCY) as node:
+            w3 = Web3(Web3.HTTPProvider(node.url))
+            contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+            reader = BatchReader(w3, contract, batch_size=BATCH_SIZE)
+
+            node.reset_counters()
+            started = time.perf_counter()
+            expected = sequential(contract, size)
+            loop_time = time.perf_counter() - started
+            loop_trips = node.round_trips
+
+            node.reset_counters()
+            started = time.perf_counter()
+            batched = reader.get_payments(range(size))
+            batch_time = time.perf_counter() - started
+            batch_trips = node.round_trips
+
+            assert batched == expected, "batched results differ from the sequential loop"
+            print(f"{size:>6} | {loop_trips:>10} | {loop_time:>8.3f} | {batch_trips:>11} | "
+                  f"{batch_time:>8.3f} | {loop_time / batch_time:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
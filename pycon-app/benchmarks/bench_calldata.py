@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark: build_transaction() vs offline calldata encoding per POST
+Run from pycon-app/: python benchmarks/bench_calldata.py
+"""
+
+import os
+import sys
+import time
+
+from eth_utils import to_checksum_address
+from web3 import Web3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import CONTRACT_ABI, CONTRACT_ADDRESS  # noqa: E402
+from benchmarks.stand_in_node import StandInNode  # noqa: E402
+from calldata import CalldataEncoder  # noqa: E402
+
+ROUNDS = int(os.getenv('BENCH_ROUNDS', '2000'))
+LATENCIES = [0.0, 0.005, 0.05]  # simulated network RTT
+RECIPIENTS = [to_checksum_address('0x' + f'{i:02x}' * 20) for i in range(1, 4)]
+
+# One createPayment and one payInvoice, like the two POST handlers
+REQUESTS = [
+    ('createPayment', ("Dinner at Cafe Javas", RECIPIENTS, [40, 30, 30], 10**17)),
+    ('payInvoice', (7,)),
+]
+
+
+def build_transaction(contract, name, args):
+    """The original handler code path"""
+    return contract.functions[name](*args).build_transaction({
+        'from': '0x0000000000000000000000000000000000000000',
+        'gas': 2000000,
+        'gasPrice': 25 * 10**9,
+        'nonce': 0
+    })['data']
+
+
+def per_call(function, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        function()
+    return (time.perf_counter() - started) / rounds
+
+
+def main():
+    print(f"📊 calldata for createPayment/payInvoice ({ROUNDS} rounds)")
+    print(f"{'RTT ms':>6} | {'function':<13} | {'build_tx µs':>11} | {'node calls':>10} | "
+          f"{'offline µs':>10} | speedup")
+    print("-" * 72)
+
+    encoder = CalldataEncoder(CONTRACT_ABI)
+    for latency in LATENCIES:
+        with StandInNode(latency=latency) as node:
+            w3 = Web3(Web3.HTTPProvider(node.url))
+            contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+            # Fewer rounds when every build_transaction waits on the network
+            rounds = ROUNDS if latency == 0 else max(20, int(ROUNDS * 0.001 / latency))
+
+            for name, args in REQUESTS:
+                assert encoder.encode(name, *args) == build_transaction(contract, name, args)
+
+                node.reset_counters()
+                before = per_call(lambda: build_transaction(contract, name, args), rounds)
+                node_calls = node.calls / rounds
+                after = per_call(lambda: encoder.encode(name, *args), ROUNDS)
+                print(f"{latency * 1000:>6.0f} | {name:<13} | {before * 1e6:>11.1f} | {node_calls:>10.1f} | "
+                      f"{after * 1e6:>10.1f} | {before / after:>6.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /api/payments response encoding, Flask's stdlib provider vs FastJSONProvider
+Run from pycon-app/: python benchmarks/bench_json.py
+"""
+
+import os
+import sys
+import time
+
+from flask.json.provider import DefaultJSONProvider
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json_provider  # noqa: E402
+from app import app, payment_summary  # noqa: E402
+from benchmarks.stand_in_node import make_payments  # noqa: E402
+
+SIZES = [10000, 100000]
+ROUNDS = int(os.getenv('BENCH_ROUNDS', '5'))
+
+
+def best_of(function):
+    timings = []
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        body = function()
+        timings.append(time.perf_counter() - started)
+    return min(timings), body
+
+
+def main():
+    stdlib = DefaultJSONProvider(app)
+    fast = json_provider.FastJSONProvider(app)
+    orjson = json_provider.orjson
+    print(f"📊 /api/payments encode time (best of {ROUNDS}, orjson {'installed' if orjson else 'missing'})")
+    print(f"{'N':>7} | {'stdlib s':>8} | {'fast s':>7} | {'no orjson s':>11} | {'streamed s':>10} | speedup")
+    print("-" * 68)
+
+    for size in SIZES:
+        rows = [payment_summary(i, payment) for i, payment in enumerate(make_payments(size))]
+        with app.app_context():
+            before, expected = best_of(lambda: stdlib.response(rows).get_data())
+            after, body = best_of(lambda: fast.response(rows).get_data())
+            streamed, chunks = best_of(lambda: b''.join(json_provider.iter_json_list(rows)))
+            json_provider.orjson = None
+            try:
+                fallback, fallback_body = best_of(lambda: fast.response(rows).get_data())
+            finally:
+                json_provider.orjson = orjson
+        assert body == expected == fallback_body == chunks, "encoders disagree"
+        print(f"{size:>7} | {before:>8.3f} | {after:>7.3f} | {fallback:>11.3f} | {streamed:>10.3f} | "
+              f"{before / after:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
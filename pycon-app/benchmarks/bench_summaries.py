@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-payment getPayment calls vs getPayments summary pages for listings
+Run from pycon-app/: python benchmarks/bench_summaries.py
+"""
+
+import os
+import sys
+import time
+
+from eth_utils import collapse_if_tuple
+from hexbytes import HexBytes
+from web3 import Web3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import CONTRACT_ABI, CONTRACT_ADDRESS  # noqa: E402
+from batch_reads import BatchReader, SummaryReader  # noqa: E402
+from benchmarks.stand_in_node import StandInNode, make_payments  # noqa: E402
+
+SIZES = [100, 1000, 2000]
+LATENCY = float(os.getenv('BENCH_RPC_LATENCY', '0.005'))  # simulated network RTT
+BATCH_SIZE = int(os.getenv('RPC_BATCH_SIZE', '100'))
+PAGE_SIZE = int(os.getenv('SUMMARY_PAGE_SIZE', '200'))
+
+
+def abi_sizes(w3, functions, results):
+    """Total calldata and returndata bytes of a list of calls"""
+    calldata = sum(len(HexBytes(function._encode_transaction_data())) for function in functions)
+    returndata = 0
+    for function, result in zip(functions, results):
+        output_types = [collapse_if_tuple(output) for output in function.abi['outputs']]
+        values = result if len(output_types) > 1 else [result]
+        returndata += len(w3.codec.encode(output_types, values))
+    return calldata, returndata
+
+
+def timed(function):
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+
+def main():
+    print(f"📊 listing reads (latency {LATENCY * 1000:.0f} ms, batch size {BATCH_SIZE}, page size {PAGE_SIZE})")
+    print(f"{'N':>6} | {'path':<12} | {'eth_calls':>9} | {'calldata KB':>11} | {'returndata KB':>13} | "
+          f"{'trips':>5} | {'seconds':>7}")
+    print("-" * 82)
+
+    for size in SIZES:
+        with StandInNode(make_payments(size), latency=LATENCY) as node:
+            w3 = Web3(Web3.HTTPProvider(node.url))
+            contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+            batch_reader = BatchReader(w3, contract, batch_size=BATCH_SIZE)
+            summary_reader = SummaryReader(batch_reader, page_size=PAGE_SIZE)
+            assert summary_reader.supported()
+            ids = list(range(size))
+
+            node.reset_counters()
+            payments, per_item_time = timed(lambda: batch_reader.get_payments(ids))
+            per_item = [contract.functions.getPayment(i) for i in ids]
+            rows = [('getPayment', node.calls, *abi_sizes(w3, per_item, payments), node.round_trips, per_item_time)]
+
+            node.reset_counters()
+            summaries, summary_time = timed(lambda: summary_reader.get_summaries(ids))
+            pages = [ids[start:start + PAGE_SIZE] for start in range(0, size, PAGE_SIZE)]
+            page_calls = [summary_reader._page_call(page) for page in pages]
+            page_results = [summaries[start:start + PAGE_SIZE] for start in range(0, size, PAGE_SIZE)]
+            rows.append(('getPayments', node.calls, *abi_sizes(w3, page_calls, page_results),
+                         node.round_trips, summary_time))
+
+            for name, calls, calldata, returndata, trips, seconds in rows:
+                print(f"{size:>6} | {name:<12} | {calls:>9} | {calldata / 1024:>11.1f} | "
+                      f"{returndata / 1024:>13.1f} | {trips:>5} | {seconds:>7.3f}")
+            print("-" * 82)
+
+
+if __name__ == '__main__':
+    main()
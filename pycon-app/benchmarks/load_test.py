@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Load test: sync Flask app vs async ASGI app
+Run from pycon-app/: python benchmarks/load_test.py --path /view_payment/1
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Nothing listening on port {port}")
+
+
+def start(command, env, port):
+    process = subprocess.Popen(command, env=env, cwd=BASE_DIR,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    wait_for_port(port)
+    return process
+
+
+def sync_server_command(port, threads):
+    """gunicorn with a thread pool if installed, else the threaded Flask server"""
+    if importlib.util.find_spec('gunicorn'):
+        return [sys.executable, '-m', 'gunicorn', '-w', '1', '--threads', str(threads),
+                '-b', f'127.0.0.1:{port}', 'app:app']
+    return [sys.executable, '-m', 'flask', '--app', 'app', 'run', '--port', str(port), '--with-threads']
+
+
+async def hammer(url, concurrency, duration):
+    """Keep `concurrency` requests in flight for `duration` seconds"""
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker(session):
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                async with session.get(url) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+                        continue
+            except aiohttp.ClientError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    percentile = lambda p: latencies[min(len(latencies) - 1, int(len(latencies) * p))] if latencies else 0
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': len(latencies) / elapsed,
+        'p50': percentile(0.50),
+        'p99': percentile(0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--path', action='append', help="Route to load (repeatable)")
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--payments', type=int, default=200)
+    parser.add_argument('--rpc-latency', type=float, default=0.05, help="Simulated node round trip (s)")
+    parser.add_argument('--threads', type=int, default=8, help="Sync worker threads")
+    options = parser.parse_args()
+    paths = options.path or ['/view_payment/1', '/api/payments?limit=20']
+
+    node_port, sync_port, async_port = free_port(), free_port(), free_port()
+    env = dict(os.environ,
+               STAND_IN_PORT=str(node_port),
+               STAND_IN_PAYMENTS=str(options.payments),
+               STAND_IN_LATENCY=str(options.rpc_latency),
+               CELO_RPC_URL=f'http://127.0.0.1:{node_port}',
+               # Measure RPC handling, not cache hits
+               PAYMENT_CACHE_SIZE='0')
+
+    processes = [start([sys.executable, 'benchmarks/stand_in_node.py'], env, node_port)]
+    try:
+        processes.append(start(sync_server_command(sync_port, options.threads), env, sync_port))
+        processes.append(start([sys.executable, '-m', 'uvicorn', 'async_app:app',
+                                '--port', str(async_port), '--log-level', 'warning'], env, async_port))
+
+        print(f"🔥 {options.concurrency} concurrent clients, {options.duration:.0f}s per run, "
+              f"{options.rpc_latency * 1000:.0f} ms RPC latency")
+        print(f"{'route':<28} | {'server':<6} | {'req/s':>8} | {'p50 ms':>8} | {'p99 ms':>8} | errors")
+        print("-" * 76)
+        for path in paths:
+            for name, port in (('sync', sync_port), ('async', async_port)):
+                result = asyncio.run(hammer(f'http://127.0.0.1:{port}{path}',
+                                            options.concurrency, options.duration))
+                print(f"{path:<28} | {name:<6} | {result['rps']:>8.1f} | {result['p50'] * 1000:>8.1f} | "
+                      f"{result['p99'] * 1000:>8.1f} | {result['errors']}")
+    finally:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,437 @@
+#!/usr/bin/env python3
+"""
+Local EVM Stand-in
+A tiny JSON-RPC server that answers PaymentSplitter reads from memory
+"""
+
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from eth_abi import decode, encode
+from eth_utils import (
+    collapse_if_tuple,
+    event_abi_to_log_topic,
+    function_abi_to_4byte_selector,
+    keccak,
+    to_checksum_address,
+)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import CONTRACT_ABI  # noqa: E402
+from shares import LEGACY_SHARE_DENOMINATOR, SHARE_DENOMINATOR  # noqa: E402
+
+CHAIN_ID = 44787
+GAS_PRICE = 25 * 10**9
+
+# Gas schedule (Berlin/London) used to simulate eth_estimateGas for the writes
+TX_BASE_GAS = 21000
+CALLDATA_ZERO_GAS = 4
+CALLDATA_NONZERO_GAS = 16
+SSTORE_NEW_GAS = 22100    # cold zero -> non-zero
+SSTORE_UPDATE_GAS = 5000  # cold non-zero -> non-zero
+SLOAD_COLD_GAS = 2100
+LOOP_GAS = 150            # per array element: bounds checks, memory copies
+CALL_VALUE_GAS = 9000
+ACCOUNT_COLD_GAS = 2600
+NEW_ACCOUNT_GAS = 25000
+LOG_GAS = 375             # per log and per topic
+LOG_DATA_GAS = 8          # per byte
+OVERHEAD_GAS = 2000       # dispatch, memory expansion, ABI decoding
+
+
+def _selectors():
+    """Map 4-byte selectors to ABI entries of the PaymentSplitter functions"""
+    table = {}
+    for entry in CONTRACT_ABI:
+        if entry.get('type') == 'function':
+            table['0x' + function_abi_to_4byte_selector(entry).hex()] = entry
+    return table
+
+
+def _events():
+    """Map event names to their ABI entries"""
+    return {entry['name']: entry for entry in CONTRACT_ABI if entry.get('type') == 'event'}
+
+
+def make_payments(count, seed=0):
+    """Build synthetic getPayment tuples"""
+    rng = random.Random(seed)
+    payments = []
+    for i in range(count):
+        recipient_count = rng.randint(1, 5)
+        recipients = [
+            to_checksum_address('0x' + rng.getrandbits(160).to_bytes(20, 'big').hex())
+            for _ in range(recipient_count)
+        ]
+        percentages = [SHARE_DENOMINATOR // recipient_count] * recipient_count
+        percentages[-1] += SHARE_DENOMINATOR - sum(percentages)
+        total = rng.randint(1, 10**20)
+        collected = rng.choice([0, rng.randint(0, total), total])
+        creator = to_checksum_address('0x' + rng.getrandbits(160).to_bytes(20, 'big').hex())
+        payments.append([
+            f"Bill #{i}",
+            recipients,
+            percentages,
+            total,
+            collected,
+            collected < total,
+            creator,
+        ])
+    return payments
+
+
+class StandInNode:
+    """In-memory node serving PaymentSplitter reads, logs and blocks"""
+
+    def __init__(self, payments=None, latency=0.0, host='127.0.0.1', port=0,
+                 address='0x074adfDF9e5330d4fB63A33C84217E338c47C03A', summaries=True,
+                 refunds_overpayment=True, share_denominator=SHARE_DENOMINATOR):
+        self.payments = payments if payments is not None else []
+        # False acts like a contract deployed before getPayments/getPaymentSummaries
+        self.summaries = summaries
+        # False acts like a contract deployed before REFUNDS_OVERPAYMENT: completed
+        # payments keep their overpayment and rounding dust
+        self.refunds_overpayment = refunds_overpayment
+        # LEGACY_SHARE_DENOMINATOR acts like a contract deployed before SHARE_DENOMINATOR,
+        # with whole percentages
+        self.share_denominator = share_denominator
+        # CELO held by accounts, by lowercased address; eth_estimateGas checks the sender's like a real node
+        self.balances = {}
+        self.latency = latency
+        self.address = address
+        self.block_number = 1
+        self.logs = []
+        self._forks = 0
+        self._reorg_from = None
+        self._events = _events()
+        self.round_trips = 0
+        self.calls = 0
+        self.connections = 0
+        self.fail_with = None  # HTTP status to answer every request with, to simulate an outage
+        self._selectors = _selectors()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_counters(self):
+        with self._lock:
+            self.round_trips = 0
+            self.calls = 0
+            self.connections = 0
+
+    # Chain simulation
+
+    def block_hash(self, number):
+        """Deterministic block hash; changes for re-mined blocks after a reorg"""
+        forked = self._reorg_from is not None and number >= self._reorg_from
+        return '0x' + keccak(text=f"{number}:{self._forks if forked else 0}").hex()
+
+    def mine(self):
+        self.block_number += 1
+        return self.block_number
+
+    def emit(self, name, payment_id, *values):
+        """Append a log for a PaymentSplitter event in a new block"""
+        entry = self._events[name]
+        data_types = [arg['type'] for arg in entry['inputs'] if not arg['indexed']]
+        block = self.mine()
+        self.logs.append({
+            'address': self.address,
+            'topics': [
+                '0x' + event_abi_to_log_topic(entry).hex(),
+                '0x' + payment_id.to_bytes(32, 'big').hex(),
+            ],
+            'data': '0x' + encode(data_types, list(values)).hex(),
+            'blockNumber': block,
+            'logIndex': 0,
+            'transactionIndex': 0,
+            'transactionHash': '0x' + keccak(text=f"tx:{block}:{self._forks}").hex(),
+            'removed': False,
+        })
+
+    def create_payment(self, description, recipients, percentages, total, creator):
+        payment_id = len(self.payments)
+        self.payments.append([description, recipients, percentages, total, 0, True, creator])
+        self.emit('PaymentCreated', payment_id, description, creator, total)
+        return payment_id
+
+    def contribute(self, payment_id, contributor, amount):
+        payment = self.payments[payment_id]
+        if self.refunds_overpayment:
+            amount = min(amount, payment[3] - payment[4])
+        payment[4] += amount
+        self.emit('ContributionMade', payment_id, contributor, amount)
+        if payment[4] >= payment[3]:
+            payment[5] = False
+            self.emit('PaymentCompleted', payment_id)
+
+    def reorg(self, depth):
+        """Drop the logs of the last `depth` blocks and give those heights new hashes"""
+        self._reorg_from = self.block_number - depth + 1
+        self._forks += 1
+        self.logs = [log for log in self.logs if log['blockNumber'] < self._reorg_from]
+
+    def handle(self, request):
+        """Answer a single JSON-RPC request object"""
+        with self._lock:
+            self.calls += 1
+        method = request.get('method')
+        params = request.get('params') or []
+        try:
+            result = getattr(self, f"rpc_{method}")(*params)
+        except AttributeError:
+            return self._error(request, -32601, f"Method {method} not found")
+        except Exception as e:
+            return self._error(request, 3, f"execution reverted: {e}")
+        return {'jsonrpc': '2.0', 'id': request.get('id'), 'result': result}
+
+    def _error(self, request, code, message):
+        return {'jsonrpc': '2.0', 'id': request.get('id'), 'error': {'code': code, 'message': message}}
+
+    def rpc_eth_chainId(self):
+        return hex(CHAIN_ID)
+
+    def rpc_net_version(self):
+        return str(CHAIN_ID)
+
+    def rpc_eth_blockNumber(self):
+        return hex(self.block_number)
+
+    def rpc_eth_gasPrice(self):
+        return hex(GAS_PRICE)
+
+    def rpc_eth_feeHistory(self, block_count, newest_block, reward_percentiles=None):
+        count = int(block_count, 16) if isinstance(block_count, str) else block_count
+        oldest = max(0, self.block_number - count + 1)
+        return {
+            'oldestBlock': hex(oldest),
+            'baseFeePerGas': [hex(GAS_PRICE // 2)] * (count + 1),
+            'gasUsedRatio': [0.5] * count,
+            'reward': [[hex(10**9)] for _ in range(count)],
+        }
+
+    def rpc_eth_getBalance(self, address, block_identifier='latest'):
+        if address.lower() != self.address.lower():
+            return hex(self.balances.get(address.lower(), 0))
+        return hex(self.contract_balance())
+
+    def contract_balance(self):
+        """CELO the contract holds: open collections, plus what completed payments left behind"""
+        balance = 0
+        for _, _, percentages, total, collected, is_active, _ in self.payments:
+            if is_active:
+                balance += collected
+            elif not self.refunds_overpayment:
+                balance += collected - sum(total * percentage // self.share_denominator
+                                           for percentage in percentages)
+        return balance
+
+    def rpc_eth_getBlockByNumber(self, number, full_transactions=False):
+        number = self.block_number if number == 'latest' else int(number, 16)
+        return {
+            'number': hex(number),
+            'hash': self.block_hash(number),
+            'parentHash': self.block_hash(number - 1),
+            'timestamp': hex(1_700_000_000 + number * 5),
+            'transactions': [],
+        }
+
+    def rpc_eth_getLogs(self, log_filter):
+        from_block = int(log_filter.get('fromBlock', '0x0'), 16)
+        to_block = self.block_number if log_filter.get('toBlock', 'latest') == 'latest' \
+            else int(log_filter['toBlock'], 16)
+        # One entry per topic position: None, a topic, or a list of alternatives
+        topics = [[topic] if isinstance(topic, str) else topic for topic in log_filter.get('topics') or []]
+        matched = []
+        for log in self.logs:
+            if not from_block <= log['blockNumber'] <= to_block:
+                continue
+            if any(wanted and log['topics'][i] not in wanted for i, wanted in enumerate(topics)):
+                continue
+            matched.append(dict(
+                log,
+                blockNumber=hex(log['blockNumber']),
+                blockHash=self.block_hash(log['blockNumber']),
+                logIndex=hex(log['logIndex']),
+                transactionIndex=hex(log['transactionIndex']),
+            ))
+        return matched
+
+    def rpc_eth_call(self, transaction, block_identifier='latest'):
+        data = transaction['data']
+        entry = self._selectors[data[:10]]
+        input_types = [collapse_if_tuple(arg) for arg in entry['inputs']]
+        args = decode(input_types, bytes.fromhex(data[10:]))
+        output = getattr(self, f"call_{entry['name']}")(*args)
+        output_types = [collapse_if_tuple(arg) for arg in entry['outputs']]
+        return '0x' + encode(output_types, output).hex()
+
+    def rpc_eth_estimateGas(self, transaction, block_identifier='latest'):
+        """Gas a write would use, from the gas schedule and the simulated contract state"""
+        data = bytes.fromhex(transaction.get('data', '0x')[2:])
+        gas = TX_BASE_GAS + OVERHEAD_GAS
+        gas += sum(CALLDATA_NONZERO_GAS if byte else CALLDATA_ZERO_GAS for byte in data)
+        entry = self._selectors['0x' + data[:4].hex()]
+        args = decode([arg['type'] for arg in entry['inputs']], data[4:])
+        value = int(transaction.get('value', '0x0'), 16)
+        if value > self.balances.get(transaction.get('from', '0x' + '00' * 20).lower(), 0):
+            raise ValueError("insufficient funds for transfer")
+        return hex(gas + getattr(self, f"gas_{entry['name']}")(value, *args))
+
+    def gas_createPayment(self, value, description, recipients, percentages, total):
+        if len(recipients) != len(percentages):
+            raise ValueError("Mismatched arrays")
+        if not recipients:
+            raise ValueError("Need at least one recipient")
+        if total == 0:
+            raise ValueError("Amount must be greater than 0")
+        if total >= 2**128:
+            raise ValueError("Amount too large")
+        if sum(percentages) != self.share_denominator:
+            raise ValueError(f"Shares must add up to {self.share_denominator}")
+
+        size = len(description.encode('utf-8'))
+        # Short strings share their length slot, long ones take one slot per 32 bytes
+        description_slots = 1 if size < 32 else 1 + math.ceil(size / 32)
+        written = (description_slots
+                   + 1 + sum(1 for r in recipients if int(r, 16))
+                   + 1 + sum(1 for p in percentages if p)
+                   + 2)  # totalAmount, isActive + creator
+        gas = written * SSTORE_NEW_GAS + SLOAD_COLD_GAS  # collectedAmount stays zero
+        gas += 2 * len(recipients) * LOOP_GAS
+        gas += SSTORE_UPDATE_GAS if self.payments else SSTORE_NEW_GAS  # nextPaymentId++
+        gas += 2 * LOG_GAS + LOG_DATA_GAS * (96 + 32 * math.ceil(size / 32) + 32)
+        return gas
+
+    def gas_payInvoice(self, value, payment_id):
+        if payment_id >= len(self.payments) or not self.payments[payment_id][5]:
+            raise ValueError("Payment not active")
+        if value == 0:
+            raise ValueError("Must send some CELO")
+
+        _, recipients, _, total, collected = self.payments[payment_id][:5]
+        gas = 2 * SLOAD_COLD_GAS                                  # isActive, hasPaid
+        gas += 2 * SSTORE_NEW_GAS                                 # contributions, hasPaid
+        gas += SSTORE_UPDATE_GAS if collected else SSTORE_NEW_GAS  # collectedAmount
+        gas += 2 * LOG_GAS + LOG_DATA_GAS * 64
+        if collected + value >= total:
+            # _distributePayment: one value transfer per recipient
+            for _ in recipients:
+                gas += 2 * SLOAD_COLD_GAS + LOOP_GAS
+                gas += CALL_VALUE_GAS + ACCOUNT_COLD_GAS + NEW_ACCOUNT_GAS
+            gas += SSTORE_UPDATE_GAS + 2 * LOG_GAS
+        if self.refunds_overpayment and collected + value > total:
+            # Refund to the (already warm) sender, and its event
+            gas += CALL_VALUE_GAS + 2 * LOG_GAS + LOG_DATA_GAS * 64
+        return gas
+
+    def call_REFUNDS_OVERPAYMENT(self):
+        if not self.refunds_overpayment:
+            raise ValueError("unknown function")
+        return [True]
+
+    def call_SHARE_DENOMINATOR(self):
+        if self.share_denominator == LEGACY_SHARE_DENOMINATOR:
+            raise ValueError("unknown function")
+        return [self.share_denominator]
+
+    def call_nextPaymentId(self):
+        return [len(self.payments)]
+
+    def call_getPayment(self, payment_id):
+        if payment_id >= len(self.payments):
+            # Solidity returns an empty struct for unknown ids
+            return ['', [], [], 0, 0, False, '0x' + '00' * 20]
+        return self.payments[payment_id]
+
+    def call_getPayments(self, start, count):
+        if not self.summaries:
+            raise ValueError("unknown function")
+        return [[self._summary(i) for i in range(start, min(start + count, len(self.payments)))]]
+
+    def call_getPaymentSummaries(self, payment_ids):
+        if not self.summaries:
+            raise ValueError("unknown function")
+        return [[self._summary(i) for i in payment_ids]]
+
+    def _summary(self, payment_id):
+        description, recipients, _, total, collected, is_active, creator = self.call_getPayment(payment_id)
+        return (description, payment_id, len(recipients), total, collected, is_active, creator)
+
+    def _handler(self):
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, like a real node; headers and body are separate writes, so no Nagle delay
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with node._lock:
+                    node.connections += 1
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                with node._lock:
+                    node.round_trips += 1
+                if node.latency:
+                    time.sleep(node.latency)
+                if node.fail_with:
+                    self.send_response(node.fail_with)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if isinstance(body, list):
+                    reply = [node.handle(request) for request in body]
+                else:
+                    reply = node.handle(body)
+                payload = json.dumps(reply).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+if __name__ == '__main__':
+    node = StandInNode(
+        make_payments(int(os.getenv('STAND_IN_PAYMENTS', '100'))),
+        latency=float(os.getenv('STAND_IN_LATENCY', '0')),
+        port=int(os.getenv('STAND_IN_PORT', '8545')),
+    )
+    print(f"Stand-in node listening on {node.url}", flush=True)
+    node._server.serve_forever()
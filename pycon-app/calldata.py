@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Offline Calldata Encoder
+Precompiled selectors and ABI encoders for the contract's write functions
+"""
+
+from eth_abi.codec import ABICodec
+from eth_utils import function_abi_to_4byte_selector
+from web3._utils.abi import build_strict_registry, get_abi_input_types
+from web3._utils.validation import validate_address
+from web3.exceptions import InvalidAddress
+
+
+class CalldataEncoder:
+    """Encode contract calls without a node or web3's transaction pipeline.
+
+    Selectors and tuple encoders are built once per ABI function, so each
+    request only runs the argument encoding itself. The output is the same
+    ``data`` that ``contract.functions.<name>(...).build_transaction()``
+    returns. ENS names need a node to resolve and are rejected.
+    """
+
+    def __init__(self, abi, codec=None):
+        codec = codec or ABICodec(build_strict_registry())
+        self._functions = {}
+        for entry in abi:
+            if entry.get('type') != 'function':
+                continue
+            types = get_abi_input_types(entry)
+            self._functions[entry['name']] = (
+                function_abi_to_4byte_selector(entry),
+                types,
+                codec._registry.get_tuple_encoder(*types),
+            )
+
+    def encode(self, name, *args):
+        """0x-prefixed calldata for calling function ``name`` with ``args``"""
+        selector, types, encoder = self._functions[name]
+        if len(args) != len(types):
+            raise TypeError(f"{name} expects {len(types)} arguments, got {len(args)}")
+        for type_str, value in zip(types, args):
+            if type_str == 'address':
+                _validate_address(value)
+            elif type_str == 'address[]':
+                for address in value:
+                    _validate_address(address)
+        return '0x' + (selector + encoder(args)).hex()
+
+
+def _validate_address(value):
+    # Same checksum rules as web3's address normalizer, minus ENS lookups
+    if isinstance(value, str) and not value.startswith('0x'):
+        raise InvalidAddress("ENS names cannot be encoded offline", value)
+    validate_address(value)
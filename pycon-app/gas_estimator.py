@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Gas Estimator
+eth_estimateGas limits for the write functions, memoized by the inputs that drive their cost
+"""
+
+import logging
+import math
+import threading
+import time
+
+from eth_utils import keccak, to_checksum_address
+
+from shares import SHARE_DENOMINATOR
+
+# Largest total createPayment accepts (uint128); all non-zero bytes, so the most calldata gas
+MAX_TOTAL_AMOUNT = 2**128 - 1
+
+# Who the estimates are simulated as when the caller's address is not known
+DEFAULT_SENDER = '0x0000000000000000000000000000000000000000'
+
+
+class GasEstimator:
+    """Tight gas limits for createPayment and payInvoice.
+
+    Gas grows with the number of recipients (storage writes in createPayment,
+    transfers in payInvoice's _distributePayment) and with the description
+    length, so estimates are memoized by (function, recipient count,
+    description length bucket). On a miss, a worst case for the bucket is
+    simulated with eth_estimateGas: the longest description in the bucket, or
+    a contribution that completes the payment and triggers distribution.
+    ``margin`` is added on top. If the simulation fails, ``fallback`` is used
+    and a warning goes to ``logger``; the failure is remembered for
+    ``failure_ttl`` seconds per key and sender, so repeated requests do not
+    simulate (and warn) again until then. ``share_denominator``
+    returns what the simulated percentages must add up to; it is only called
+    on a createPayment miss.
+
+    Simulations run from the caller's address when it is passed in: nodes
+    check the sender's balance against the value, so a payInvoice simulated
+    from ``sender`` (the zero address by default) fails on a real chain.
+    """
+
+    def __init__(self, w3, contract_address, calldata, margin=0.2, description_bucket=64,
+                 fallback=2000000, sender=DEFAULT_SENDER, share_denominator=lambda: SHARE_DENOMINATOR,
+                 logger=None, failure_ttl=30):
+        self.w3 = w3
+        self.contract_address = contract_address
+        self.calldata = calldata
+        self.margin = margin
+        self.description_bucket = description_bucket
+        self.fallback = fallback
+        self.sender = sender
+        self.share_denominator = share_denominator
+        self.logger = logger or logging.getLogger(__name__)
+        self.failure_ttl = failure_ttl
+        self._estimates = {}
+        self._failures = {}  # (key, sender) -> when the failed simulation may be retried
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.failures = 0
+
+    def create_payment(self, description, recipient_count, sender=None):
+        """Gas limit for createPayment with this description and recipient count"""
+        bucket = math.ceil(len(description.encode('utf-8')) / self.description_bucket)
+        key = ('createPayment', recipient_count, bucket)
+        sender = sender or self.sender
+        return self._memoized(key, sender, lambda: self._create_payment_transaction(recipient_count, bucket, sender))
+
+    def pay_invoice(self, payment_id, payment, sender=None):
+        """Gas limit for payInvoice on a getPayment() tuple, assuming the contribution completes it.
+
+        The simulated contribution is 1 Wei over what is missing, so the
+        limit also covers refunding an overpayment. ``sender`` must hold that
+        much CELO, or the node rejects the simulation.
+        """
+        key = ('payInvoice', len(payment[1]), 0)
+        remaining = max(payment[3] - payment[4], 0)
+        sender = sender or self.sender
+        return self._memoized(key, sender, lambda: {
+            'from': sender,
+            'to': self.contract_address,
+            'data': self.calldata.encode('payInvoice', payment_id),
+            'value': remaining + 1,
+        })
+
+    def _create_payment_transaction(self, recipient_count, bucket, sender):
+        # Distinct random-looking recipients and non-zero shares: every storage slot is a fresh write
+        recipients = [to_checksum_address(keccak(text=f"recipient:{i}")[-20:]) for i in range(recipient_count)]
+        denominator = self.share_denominator()
+        percentages = [denominator // recipient_count] * recipient_count if recipient_count else []
+        if percentages:
+            percentages[0] += denominator - sum(percentages)
+        description = 'x' * (bucket * self.description_bucket)
+        return {
+            'from': sender,
+            'to': self.contract_address,
+            'data': self.calldata.encode('createPayment', description, recipients, percentages, MAX_TOTAL_AMOUNT),
+        }
+
+    def _memoized(self, key, sender, transaction):
+        now = time.monotonic()
+        with self._lock:
+            gas = self._estimates.get(key)
+            if gas is not None:
+                self.hits += 1
+                return gas
+            if self._failures.get((key, sender), 0) > now:
+                self.hits += 1
+                return self.fallback
+            self.misses += 1
+
+        try:
+            estimate = self.w3.eth.estimate_gas(transaction())
+        except Exception as e:
+            self.logger.warning("Gas estimation failed for %s: %s", key, e)
+            with self._lock:
+                self.failures += 1
+                self._failures[(key, sender)] = now + self.failure_ttl
+            return self.fallback
+
+        gas = math.ceil(estimate * (1 + self.margin))
+        with self._lock:
+            self._estimates[key] = gas
+            self._failures.pop((key, sender), None)
+        return gas
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._estimates),
+                'hits': self.hits,
+                'misses': self.misses,
+                'failures': self.failures,
+            }
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Gas Oracle
+Background-refreshed gas price quotes shared by every request
+"""
+
+import threading
+import time
+from collections import namedtuple
+
+GasQuote = namedtuple('GasQuote', [
+    'gas_price',                 # legacy eth_gasPrice
+    'max_fee_per_gas',           # EIP-1559, None if the node has no eth_feeHistory
+    'max_priority_fee_per_gas',  # EIP-1559, None if the node has no eth_feeHistory
+    'base_fee_per_gas',          # base fee of the next block
+    'fetched_at',                # time.time() of the sample
+])
+
+
+class GasOracle:
+    """Samples eth_gasPrice and eth_feeHistory on an interval.
+
+    Every request gets the same cached quote, so one response never mixes
+    two different gas prices. A quote older than ``max_age`` seconds is never
+    served: quote() refreshes synchronously or raises.
+    """
+
+    def __init__(self, w3, refresh_interval=10, max_age=60, fee_history_blocks=5,
+                 reward_percentile=50):
+        self.w3 = w3
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.fee_history_blocks = fee_history_blocks
+        self.reward_percentile = reward_percentile
+        self._quote = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def quote(self):
+        """Current GasQuote, refreshed in the background"""
+        self._ensure_started()
+        quote = self._quote
+        if quote is None or time.time() - quote.fetched_at > self.max_age:
+            with self._lock:
+                quote = self._quote
+                if quote is None or time.time() - quote.fetched_at > self.max_age:
+                    quote = self.refresh()
+        return quote
+
+    def refresh(self):
+        """Sample the node now"""
+        gas_price = self.w3.eth.gas_price
+        max_fee = priority_fee = base_fee = None
+        try:
+            history = self.w3.eth.fee_history(
+                self.fee_history_blocks, 'latest', [self.reward_percentile]
+            )
+            # The last base fee is the one the next block will charge
+            base_fee = history['baseFeePerGas'][-1]
+            rewards = sorted(reward[0] for reward in history['reward'] if reward)
+            priority_fee = rewards[len(rewards) // 2] if rewards else 0
+            # Leave room for the base fee to double before the tx is mined
+            max_fee = 2 * base_fee + priority_fee
+        except Exception:
+            pass
+
+        self._quote = GasQuote(gas_price, max_fee, priority_fee, base_fee, time.time())
+        return self._quote
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"⚠️  Gas oracle refresh failed: {str(e)}")
+            time.sleep(self.refresh_interval)
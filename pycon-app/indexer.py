@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+Payment Indexer
+Follows PaymentSplitter events and keeps a local SQLite view of every payment
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from eth_utils import event_abi_to_log_topic
+from hexbytes import HexBytes
+
+from batch_reads import BatchReader
+
+EVENT_NAMES = ('PaymentCreated', 'ContributionMade', 'PaymentCompleted')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS payments (
+    id INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    recipients TEXT NOT NULL,
+    percentages TEXT NOT NULL,
+    total_amount TEXT NOT NULL,
+    collected_amount TEXT NOT NULL,
+    is_active INTEGER NOT NULL,
+    creator TEXT NOT NULL,
+    created_block INTEGER NOT NULL,
+    completed_block INTEGER,
+    total_amount_key TEXT NOT NULL DEFAULT '',
+    progress_bps INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS contributions (
+    payment_id INTEGER NOT NULL,
+    contributor TEXT NOT NULL,
+    amount TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    log_index INTEGER NOT NULL,
+    PRIMARY KEY (tx_hash, log_index)
+);
+CREATE INDEX IF NOT EXISTS contributions_payment ON contributions (payment_id);
+CREATE INDEX IF NOT EXISTS contributions_block ON contributions (block_number);
+CREATE INDEX IF NOT EXISTS payments_progress ON payments (progress_bps, id);
+CREATE INDEX IF NOT EXISTS payments_total ON payments (total_amount_key, id);
+CREATE INDEX IF NOT EXISTS payments_creator ON payments (creator, id);
+CREATE INDEX IF NOT EXISTS payments_active ON payments (is_active, id);
+CREATE TABLE IF NOT EXISTS blocks (
+    number INTEGER PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Sortable columns for page_payments()
+SORT_COLUMNS = {
+    'id': 'id',
+    'progress': 'progress_bps',
+    'total_amount': 'total_amount_key',
+}
+
+
+def amount_key(amount):
+    """Zero-padded decimal so Wei amounts sort correctly as TEXT"""
+    return str(amount).zfill(78)
+
+
+def progress_bps(collected, total):
+    """Collected share of the total in basis points"""
+    return collected * 10000 // total if total > 0 else 0
+
+
+class PaymentIndex:
+    """SQLite materialized view of payments and contributions.
+
+    Wei amounts are stored as decimal strings because they overflow
+    SQLite's 64-bit integers.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._migrate()
+        self.db.executescript(SCHEMA)
+
+    def _migrate(self):
+        """Add the sort-key columns to indexes created before paging existed"""
+        columns = {row[1] for row in self.db.execute('PRAGMA table_info(payments)')}
+        if not columns or 'progress_bps' in columns:
+            return
+        with self.db as db:
+            db.execute("ALTER TABLE payments ADD COLUMN total_amount_key TEXT NOT NULL DEFAULT ''")
+            db.execute('ALTER TABLE payments ADD COLUMN progress_bps INTEGER NOT NULL DEFAULT 0')
+            for payment_id, total, collected in db.execute(
+                'SELECT id, total_amount, collected_amount FROM payments'
+            ).fetchall():
+                db.execute(
+                    'UPDATE payments SET total_amount_key = ?, progress_bps = ? WHERE id = ?',
+                    (amount_key(total), progress_bps(int(collected), int(total)), payment_id)
+                )
+
+    @property
+    def db(self):
+        """One connection per thread (sqlite3 connections are not shareable)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    # Reads
+
+    def payment_count(self):
+        """Equivalent of nextPaymentId()"""
+        row = self.db.execute('SELECT MAX(id) FROM payments').fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def get_payment(self, payment_id):
+        """Payment in getPayment() tuple order, or None if not indexed yet"""
+        row = self.db.execute(
+            'SELECT * FROM payments WHERE id = ?', (payment_id,)
+        ).fetchone()
+        return None if row is None else self._to_payment(row)
+
+    def list_payments(self):
+        """Yield (id, payment) for every indexed payment in id order"""
+        for row in self.db.execute('SELECT * FROM payments ORDER BY id'):
+            yield row[0], self._to_payment(row)
+
+    def page_payments(self, sort='id', descending=False, after=None, limit=20,
+                      is_active=None, creator=None):
+        """One page of (id, payment) rows using keyset pagination.
+
+        ``after`` is the (sort value, id) of the last row of the previous page.
+        Returns the rows and the key to pass as ``after`` for the next page,
+        or None on the last page.
+        """
+        column = SORT_COLUMNS[sort]
+        where, params = [], []
+        if is_active is not None:
+            where.append('is_active = ?')
+            params.append(int(is_active))
+        if creator is not None:
+            where.append('creator = ?')
+            params.append(creator)
+        if after is not None:
+            op = '<' if descending else '>'
+            if column == 'id':
+                where.append(f'id {op} ?')
+                params.append(after[1])
+            else:
+                where.append(f'({column}, id) {op} (?, ?)')
+                params.extend(after)
+
+        order = 'DESC' if descending else 'ASC'
+        sql = 'SELECT * FROM payments'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += f' ORDER BY {column} {order}, id {order} LIMIT ?'
+        params.append(limit + 1)
+
+        rows = self.db.execute(sql, params).fetchall()
+        next_after = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            sort_value = {'id': last[0], 'progress_bps': last[11], 'total_amount_key': last[10]}[column]
+            next_after = (sort_value, last[0])
+        return [(row[0], self._to_payment(row)) for row in rows], next_after
+
+    def get_contributions(self, payment_id):
+        """Contributions to a payment as (contributor, amount) in chain order"""
+        rows = self.db.execute(
+            'SELECT contributor, amount FROM contributions WHERE payment_id = ? '
+            'ORDER BY block_number, log_index',
+            (payment_id,)
+        )
+        return [(contributor, int(amount)) for contributor, amount in rows]
+
+    def get_contributions_many(self, payment_ids):
+        """Contributions of several payments as {payment_id: [(contributor, amount)]}"""
+        payment_ids = list(payment_ids)
+        contributions = {payment_id: [] for payment_id in payment_ids}
+        if not payment_ids:
+            return contributions
+        rows = self.db.execute(
+            'SELECT payment_id, contributor, amount FROM contributions '
+            f'WHERE payment_id IN ({", ".join("?" * len(payment_ids))}) '
+            'ORDER BY block_number, log_index',
+            payment_ids
+        )
+        for payment_id, contributor, amount in rows:
+            contributions[payment_id].append((contributor, int(amount)))
+        return contributions
+
+    def _to_payment(self, row):
+        return [
+            row[1],
+            json.loads(row[2]),
+            json.loads(row[3]),
+            int(row[4]),
+            int(row[5]),
+            bool(row[6]),
+            row[7],
+        ]
+
+    # Checkpoints
+
+    def get_checkpoint(self):
+        """Last fully indexed block, or None before the first sync"""
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'checkpoint'").fetchone()
+        return None if row is None else int(row[0])
+
+    def recent_blocks(self):
+        """Recorded (number, hash) pairs, newest first"""
+        return self.db.execute('SELECT number, hash FROM blocks ORDER BY number DESC').fetchall()
+
+    # Writes
+
+    def apply(self, events, details, checkpoint, block_hash=None, keep_from=None):
+        """Apply decoded events and advance the checkpoint in one transaction"""
+        with self.db as db:
+            for event in events:
+                args = event['args']
+                payment_id = args['paymentId']
+                block_number = event['blockNumber']
+
+                if event['event'] == 'PaymentCreated':
+                    recipients, percentages = details.get(payment_id, ([], []))
+                    db.execute(
+                        'INSERT OR REPLACE INTO payments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, NULL, ?, 0)',
+                        (payment_id, args['description'], json.dumps(list(recipients)),
+                         json.dumps(list(percentages)), str(args['totalAmount']), '0', 1,
+                         args['creator'], block_number, amount_key(args['totalAmount']))
+                    )
+                elif event['event'] == 'ContributionMade':
+                    inserted = db.execute(
+                        'INSERT OR IGNORE INTO contributions VALUES (?, ?, ?, ?, ?, ?)',
+                        (payment_id, args['contributor'], str(args['amount']), block_number,
+                         HexBytes(event['transactionHash']).hex(), event['logIndex'])
+                    ).rowcount
+                    if inserted:
+                        row = db.execute(
+                            'SELECT collected_amount, total_amount FROM payments WHERE id = ?',
+                            (payment_id,)
+                        ).fetchone()
+                        if row is not None:
+                            self._set_collected(db, payment_id, int(row[0]) + args['amount'], int(row[1]))
+                elif event['event'] == 'PaymentCompleted':
+                    db.execute(
+                        'UPDATE payments SET is_active = 0, completed_block = ? WHERE id = ?',
+                        (block_number, payment_id)
+                    )
+
+            self._set_checkpoint(db, checkpoint)
+            if block_hash is not None:
+                db.execute('INSERT OR REPLACE INTO blocks VALUES (?, ?)', (checkpoint, block_hash))
+            if keep_from is not None:
+                # Keep at least the newest hash so the next pass can detect a reorg
+                db.execute(
+                    'DELETE FROM blocks WHERE number < ? AND number < (SELECT MAX(number) FROM blocks)',
+                    (keep_from,)
+                )
+
+    def rollback(self, block_number):
+        """Forget everything from block_number onwards and rebuild affected payments"""
+        with self.db as db:
+            affected = {row[0] for row in db.execute(
+                'SELECT DISTINCT payment_id FROM contributions WHERE block_number >= ?',
+                (block_number,)
+            )}
+            db.execute('DELETE FROM contributions WHERE block_number >= ?', (block_number,))
+            db.execute('DELETE FROM payments WHERE created_block >= ?', (block_number,))
+            db.execute(
+                'UPDATE payments SET is_active = 1, completed_block = NULL WHERE completed_block >= ?',
+                (block_number,)
+            )
+            for payment_id in affected:
+                row = db.execute('SELECT total_amount FROM payments WHERE id = ?', (payment_id,)).fetchone()
+                if row is None:
+                    continue
+                collected = sum(int(amount) for (amount,) in db.execute(
+                    'SELECT amount FROM contributions WHERE payment_id = ?', (payment_id,)
+                ))
+                self._set_collected(db, payment_id, collected, int(row[0]))
+            db.execute('DELETE FROM blocks WHERE number >= ?', (block_number,))
+            self._set_checkpoint(db, block_number - 1)
+
+    def _set_collected(self, db, payment_id, collected, total):
+        db.execute(
+            'UPDATE payments SET collected_amount = ?, progress_bps = ? WHERE id = ?',
+            (str(collected), progress_bps(collected, total), payment_id)
+        )
+
+    def _set_checkpoint(self, db, block_number):
+        db.execute(
+            "INSERT OR REPLACE INTO meta VALUES ('checkpoint', ?)", (str(block_number),)
+        )
+
+
+class LogIndexer:
+    """Feeds a PaymentIndex from eth_getLogs in block-range chunks"""
+
+    def __init__(self, w3, contract, index, start_block=0, chunk_size=2000,
+                 reorg_depth=12, batch_reader=None):
+        self.w3 = w3
+        self.contract = contract
+        self.index = index
+        self.start_block = start_block
+        self.chunk_size = chunk_size
+        self.reorg_depth = reorg_depth
+        self.reader = batch_reader or BatchReader(w3, contract)
+        self._events = {}
+        for name in EVENT_NAMES:
+            event = getattr(contract.events, name)()
+            self._events[HexBytes(event_abi_to_log_topic(event.abi)).hex()] = event
+
+    def sync(self):
+        """Index from the checkpoint up to the current head; returns events applied"""
+        self._handle_reorg()
+        head = self.w3.eth.block_number
+        applied = 0
+        for start, end in self._ranges(self._next_block(), head):
+            events = self._fetch_logs(start, end)
+            self._apply(events, end, record_hash=(end == head))
+            applied += len(events)
+        return applied
+
+    def follow(self, poll_interval=5):
+        """Keep the index in sync with the chain forever"""
+        while True:
+            try:
+                applied = self.sync()
+                if applied:
+                    print(f"📥 Indexed {applied} events up to block {self.index.get_checkpoint()}")
+            except Exception as e:
+                print(f"⚠️  Indexer error: {str(e)}")
+            time.sleep(poll_interval)
+
+    def backfill(self, to_block=None, workers=4):
+        """Fetch historic logs with a worker pool, applying chunks in block order"""
+        self._handle_reorg()
+        head = self.w3.eth.block_number if to_block is None else to_block
+        ranges = list(self._ranges(self._next_block(), head))
+        applied = 0
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # map() yields in submission order while later ranges are still in flight
+            for (start, end), events in zip(ranges, pool.map(lambda r: self._fetch_logs(*r), ranges)):
+                self._apply(events, end, record_hash=(end == head))
+                applied += len(events)
+        return applied
+
+    def _next_block(self):
+        checkpoint = self.index.get_checkpoint()
+        return self.start_block if checkpoint is None else checkpoint + 1
+
+    def _ranges(self, from_block, to_block):
+        for start in range(from_block, to_block + 1, self.chunk_size):
+            yield start, min(start + self.chunk_size - 1, to_block)
+
+    def _fetch_logs(self, from_block, to_block):
+        """Decoded events for a block range, halving the range if the node refuses it"""
+        try:
+            logs = self.w3.eth.get_logs({
+                'address': self.contract.address,
+                'fromBlock': from_block,
+                'toBlock': to_block,
+                'topics': [list(self._events)],
+            })
+        except Exception:
+            if from_block >= to_block:
+                raise
+            middle = (from_block + to_block) // 2
+            return self._fetch_logs(from_block, middle) + self._fetch_logs(middle + 1, to_block)
+
+        events = [self._events[HexBytes(log['topics'][0]).hex()].process_log(log) for log in logs]
+        events.sort(key=lambda event: (event['blockNumber'], event['logIndex']))
+        return events
+
+    def _apply(self, events, to_block, record_hash=False):
+        # Recipients and percentages are not in the event, read them once per new payment
+        created = [event['args']['paymentId'] for event in events if event['event'] == 'PaymentCreated']
+        details = {}
+        for payment_id, payment in zip(created, self.reader.get_payments(created)):
+            if payment is not None:
+                details[payment_id] = (payment[1], payment[2])
+
+        block_hash = None
+        if record_hash:
+            block_hash = HexBytes(self.w3.eth.get_block(to_block)['hash']).hex()
+        self.index.apply(events, details, to_block, block_hash, keep_from=to_block - self.reorg_depth)
+
+    def _handle_reorg(self):
+        """Roll back to the newest recorded block that is still on the canonical chain"""
+        recent = self.index.recent_blocks()
+        if not recent:
+            return
+        for number, stored_hash in recent:
+            if HexBytes(self.w3.eth.get_block(number)['hash']).hex() == stored_hash:
+                if number != recent[0][0]:
+                    print(f"🔀 Reorg detected, rolling back to block {number}")
+                    self.index.rollback(number + 1)
+                return
+        rollback_to = max(self.start_block, recent[-1][0] - self.reorg_depth)
+        print(f"🔀 Deep reorg detected, rolling back to block {rollback_to}")
+        self.index.rollback(rollback_to)
+
+
+def main():
+    from app import INDEX_DB_PATH, contract, w3
+
+    parser = argparse.ArgumentParser(description="Index PaymentSplitter events into SQLite")
+    parser.add_argument('--db', default=INDEX_DB_PATH or 'payments.db', help="SQLite database path")
+    parser.add_argument('--start-block', type=int, default=int(os.getenv('INDEXER_START_BLOCK', '0')),
+                        help="Contract deployment block")
+    parser.add_argument('--chunk-size', type=int, default=int(os.getenv('INDEXER_CHUNK_SIZE', '2000')))
+    parser.add_argument('--reorg-depth', type=int, default=int(os.getenv('INDEXER_REORG_DEPTH', '12')))
+    parser.add_argument('--backfill', action='store_true', help="Backfill history with a worker pool, then exit")
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--poll-interval', type=float, default=5)
+    options = parser.parse_args()
+
+    indexer = LogIndexer(
+        w3, contract, PaymentIndex(options.db),
+        start_block=options.start_block,
+        chunk_size=options.chunk_size,
+        reorg_depth=options.reorg_depth,
+    )
+
+    print(f"🗂️  PAYMENT INDEXER")
+    print(f"Database: {options.db}")
+    print(f"Contract: {contract.address}")
+
+    if options.backfill:
+        started = time.time()
+        applied = indexer.backfill(workers=options.workers)
+        print(f"✅ Backfilled {applied} events in {time.time() - started:.1f}s")
+        return
+
+    indexer.follow(options.poll_interval)
+
+
+if __name__ == '__main__':
+    main()
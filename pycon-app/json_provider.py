@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+JSON Provider
+Compact JSON encoded with orjson when it is installed, stdlib json otherwise
+"""
+
+import json
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: everything below falls back to the json module
+    orjson = None
+
+# Rows encoded per chunk when a list response is streamed
+STREAM_CHUNK_ROWS = 1000
+
+
+def _default(o):
+    # Decimals are exact as strings; floats would round them
+    if isinstance(o, Decimal):
+        return str(o)
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj):
+    """Compact, key-sorted UTF-8 JSON, the same document with or without orjson"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_default, option=orjson.OPT_SORT_KEYS)
+        except TypeError:
+            # orjson rejects integers beyond 64 bits (raw Wei), json handles them
+            pass
+    return json.dumps(obj, default=_default, sort_keys=True, separators=(',', ':'),
+                      ensure_ascii=False).encode('utf-8')
+
+
+def iter_json_list(rows, chunk_rows=STREAM_CHUNK_ROWS):
+    """Encode a list as a JSON array chunk by chunk, for streamed responses"""
+    yield b'['
+    for start in range(0, len(rows), chunk_rows):
+        chunk = dumps_bytes(rows[start:start + chunk_rows])[1:-1]
+        yield chunk if start == 0 else b',' + chunk
+    yield b']\n'
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider using dumps_bytes() for jsonify() and app.json.dumps().
+
+    Pretty-printing (debug mode or explicit dumps() options) still goes
+    through the stdlib provider.
+    """
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        if self.compact is False or (self.compact is None and self._app.debug):
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
+
+    def stream_list(self, rows):
+        """Response streaming ``rows`` as a JSON array, without building the whole body"""
+        return self._app.response_class(iter_json_list(rows), mimetype=self.mimetype)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Live Payment Feed
+One shared log poller pushing payment progress to every subscribed viewer
+"""
+
+import threading
+import time
+
+from eth_utils import event_abi_to_log_topic
+from hexbytes import HexBytes
+
+WATCHED_EVENTS = ('ContributionMade', 'PaymentCompleted')
+
+
+class PaymentFeed:
+    """Polls ContributionMade/PaymentCompleted logs once for all viewers.
+
+    Viewers subscribe to a payment id with a ``deliver(update)`` callback.
+    Each poll reads the new logs with a single eth_getLogs, drops the touched
+    payments from ``payment_cache``, re-reads the watched ones in one batch and
+    calls ``deliver`` with ``render(payment_id, payment)`` for every payment
+    whose update changed. The poller only touches the node while someone is
+    subscribed.
+    """
+
+    def __init__(self, w3, contract, payment_cache, load_many, render, poll_interval=2):
+        self.w3 = w3
+        self.contract = contract
+        self.payment_cache = payment_cache
+        self.load_many = load_many
+        self.render = render
+        self.poll_interval = poll_interval
+        self._events = {}
+        for name in WATCHED_EVENTS:
+            event = getattr(contract.events, name)()
+            self._events[HexBytes(event_abi_to_log_topic(event.abi)).hex()] = event
+        self._subscribers = {}
+        self._last_update = {}
+        self._cursor = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self.polls = 0
+
+    def subscribe(self, payment_id, deliver):
+        """Start pushing updates of a payment to ``deliver``; returns a token for unsubscribe()"""
+        self._ensure_started()
+        token = (payment_id, deliver)
+        with self._lock:
+            self._subscribers.setdefault(payment_id, set()).add(deliver)
+        return token
+
+    def unsubscribe(self, token):
+        payment_id, deliver = token
+        with self._lock:
+            viewers = self._subscribers.get(payment_id)
+            if viewers is not None:
+                viewers.discard(deliver)
+                if not viewers:
+                    del self._subscribers[payment_id]
+                    self._last_update.pop(payment_id, None)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(viewers) for viewers in self._subscribers.values())
+
+    def poll(self):
+        """Read logs since the last poll and push the resulting updates"""
+        with self._lock:
+            watched = set(self._subscribers)
+        if not watched:
+            # Nobody is watching: forget the cursor instead of reading logs for no one
+            self._cursor = None
+            return
+
+        head = self.w3.eth.block_number
+        if self._cursor is None:
+            # First poll for these viewers: anything before now is covered by a fresh read
+            changed = watched
+            for payment_id in watched:
+                self.payment_cache.invalidate(payment_id)
+        else:
+            changed = set()
+            if head > self._cursor:
+                for log in self.w3.eth.get_logs({
+                    'address': self.contract.address,
+                    'fromBlock': self._cursor + 1,
+                    'toBlock': head,
+                    'topics': [list(self._events)],
+                }):
+                    payment_id = self._events[HexBytes(log['topics'][0]).hex()].process_log(log)['args']['paymentId']
+                    self.payment_cache.invalidate(payment_id)
+                    changed.add(payment_id)
+        self._cursor = head
+        self.polls += 1
+
+        changed &= watched
+        if changed:
+            ids = sorted(changed)
+            for payment_id, payment in zip(ids, self.payment_cache.get_many(ids, self.load_many)):
+                if payment is not None:
+                    self._publish(payment_id, self.render(payment_id, payment))
+
+    def _publish(self, payment_id, update):
+        with self._lock:
+            if self._last_update.get(payment_id) == update:
+                return
+            self._last_update[payment_id] = update
+            viewers = list(self._subscribers.get(payment_id, ()))
+        for deliver in viewers:
+            deliver(update)
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"⚠️  Live feed poll failed: {str(e)}")
+            time.sleep(self.poll_interval)
+
+
+def sse_message(event, data):
+    """One Server-Sent Events message; ``data`` must be a single line (compact JSON)"""
+    return f"event: {event}\ndata: {data}\n\n"
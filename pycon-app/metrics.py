@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Metrics
+In-process counters and histograms rendered in the Prometheus text format
+"""
+
+import bisect
+import threading
+
+# Seconds; covers cache hits through slow RPC fan-outs
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+MEDIA_TYPE = 'text/plain; version=0.0.4'
+CONTENT_TYPE = f'{MEDIA_TYPE}; charset=utf-8'
+
+
+class Counter:
+    """Monotonic counter with fixed label names"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for label_values, value in sorted(values.items()):
+            yield self.name, _labels(self.labels, label_values), value
+
+
+class Histogram:
+    """Cumulative-bucket histogram with fixed label names"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, then +Inf, sum
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for label_values, series in sorted(snapshot.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), series):
+                cumulative += count
+                yield (f"{self.name}_bucket",
+                       _labels(self.labels + ('le',), label_values + (_number(bound),)),
+                       cumulative)
+            yield f"{self.name}_sum", _labels(self.labels, label_values), series[-1]
+            yield f"{self.name}_count", _labels(self.labels, label_values), cumulative
+
+
+class Callback:
+    """Counter or gauge read from ``read()`` at scrape time, free on the hot path.
+
+    ``read`` returns a number, or a dict of label value tuples to numbers.
+    """
+
+    def __init__(self, name, help, read, kind='gauge', labels=()):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.kind = kind
+        self.labels = tuple(labels)
+
+    def samples(self):
+        values = self.read()
+        if not isinstance(values, dict):
+            values = {(): values}
+        for label_values, value in sorted(values.items()):
+            if value is not None:
+                yield self.name, _labels(self.labels, label_values), value
+
+
+class Registry:
+    """The set of metrics rendered by /metrics"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self.register(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def callback(self, name, help, read, kind='gauge', labels=()):
+        return self.register(Callback(name, help, read, kind, labels))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{labels} {_number(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(names, values):
+    if not names:
+        return ''
+    pairs = (f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + ','.join(pairs) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _number(value):
+    if isinstance(value, str):
+        return value
+    if isinstance(value, bool):
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Process-wide registry and the metrics shared by the Flask and ASGI apps
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'http_requests_total', "HTTP requests by route, method and status", ('route', 'method', 'status'))
+HTTP_DURATION = REGISTRY.histogram(
+    'http_request_duration_seconds', "Time to produce the response, per route", ('route', 'method'))
+APP_ERRORS = REGISTRY.counter(
+    'app_errors_total', "Exceptions handled inside the app, by where they were caught", ('where',))
+RPC_REQUESTS = REGISTRY.counter(
+    'rpc_requests_total', "JSON-RPC requests by method; batched calls count individually", ('method',))
+RPC_DURATION = REGISTRY.histogram(
+    'rpc_request_duration_seconds', "JSON-RPC round trip latency by method (batch for batches)", ('method',))
+RPC_ERRORS = REGISTRY.counter(
+    'rpc_errors_total', "Failed JSON-RPC requests: every endpoint down, or an error reply", ('method', 'kind'))
+
+
+def observe_request(route, method, status, seconds):
+    HTTP_REQUESTS.inc(route, method, str(status))
+    HTTP_DURATION.observe(seconds, route, method)
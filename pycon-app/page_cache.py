@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Page Cache
+Rendered templates cached by the chain state they show, with ETag/Last-Modified validators
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from werkzeug.http import parse_date, parse_etags
+
+# body: rendered HTML (str), etag: unquoted strong ETag, last_modified: Unix time it was rendered
+CachedPage = namedtuple('CachedPage', ['body', 'etag', 'last_modified'])
+
+
+class PageCache:
+    """LRU cache of rendered pages keyed on (template, key).
+
+    Each entry is tagged with the ``version`` of the state it was rendered
+    from (e.g. a payment's collected amount and status). A lookup with a
+    different version renders again and replaces the entry. The ETag is a
+    hash of the HTML, so it also changes when a static asset URL inside it
+    does.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, template, key, version, render):
+        """Cached page for this state; render() is called to produce the HTML on a miss"""
+        cache_key = (template, key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        body = render()
+        page = CachedPage(body, hashlib.sha256(body.encode('utf-8')).hexdigest()[:32], int(time.time()))
+        with self._lock:
+            self._entries[cache_key] = (version, page)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return page
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+def not_modified(page, if_none_match, if_modified_since):
+    """True if a conditional GET's validators show the client already has ``page``"""
+    if if_none_match:
+        # If-None-Match wins over If-Modified-Since when both are sent
+        return parse_etags(if_none_match).contains_weak(page.etag)
+    if if_modified_since:
+        since = parse_date(if_modified_since)
+        return since is not None and page.last_modified <= since.timestamp()
+    return False
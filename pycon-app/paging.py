@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+API Paging Helpers
+Query parsing and opaque cursors for /api/payments
+"""
+
+import base64
+import json
+
+from web3 import Web3
+
+SORTS = ('id', 'progress', 'total_amount')
+PAGING_ARGS = {'limit', 'cursor', 'is_active', 'creator', 'sort', 'order'}
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(sort, descending, after):
+    """Opaque cursor pointing just past the last row of a page"""
+    raw = json.dumps([sort, descending, list(after)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(sort, descending, after) of a cursor; raises ValueError unless it is one encode_cursor made"""
+    raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+    sort, descending, after = json.loads(raw)
+    if sort not in SORTS or not isinstance(descending, bool):
+        raise ValueError("Invalid cursor")
+    if not isinstance(after, list) or len(after) != 2:
+        raise ValueError("Invalid cursor")
+    sort_value, payment_id = after
+    if not _is_int(payment_id) or payment_id < 0 or not _is_sort_value(sort, sort_value):
+        raise ValueError("Invalid cursor")
+    return sort, descending, tuple(after)
+
+
+def _is_int(value):
+    # JSON true/false decode to bools, which are ints too
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _is_sort_value(sort, value):
+    """Whether `value` can be the sort key the payment index pages by"""
+    if sort == 'total_amount':
+        # indexer.amount_key(): zero-padded decimal Wei
+        return isinstance(value, str) and len(value) == 78 and value.isascii() and value.isdigit()
+    return _is_int(value) and value >= 0
+
+
+def page_by_id(total_payments, read_many, descending, after, limit, is_active, creator):
+    """One id-ordered page without the payment index, and the key of the next page.
+
+    Ids are read in page-sized batches with read_many(ids), which returns a
+    payment (or None) per id, until the page is full.
+    """
+    walk = _walk_ids(total_payments, descending, after, limit, is_active, creator)
+    try:
+        chunk = next(walk)
+        while True:
+            chunk = walk.send(read_many(chunk))
+    except StopIteration as page:
+        return page.value
+
+
+async def page_by_id_async(total_payments, read_many, descending, after, limit, is_active, creator):
+    """page_by_id() for asyncio callers: read_many(ids) is awaited"""
+    walk = _walk_ids(total_payments, descending, after, limit, is_active, creator)
+    try:
+        chunk = next(walk)
+        while True:
+            chunk = walk.send(await read_many(chunk))
+    except StopIteration as page:
+        return page.value
+
+
+def _walk_ids(total_payments, descending, after, limit, is_active, creator):
+    """The id walk behind page_by_id(): yields each batch of ids, is sent their payments, returns the page"""
+    if descending:
+        ids = range((after[1] if after else total_payments) - 1, -1, -1)
+    else:
+        ids = range(after[1] + 1 if after else 0, total_payments)
+
+    rows = []
+    for start in range(0, len(ids), limit):
+        chunk = ids[start:start + limit]
+        payments = yield chunk
+        for payment_id, payment in zip(chunk, payments):
+            if payment is None:
+                continue
+            if is_active is not None and payment[5] != is_active:
+                continue
+            if creator is not None and payment[6] != creator:
+                continue
+            rows.append((payment_id, payment))
+            if len(rows) == limit:
+                return rows, ((payment_id, payment_id) if payment_id != ids[-1] else None)
+    return rows, None
+
+
+def parse_page_query(args):
+    """Validate /api/payments query arguments; raises ValueError on bad input"""
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValueError("limit must be a number")
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    sort = args.get('sort', 'id')
+    if sort not in SORTS:
+        raise ValueError(f"sort must be one of: {', '.join(SORTS)}")
+
+    order = args.get('order', 'asc')
+    if order not in ('asc', 'desc'):
+        raise ValueError("order must be asc or desc")
+    descending = order == 'desc'
+
+    is_active = args.get('is_active')
+    if is_active is not None:
+        if is_active.lower() not in ('true', 'false', '1', '0'):
+            raise ValueError("is_active must be true or false")
+        is_active = is_active.lower() in ('true', '1')
+
+    creator = args.get('creator')
+    if creator is not None:
+        if not Web3.is_address(creator):
+            raise ValueError("creator must be an address")
+        creator = Web3.to_checksum_address(creator)
+
+    after = None
+    if args.get('cursor'):
+        try:
+            cursor_sort, cursor_descending, after = decode_cursor(args['cursor'])
+        except Exception:
+            raise ValueError("Invalid cursor")
+        if (cursor_sort, cursor_descending) != (sort, descending):
+            raise ValueError("cursor does not match sort and order")
+
+    return {
+        'sort': sort,
+        'descending': descending,
+        'after': after,
+        'limit': limit,
+        'is_active': is_active,
+        'creator': creator,
+    }
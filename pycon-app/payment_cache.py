@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Payment Cache
+Bounded LRU cache for getPayment results that knows when chain state can change
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# Entries tagged with this block never go stale
+FINAL = None
+
+
+class PaymentCache:
+    """LRU cache of getPayment() tuples.
+
+    A completed payment (isActive == false) can never change again, so it is
+    kept until the LRU evicts it. An active payment is only valid for the
+    block it was read at; the current block number is re-read at most once
+    every ``block_ttl`` seconds, so a contribution can take up to that long
+    to show. ``invalidate()`` drops a single payment sooner; the live feed
+    calls it for payments with new logs, but only while a viewer is
+    subscribed.
+    """
+
+    def __init__(self, block_number, max_size=4096, block_ttl=5.0):
+        self._block_number = block_number
+        self.max_size = max_size
+        self.block_ttl = block_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._block = None
+        self._block_checked_at = 0.0
+        self._count = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def current_block(self):
+        """Latest block number, refreshed at most once per block_ttl"""
+        now = time.monotonic()
+        if self._block_stale(now):
+            self._set_block(self._block_number(), now)
+        return self._block
+
+    async def current_block_async(self, block_number):
+        """current_block() for asyncio callers; a refresh awaits block_number() instead"""
+        now = time.monotonic()
+        if self._block_stale(now):
+            self._set_block(await block_number(), now)
+        return self._block
+
+    def _block_stale(self, now):
+        return self._block is None or now - self._block_checked_at >= self.block_ttl
+
+    def _set_block(self, block, now):
+        with self._lock:
+            self._block = block
+            self._block_checked_at = now
+
+    def get(self, payment_id, load):
+        """Cached getPayment for one id; load(payment_id) is called on a miss"""
+        return self.get_many([payment_id], lambda ids: [load(ids[0])])[0]
+
+    def get_many(self, payment_ids, load_many):
+        """Cached getPayment for many ids; misses are loaded with one load_many(ids) call"""
+        payment_ids = list(payment_ids)
+        block = self.current_block()
+        found, missing = self._lookup(payment_ids, block)
+        if missing:
+            self._store(found, missing, load_many(missing), block)
+        return [found[payment_id] for payment_id in payment_ids]
+
+    async def get_async(self, payment_id, load, block):
+        """get() for asyncio callers, at a block from current_block_async(); load(payment_id) is awaited"""
+        async def load_many(ids):
+            return [await load(ids[0])]
+        return (await self.get_many_async([payment_id], load_many, block))[0]
+
+    async def get_many_async(self, payment_ids, load_many, block):
+        """get_many() for asyncio callers, at a block from current_block_async(); load_many(ids) is awaited"""
+        payment_ids = list(payment_ids)
+        found, missing = self._lookup(payment_ids, block)
+        if missing:
+            self._store(found, missing, await load_many(missing), block)
+        return [found[payment_id] for payment_id in payment_ids]
+
+    def _lookup(self, payment_ids, block):
+        """({id: payment} for entries valid at block, [ids to load])"""
+        found = {}
+        missing = []
+        with self._lock:
+            for payment_id in payment_ids:
+                entry = self._entries.get(payment_id)
+                if entry is not None and entry[1] in (FINAL, block):
+                    self._entries.move_to_end(payment_id)
+                    found[payment_id] = entry[0]
+                    self.hits += 1
+                else:
+                    missing.append(payment_id)
+                    self.misses += 1
+        return found, missing
+
+    def _store(self, found, missing, payments, block):
+        for payment_id, payment in zip(missing, payments):
+            found[payment_id] = payment
+            if payment is not None:
+                self.put(payment_id, payment, block)
+
+    def put(self, payment_id, payment, block):
+        # Unknown ids come back as an empty, inactive struct; only real completed payments are final
+        completed = not payment[5] and payment[3] > 0
+        with self._lock:
+            self._entries[payment_id] = (payment, FINAL if completed else block)
+            self._entries.move_to_end(payment_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def payment_count(self, load):
+        """Cached nextPaymentId(); load() is called at most once per block"""
+        block = self.current_block()
+        with self._lock:
+            if self._count is not None and self._count[1] == block:
+                return self._count[0]
+        count = load()
+        with self._lock:
+            self._count = (count, block)
+        return count
+
+    def invalidate(self, payment_id):
+        """Forget a payment, e.g. after the live feed sees a ContributionMade event for it"""
+        with self._lock:
+            if self._entries.pop(payment_id, None) is not None:
+                self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'block': self._block,
+            }
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Pooled RPC Providers
+Keep-alive connection pools over several RPC endpoints with health-based failover
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import aiohttp
+import requests
+from requests.adapters import HTTPAdapter
+from web3.providers.async_base import AsyncJSONBaseProvider
+from web3.providers.base import JSONBaseProvider
+
+from metrics import REGISTRY, RPC_DURATION, RPC_ERRORS, RPC_REQUESTS
+
+# Methods that can be sent to a second endpoint while the first is slow
+READ_METHODS = frozenset({
+    'eth_blockNumber',
+    'eth_call',
+    'eth_chainId',
+    'eth_estimateGas',
+    'eth_feeHistory',
+    'eth_gasPrice',
+    'eth_getBalance',
+    'eth_getBlockByNumber',
+    'eth_getCode',
+    'eth_getLogs',
+    'eth_getTransactionCount',
+    'eth_getTransactionReceipt',
+    'net_version',
+    'web3_clientVersion',
+})
+
+# Latency assumed for an endpoint that has not answered yet, so it gets probed
+UNMEASURED_LATENCY = 0.05
+
+
+class EndpointUnavailable(Exception):
+    """Transport failure or HTTP error from one endpoint"""
+
+
+class Endpoint:
+    """One RPC URL with its health: latency EWMA and a circuit breaker"""
+
+    def __init__(self, url):
+        self.url = url
+        self.latency = None
+        self.failures = 0
+        self.opened_at = None
+        self.requests = 0
+        self.errors = 0
+
+    def record_success(self, elapsed, smoothing):
+        self.requests += 1
+        self.latency = elapsed if self.latency is None else \
+            smoothing * elapsed + (1 - smoothing) * self.latency
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self, threshold):
+        self.requests += 1
+        self.errors += 1
+        self.failures += 1
+        if self.failures >= threshold:
+            # (Re)open the breaker; a failed half-open probe restarts the cooldown
+            self.opened_at = time.monotonic()
+
+    def state(self, cooldown):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if time.monotonic() - self.opened_at >= cooldown else 'open'
+
+
+class EndpointPool:
+    """Ranks endpoints for each request.
+
+    The first endpoint is drawn at random weighted by 1 / latency, so faster
+    nodes take most of the traffic while slower ones keep being measured. The
+    rest follow fastest first as failover targets. Endpoints whose breaker is
+    open (``failure_threshold`` consecutive failures) are skipped until
+    ``cooldown`` seconds have passed, then are tried again (half-open). If every
+    breaker is open, all endpoints are tried anyway rather than failing fast.
+    """
+
+    def __init__(self, urls, failure_threshold=3, cooldown=30, smoothing=0.2):
+        if not urls:
+            raise ValueError("At least one RPC endpoint is required")
+        self.endpoints = [Endpoint(url) for url in urls]
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.smoothing = smoothing
+        self.hedges = 0
+        self._lock = threading.Lock()
+
+    def ranked(self):
+        with self._lock:
+            usable = [e for e in self.endpoints if e.state(self.cooldown) != 'open']
+            if not usable:
+                return sorted(self.endpoints, key=lambda e: e.opened_at)
+
+            by_latency = sorted(usable, key=self._latency)
+            weights = [1 / max(self._latency(e), 1e-4) for e in by_latency]
+            first = random.choices(by_latency, weights=weights)[0]
+            return [first] + [e for e in by_latency if e is not first]
+
+    def success(self, endpoint, elapsed):
+        with self._lock:
+            endpoint.record_success(elapsed, self.smoothing)
+
+    def failure(self, endpoint):
+        with self._lock:
+            endpoint.record_failure(self.failure_threshold)
+
+    def hedged(self):
+        with self._lock:
+            self.hedges += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hedges': self.hedges,
+                'endpoints': [{
+                    'url': e.url,
+                    'state': e.state(self.cooldown),
+                    'latency_ms': None if e.latency is None else round(e.latency * 1000, 1),
+                    'requests': e.requests,
+                    'errors': e.errors,
+                } for e in self.endpoints],
+            }
+
+    def _latency(self, endpoint):
+        return UNMEASURED_LATENCY if endpoint.latency is None else endpoint.latency
+
+
+def register_metrics(provider):
+    """Export a provider's endpoint health on /metrics"""
+    def per_endpoint(field):
+        return lambda: {(e['url'],): e[field] for e in provider.stats()['endpoints']}
+
+    REGISTRY.callback('rpc_endpoint_requests_total', "Requests sent to each RPC endpoint",
+                      per_endpoint('requests'), kind='counter', labels=('endpoint',))
+    REGISTRY.callback('rpc_endpoint_errors_total', "Transport/HTTP failures of each RPC endpoint",
+                      per_endpoint('errors'), kind='counter', labels=('endpoint',))
+    REGISTRY.callback('rpc_endpoint_latency_ms', "Moving average latency of each RPC endpoint",
+                      per_endpoint('latency_ms'), labels=('endpoint',))
+    REGISTRY.callback('rpc_endpoint_up', "1 unless the endpoint's circuit breaker is open",
+                      lambda: {(e['url'],): int(e['state'] != 'open') for e in provider.stats()['endpoints']},
+                      labels=('endpoint',))
+    REGISTRY.callback('rpc_hedged_requests_total', "Reads also sent to a second endpoint",
+                      lambda: provider.stats()['hedges'], kind='counter')
+
+
+def _finished(batch, label, started, replies):
+    """Record a completed request: latency, methods sent and JSON-RPC error replies"""
+    RPC_DURATION.observe(time.perf_counter() - started, label)
+    methods = {}
+    for request in batch:
+        RPC_REQUESTS.inc(request['method'])
+        methods[request.get('id')] = request['method']
+    for reply in replies:
+        if isinstance(reply, dict) and 'error' in reply:
+            RPC_ERRORS.inc(methods.get(reply.get('id'), label), 'error_reply')
+
+
+def _failed(label, started):
+    RPC_DURATION.observe(time.perf_counter() - started, label)
+    RPC_ERRORS.inc(label, 'unavailable')
+
+
+def _label(payload):
+    return 'batch' if isinstance(payload, list) else payload.get('method')
+
+
+def is_read(payload):
+    """True if every request in a JSON-RPC payload (single or batch) is safe to send twice"""
+    batch = payload if isinstance(payload, list) else [payload]
+    return all(request.get('method') in READ_METHODS for request in batch)
+
+
+class PooledHTTPProvider(JSONBaseProvider):
+    """web3 provider over an EndpointPool with a keep-alive requests pool per endpoint.
+
+    Failed requests (connection errors, timeouts, HTTP errors) move on to the
+    next endpoint. A read that has not answered after ``hedge_delay`` seconds
+    is also sent to the next endpoint and the first reply wins. JSON-RPC error
+    replies such as reverts are answers, not endpoint failures.
+    """
+
+    def __init__(self, endpoint_uris, pool_size=32, timeout=10, hedge_delay=0.3,
+                 failure_threshold=3, cooldown=30):
+        super().__init__()
+        self.pool = EndpointPool(endpoint_uris, failure_threshold, cooldown)
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(endpoint_uris), pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix='rpc-hedge')
+
+    def make_request(self, method, params):
+        data = self.encode_rpc_request(method, params)
+        started = time.perf_counter()
+        try:
+            response = self.decode_rpc_response(self._route(data, method in READ_METHODS))
+        except EndpointUnavailable:
+            _failed(method, started)
+            raise
+        _finished([{'method': method}], method, started, [response])
+        return response
+
+    def post(self, payload):
+        """Send a raw JSON-RPC payload (e.g. a batch) and return the decoded reply"""
+        started = time.perf_counter()
+        try:
+            reply = json.loads(self._route(json.dumps(payload).encode('utf-8'), is_read(payload)))
+        except EndpointUnavailable:
+            _failed(_label(payload), started)
+            raise
+        _finished(payload if isinstance(payload, list) else [payload], _label(payload), started,
+                  reply if isinstance(reply, list) else [reply])
+        return reply
+
+    def stats(self):
+        return self.pool.stats()
+
+    def _route(self, data, hedge):
+        endpoints = self.pool.ranked()
+        if hedge and self.hedge_delay and len(endpoints) > 1:
+            return self._hedged(data, endpoints)
+
+        error = None
+        for endpoint in endpoints:
+            try:
+                return self._send(endpoint, data)
+            except EndpointUnavailable as e:
+                error = e
+        raise error
+
+    def _hedged(self, data, endpoints):
+        remaining = list(endpoints)
+        pending = {self._executor.submit(self._send, remaining.pop(0), data)}
+        hedged = False
+        error = None
+        while pending:
+            timeout = self.hedge_delay if remaining and not hedged else None
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                # The first endpoint is slow: race it against the next one
+                hedged = True
+                self.pool.hedged()
+                pending.add(self._executor.submit(self._send, remaining.pop(0), data))
+                continue
+            for future in done:
+                try:
+                    return future.result()
+                except EndpointUnavailable as e:
+                    error = e
+            if not pending and remaining:
+                pending.add(self._executor.submit(self._send, remaining.pop(0), data))
+        raise error
+
+    def _send(self, endpoint, data):
+        started = time.perf_counter()
+        try:
+            response = self.session.post(endpoint.url, data=data, timeout=self.timeout,
+                                         headers={'Content-Type': 'application/json'})
+            response.raise_for_status()
+        except requests.RequestException as e:
+            self.pool.failure(endpoint)
+            raise EndpointUnavailable(f"{endpoint.url}: {str(e)}") from e
+        self.pool.success(endpoint, time.perf_counter() - started)
+        return response.content
+
+
+class AsyncPooledHTTPProvider(AsyncJSONBaseProvider):
+    """PooledHTTPProvider for AsyncWeb3 on an aiohttp connection pool"""
+
+    def __init__(self, endpoint_uris, pool_size=32, timeout=10, hedge_delay=0.3,
+                 failure_threshold=3, cooldown=30):
+        super().__init__()
+        self.pool = EndpointPool(endpoint_uris, failure_threshold, cooldown)
+        self.pool_size = pool_size
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.hedge_delay = hedge_delay
+        self.session = None
+
+    async def make_request(self, method, params):
+        data = self.encode_rpc_request(method, params)
+        started = time.perf_counter()
+        try:
+            response = self.decode_rpc_response(await self._route(data, method in READ_METHODS))
+        except EndpointUnavailable:
+            _failed(method, started)
+            raise
+        _finished([{'method': method}], method, started, [response])
+        return response
+
+    async def post(self, payload):
+        """Send a raw JSON-RPC payload (e.g. a batch) and return the decoded reply"""
+        started = time.perf_counter()
+        try:
+            reply = json.loads(await self._route(json.dumps(payload).encode('utf-8'), is_read(payload)))
+        except EndpointUnavailable:
+            _failed(_label(payload), started)
+            raise
+        _finished(payload if isinstance(payload, list) else [payload], _label(payload), started,
+                  reply if isinstance(reply, list) else [reply])
+        return reply
+
+    def stats(self):
+        return self.pool.stats()
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _route(self, data, hedge):
+        endpoints = self.pool.ranked()
+        if hedge and self.hedge_delay and len(endpoints) > 1:
+            return await self._hedged(data, endpoints)
+
+        error = None
+        for endpoint in endpoints:
+            try:
+                return await self._send(endpoint, data)
+            except EndpointUnavailable as e:
+                error = e
+        raise error
+
+    async def _hedged(self, data, endpoints):
+        remaining = list(endpoints)
+        pending = {asyncio.ensure_future(self._send(remaining.pop(0), data))}
+        hedged = False
+        error = None
+        try:
+            while pending:
+                timeout = self.hedge_delay if remaining and not hedged else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    hedged = True
+                    self.pool.hedged()
+                    pending.add(asyncio.ensure_future(self._send(remaining.pop(0), data)))
+                    continue
+                for task in done:
+                    try:
+                        return task.result()
+                    except EndpointUnavailable as e:
+                        error = e
+                if not pending and remaining:
+                    pending.add(asyncio.ensure_future(self._send(remaining.pop(0), data)))
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _send(self, endpoint, data):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=self.timeout,
+            )
+        started = time.perf_counter()
+        try:
+            async with self.session.post(endpoint.url, data=data,
+                                         headers={'Content-Type': 'application/json'}) as response:
+                response.raise_for_status()
+                content = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self.pool.failure(endpoint)
+            raise EndpointUnavailable(f"{endpoint.url}: {str(e)}") from e
+        self.pool.success(endpoint, time.perf_counter() - started)
+        return content
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Payment Shares
+Form percentages converted to the units of the contract's percentages[], and back
+"""
+
+from decimal import Decimal, InvalidOperation
+
+# Basis points: percentages[] add up to the contract's SHARE_DENOMINATOR
+SHARE_DENOMINATOR = 10000
+# Whole percentages, on contracts deployed before SHARE_DENOMINATOR
+LEGACY_SHARE_DENOMINATOR = 100
+
+
+def parse_percentage(text, denominator):
+    """Share of a form percentage such as "33.33", out of `denominator`.
+
+    Raises ValueError unless it is a positive multiple of one share unit
+    (0.01% in basis points, 1% on legacy contracts) and at most 100%.
+    """
+    try:
+        share = Decimal(str(text).strip()) * denominator / 100
+    except InvalidOperation:
+        raise ValueError(f"{text!r} is not a number")
+    if not share.is_finite():
+        raise ValueError(f"{text!r} is not a number")
+    if share != share.to_integral_value():
+        raise ValueError(f"{text!r} is not a multiple of {share_percent(1, denominator)}%")
+    if not 0 < share <= denominator:
+        raise ValueError(f"{text!r} is not above 0 and at most 100")
+    return int(share)
+
+
+def share_percent(share, denominator):
+    """Percentage of a stored share, exact: 3333 out of 10000 is Decimal('33.33')"""
+    return Decimal(share) * 100 / denominator
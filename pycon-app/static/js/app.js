@@ -98,9 +98,9 @@ function addRecipient() {
                 <div class="col-md-4 mb-2">
                     <label class="form-label">Percentage</label>
                     <input type="number" class="form-control percentage-input" 
-                           name="percentages[]" min="1" max="100" required>
+                           name="percentages[]" min="0.01" max="100" step="0.01" required>
                     <div class="invalid-feedback">
-                        Please enter a percentage between 1-100
+                        Please enter a percentage between 0.01-100, with up to 2 decimals
                     </div>
                 </div>
                 <div class="col-md-2 mb-2 d-flex align-items-end">
@@ -142,15 +142,16 @@ function removeRecipient(index) {
     }
 }
 
-// Calculate total percentage
+// Calculate total percentage, added up in hundredths so 33.33 + 33.33 + 33.34 is exactly 100
 function calculateTotalPercentage() {
     const percentageInputs = document.querySelectorAll('.percentage-input');
-    let total = 0;
+    let hundredths = 0;
     
     percentageInputs.forEach(input => {
-        const value = parseInt(input.value) || 0;
-        total += value;
+        const value = Math.round((parseFloat(input.value) || 0) * 100);
+        hundredths += value;
     });
+    const total = hundredths / 100;
     
     const totalDisplay = document.getElementById('total-percentage');
     if (totalDisplay) {
@@ -311,6 +312,8 @@ async function handleCreatePayment(event) {
     }
     
     const formData = new FormData(event.target);
+    // Gas is estimated by simulating the transaction from the connected wallet
+    formData.append('sender', userAccount);
     
     try {
         showLoading(event.target);
@@ -348,6 +351,8 @@ async function handlePayInvoice(event) {
     }
     
     const formData = new FormData(event.target);
+    // Gas is estimated by simulating the transaction from the connected wallet
+    formData.append('sender', userAccount);
     
     try {
         showLoading(event.target);
@@ -494,10 +499,17 @@ async function sendTransaction(txData) {
             to: txData.to,
             data: txData.data,
             gas: txData.gas,
-            gasPrice: txData.gasPrice,
             nonce: nonce
         };
         
+        // Prefer EIP-1559 fees when the server quoted them
+        if (txData.maxFeePerGas) {
+            transaction.maxFeePerGas = txData.maxFeePerGas;
+            transaction.maxPriorityFeePerGas = txData.maxPriorityFeePerGas;
+        } else {
+            transaction.gasPrice = txData.gasPrice;
+        }
+        
         if (txData.value) {
             transaction.value = txData.value;
         }
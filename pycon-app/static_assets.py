@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Static Assets
+Content-hashed file names for static/, so browsers can cache them forever
+"""
+
+import hashlib
+import os
+import re
+import threading
+
+# Sent with a hashed URL: the content behind it never changes
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+DIGEST_LENGTH = 12
+_HASHED_NAME = re.compile(r'^(?P<stem>.+)\.(?P<digest>[0-9a-f]{%d})(?P<ext>\.[^./]+)$' % DIGEST_LENGTH)
+
+
+class StaticAssets:
+    """Maps static file names to hashed ones (css/style.css -> css/style.<digest>.css) and back.
+
+    Digests are cached per file and recomputed when its mtime changes, so
+    edits during development get a new URL without a restart.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._digests = {}
+        self._lock = threading.Lock()
+
+    def digest(self, filename):
+        """Content digest of a static file, or None if it does not exist"""
+        path = os.path.join(self.directory, filename)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._digests.get(filename)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        with open(path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:DIGEST_LENGTH]
+        with self._lock:
+            self._digests[filename] = (mtime, digest)
+        return digest
+
+    def hashed_name(self, filename):
+        """Name to link a static file by; unknown files keep their name"""
+        digest = self.digest(filename)
+        if digest is None:
+            return filename
+        stem, ext = os.path.splitext(filename)
+        return f"{stem}.{digest}{ext}"
+
+    def resolve(self, name):
+        """(file name, True if ``name`` is the current hashed name) for a requested name.
+
+        An outdated digest still serves the file, but must not be cached as immutable.
+        """
+        match = _HASHED_NAME.match(name)
+        if match is None:
+            return name, False
+        filename = match['stem'] + match['ext']
+        digest = self.digest(filename)
+        if digest is None:
+            return name, False
+        return filename, digest == match['digest']
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test Wei Amounts
+Integer formatting checked against the Decimal math it replaces
+"""
+
+import json
+import random
+
+import pytest
+from eth_utils import from_wei
+
+from amounts import format_ether, format_progress
+
+MAX_WEI = 2**256 - 1
+EDGE_AMOUNTS = [0, 1, 3, 10, 999999999999999999, 10**17, 10**18, 15 * 10**17, 5 * 10**20,
+                123 * 10**30, 10**77, MAX_WEI]
+
+def decimal_progress(collected, total):
+    """The original progress expression"""
+    total_celo = from_wei(total, 'ether')
+    collected_celo = from_wei(collected, 'ether')
+    return (collected_celo / total_celo * 100) if total_celo > 0 else 0
+
+def as_json(value):
+    return json.dumps(value, default=str)
+
+@pytest.mark.parametrize('wei', EDGE_AMOUNTS)
+def test_format_ether_matches_from_wei(wei):
+    assert as_json(format_ether(wei)) == as_json(from_wei(wei, 'ether'))
+
+@pytest.mark.parametrize('wei, expected', [
+    (0, 0),
+    (1, '1E-18'),
+    (10**12, '0.000001'),
+    (10**11, '1E-7'),
+    (15 * 10**17, '1.5'),
+    (5 * 10**20, '500'),
+])
+def test_format_ether_notation(wei, expected):
+    """Small amounts use Decimal's E-notation, whole amounts have no decimal point"""
+    assert format_ether(wei) == expected
+
+@pytest.mark.parametrize('collected', EDGE_AMOUNTS)
+@pytest.mark.parametrize('total', EDGE_AMOUNTS)
+def test_format_progress_edge_cases(collected, total):
+    assert as_json(format_progress(collected, total)) == as_json(decimal_progress(collected, total))
+
+def test_format_progress_random():
+    """Rounding at 28 digits, exact results and zero exponents all agree"""
+    rng = random.Random(13)
+    for _ in range(20000):
+        total = min(rng.randint(1, 99) * 10**rng.randint(0, 40) if rng.random() < 0.5
+                    else rng.getrandbits(256) >> rng.randint(0, 255), MAX_WEI)
+        collected = rng.choice([0, total, total // 3, rng.randint(0, total), min(total * 2, MAX_WEI)])
+        assert as_json(format_progress(collected, total)) == as_json(decimal_progress(collected, total))
+
+def test_format_progress_values():
+    assert format_progress(0, 0) == 0
+    assert format_progress(10**18, 10**18) == '100'
+    assert format_progress(1, 3) == '33.33333333333333333333333333'
+    assert format_progress(0, 50364750215940993387) == '0E+18'
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Test Async App
+The ASGI routes answer like the Flask app, against the local stand-in node
+"""
+
+import pytest
+
+pytest.importorskip('starlette')
+pytest.importorskip('httpx')  # starlette.testclient
+
+from starlette.testclient import TestClient
+from web3 import AsyncWeb3, Web3
+
+import app as app_module
+import async_app
+from app import CONTRACT_ABI, CONTRACT_ADDRESS
+from batch_reads import AsyncBatchReader, AsyncSummaryReader, BatchReader, SummaryReader
+from benchmarks.stand_in_node import StandInNode
+from indexer import LogIndexer, PaymentIndex
+from paging import encode_cursor
+from payment_cache import PaymentCache
+
+ALICE = '0x' + '11' * 20
+BOB = '0x' + '22' * 20
+CAROL = Web3.to_checksum_address('0x' + '33' * 20)
+
+@pytest.fixture(scope='module')
+def node():
+    with StandInNode() as node:
+        for i in range(12):
+            payment_id = node.create_payment(f"Bill #{i}", [BOB], [10000], 1000 + i, CAROL if i % 3 else ALICE)
+            if i % 2 == 0:
+                node.contribute(payment_id, BOB, 1000 + i)
+        yield node
+
+@pytest.fixture(params=['index', 'rpc'])
+def clients(request, node, monkeypatch, tmp_path):
+    """(Flask, ASGI) test clients reading from the node, with or without the index"""
+    w3 = Web3(Web3.HTTPProvider(node.url))
+    contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+    batch_reader = BatchReader(w3, contract)
+    payment_index = None
+    if request.param == 'index':
+        payment_index = PaymentIndex(str(tmp_path / 'payments.db'))
+        LogIndexer(w3, contract, payment_index).sync()
+    monkeypatch.setattr(app_module, 'w3', w3)
+    monkeypatch.setattr(app_module, 'contract', contract)
+    monkeypatch.setattr(app_module, 'batch_reader', batch_reader)
+    monkeypatch.setattr(app_module, 'summary_reader', SummaryReader(batch_reader))
+    payment_cache = PaymentCache(lambda: w3.eth.block_number, block_ttl=0)
+    summary_cache = PaymentCache(payment_cache.current_block, block_ttl=0)
+    monkeypatch.setattr(app_module, 'payment_cache', payment_cache)
+    monkeypatch.setattr(app_module, 'summary_cache', summary_cache)
+    monkeypatch.setattr(app_module, 'payment_index', payment_index)
+    async_w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(node.url))
+    async_contract = async_w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+    # Small batches and summary pages, so a listing takes several concurrent round trips
+    async_batch_reader = AsyncBatchReader(async_w3, async_contract, batch_size=2, slots=async_app.rpc_slots)
+    monkeypatch.setattr(async_app, 'w3', async_w3)
+    monkeypatch.setattr(async_app, 'contract', async_contract)
+    monkeypatch.setattr(async_app, 'batch_reader', async_batch_reader)
+    monkeypatch.setattr(async_app, 'summary_reader', AsyncSummaryReader(async_batch_reader, page_size=3))
+    monkeypatch.setattr(async_app, 'payment_cache', payment_cache)
+    monkeypatch.setattr(async_app, 'summary_cache', summary_cache)
+    monkeypatch.setattr(async_app, 'payment_index', payment_index)
+    with TestClient(async_app.app) as asgi_client:
+        yield app_module.app.test_client(), asgi_client
+
+@pytest.mark.parametrize('query', [
+    {},
+    {'limit': 5},
+    {'limit': 3, 'order': 'desc', 'is_active': 'true'},
+    {'limit': 2, 'creator': CAROL.lower()},
+    {'limit': 4, 'cursor': encode_cursor('id', False, (5, 5))},
+])
+def test_payments_match_flask(clients, query):
+    """Same rows and the same next cursor as /api/payments on the Flask app"""
+    flask_client, asgi_client = clients
+    expected = flask_client.get('/api/payments', query_string=query)
+    response = asgi_client.get('/api/payments', params=query)
+    assert response.status_code == expected.status_code == 200
+    assert response.json() == expected.get_json()
+    assert response.headers.get('X-Next-Cursor') == expected.headers.get('X-Next-Cursor')
+
+def test_pages_follow_cursors(clients, node):
+    _, asgi_client = clients
+    ids = []
+    params = {'limit': 5, 'order': 'desc'}
+    while True:
+        response = asgi_client.get('/api/payments', params=params)
+        ids += [row['id'] for row in response.json()]
+        if 'X-Next-Cursor' not in response.headers:
+            break
+        params['cursor'] = response.headers['X-Next-Cursor']
+    assert ids == list(range(len(node.payments) - 1, -1, -1))
+
+def test_pages_use_summary_cache(clients):
+    """Pages read through the Flask app's summary cache, so a repeat is served from it"""
+    _, asgi_client = clients
+    asgi_client.get('/api/payments', params={'limit': 5})
+    hits = app_module.summary_cache.hits
+    asgi_client.get('/api/payments', params={'limit': 5})
+    if app_module.payment_index is None:
+        assert app_module.summary_cache.hits == hits + 5
+    else:
+        assert app_module.summary_cache.hits == hits
+
+def test_listing_reads_concurrent_batches(clients, node):
+    """Without the index, the ASGI listing reads summaries through its own async batch reader"""
+    flask_client, asgi_client = clients
+    response = asgi_client.get('/api/payments')
+    assert response.json() == flask_client.get('/api/payments').get_json()
+    if app_module.payment_index is None:
+        # 12 payments in pages of 3, sent in batches of 2 pages
+        assert async_app.batch_reader.round_trips == 2
+        assert app_module.batch_reader.round_trips == 0
+
+def test_view_payment_uses_payment_cache(clients):
+    """A repeat view within the block is served from the payment cache shared with the Flask app"""
+    _, asgi_client = clients
+    asgi_client.get('/view_payment/4')
+    hits = app_module.payment_cache.hits
+    assert asgi_client.get('/view_payment/4').status_code == 200
+    if app_module.payment_index is None:
+        assert app_module.payment_cache.hits == hits + 1
+
+@pytest.mark.parametrize('query, error', [
+    ({'cursor': 'bm90IGEgY3Vyc29y'}, "Invalid cursor"),
+    ({'limit': 0}, "limit must be between 1 and 500"),
+])
+def test_bad_page_query(clients, query, error):
+    _, asgi_client = clients
+    response = asgi_client.get('/api/payments', params=query)
+    assert response.status_code == 400
+    assert response.json() == {'error': error}
+
+def test_sort_without_index(clients):
+    """Only the index can sort by progress; without it the page query is a 400"""
+    flask_client, asgi_client = clients
+    response = asgi_client.get('/api/payments', params={'sort': 'progress'})
+    assert response.status_code == flask_client.get('/api/payments', query_string={'sort': 'progress'}).status_code
+    assert response.status_code == (200 if app_module.payment_index is not None else 400)
+
+def test_view_payment(clients):
+    _, asgi_client = clients
+    response = asgi_client.get('/view_payment/4')
+    assert response.status_code == 200
+    assert "Bill #4" in response.text
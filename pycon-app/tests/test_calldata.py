@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Test Calldata Encoder
+Offline calldata must match web3's build_transaction byte for byte
+"""
+
+import pytest
+from eth_utils import to_checksum_address
+from web3 import Web3
+from web3.exceptions import InvalidAddress
+
+from app import CONTRACT_ABI, CONTRACT_ADDRESS
+from benchmarks.stand_in_node import StandInNode
+from calldata import CalldataEncoder
+
+ALICE = to_checksum_address('0x' + '11' * 20)
+BOB = to_checksum_address('0x' + 'ab' * 20)
+CAROL = to_checksum_address('0x66ab6d9362d4f35596279692f0251db635165871')
+
+@pytest.fixture(scope='module')
+def contract():
+    """PaymentSplitter bound to a local stand-in node"""
+    with StandInNode() as node:
+        w3 = Web3(Web3.HTTPProvider(node.url))
+        yield w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+
+@pytest.fixture(scope='module')
+def encoder():
+    return CalldataEncoder(CONTRACT_ABI)
+
+def build_data(function):
+    """What the POST handlers used to return to MetaMask"""
+    return function.build_transaction({
+        'from': '0x0000000000000000000000000000000000000000',
+        'gas': 2000000,
+        'gasPrice': 25 * 10**9,
+        'nonce': 0
+    })['data']
+
+@pytest.mark.parametrize('description, recipients, percentages, total', [
+    ("Dinner at Cafe Javas", [ALICE, BOB, CAROL], [40, 30, 30], Web3.to_wei(0.1, 'ether')),
+    ("", [ALICE], [100], 1),
+    ("Kikomando 🍛 näive " * 20, [ALICE, BOB], [50, 50], 2**256 - 1),
+    ("x" * 32, [ALICE] * 50, [2] * 50, 10**18),
+])
+def test_create_payment_matches_build_transaction(contract, encoder, description, recipients, percentages, total):
+    """createPayment calldata is identical to web3's"""
+    expected = build_data(contract.functions.createPayment(description, recipients, percentages, total))
+    assert encoder.encode('createPayment', description, recipients, percentages, total) == expected
+
+@pytest.mark.parametrize('payment_id', [0, 1, 255, 2**64, 2**256 - 1])
+def test_pay_invoice_matches_build_transaction(contract, encoder, payment_id):
+    """payInvoice calldata is identical to web3's"""
+    expected = build_data(contract.functions.payInvoice(payment_id))
+    assert encoder.encode('payInvoice', payment_id) == expected
+
+def test_rejects_what_web3_rejects(contract, encoder):
+    """Non-checksum addresses and bad argument counts fail before reaching MetaMask"""
+    lowercase = CAROL.lower()
+    with pytest.raises(InvalidAddress):
+        build_data(contract.functions.createPayment("Lunch", [lowercase], [100], 1))
+    with pytest.raises(InvalidAddress):
+        encoder.encode('createPayment', "Lunch", [lowercase], [100], 1)
+
+    with pytest.raises(TypeError):
+        encoder.encode('payInvoice')
+    with pytest.raises(Exception):
+        encoder.encode('payInvoice', -1)
+
+def test_rejects_ens_names(encoder):
+    """ENS names would need a node to resolve"""
+    with pytest.raises(InvalidAddress):
+        encoder.encode('createPayment', "Lunch", ["alice.eth"], [100], 1)
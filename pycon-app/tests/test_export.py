@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Test Export
+/api/export NDJSON lines, resuming with ?start= and the error line after a failed read, against the local stand-in node
+"""
+
+import json
+
+import pytest
+from web3 import Web3
+
+import app as app_module
+from app import CONTRACT_ABI, CONTRACT_ADDRESS, app
+from batch_reads import BatchReader
+from benchmarks.stand_in_node import StandInNode
+from indexer import LogIndexer, PaymentIndex
+from payment_cache import PaymentCache
+from shares import SHARE_DENOMINATOR
+
+ALICE = Web3.to_checksum_address('0x' + '11' * 20)
+BOB = Web3.to_checksum_address('0x' + '22' * 20)
+CAROL = Web3.to_checksum_address('0x' + '33' * 20)
+PAYMENTS = 10
+BATCH_SIZE = 4
+
+@pytest.fixture(scope='module')
+def node():
+    """Payments with none, one or several contributions; every third one completed"""
+    with StandInNode() as node:
+        node.expected_contributions = []
+        for i in range(PAYMENTS):
+            payment_id = node.create_payment(f"Bill #{i}", [ALICE, BOB], [2500, 7500], 1000 + i, ALICE)
+            contributions = [(BOB, 100 + i), (CAROL, 900)] if i % 3 == 0 else [(CAROL, 10 * i)] * (i % 3 - 1)
+            for contributor, amount in contributions:
+                node.contribute(payment_id, contributor, amount)
+            node.expected_contributions.append(contributions)
+        yield node
+
+@pytest.fixture(params=['rpc', 'index'])
+def client(request, node, monkeypatch, tmp_path):
+    w3 = Web3(Web3.HTTPProvider(node.url))
+    contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+    payment_index = None
+    if request.param == 'index':
+        payment_index = PaymentIndex(str(tmp_path / 'payments.db'))
+        LogIndexer(w3, contract, payment_index).sync()
+    monkeypatch.setattr(app_module, 'w3', w3)
+    monkeypatch.setattr(app_module, 'contract', contract)
+    monkeypatch.setattr(app_module, 'batch_reader', BatchReader(w3, contract))
+    monkeypatch.setattr(app_module, 'payment_cache', PaymentCache(lambda: w3.eth.block_number, block_ttl=0))
+    monkeypatch.setattr(app_module, 'payment_index', payment_index)
+    monkeypatch.setattr(app_module, 'RPC_BATCH_SIZE', BATCH_SIZE)
+    app_module.share_denominator.cache_clear()
+    yield app.test_client()
+    app_module.share_denominator.cache_clear()
+    node.fail_with = None
+
+def expected_line(node, payment_id):
+    description, recipients, percentages, total, collected, is_active, creator = node.payments[payment_id]
+    return {
+        'id': payment_id,
+        'description': description,
+        'creator': creator,
+        'recipients': recipients,
+        'percentages': percentages,
+        'share_denominator': SHARE_DENOMINATOR,
+        'total_amount_wei': str(total),
+        'collected_amount_wei': str(collected),
+        'is_active': is_active,
+        'contributions': [{'contributor': contributor, 'amount_wei': str(amount)}
+                          for contributor, amount in node.expected_contributions[payment_id]],
+    }
+
+def export(client, **query):
+    response = client.get('/api/export', query_string=query)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+def test_export_matches_node(client, node):
+    """One line per payment, in id order across batches, with its contributions"""
+    assert export(client) == [expected_line(node, i) for i in range(PAYMENTS)]
+
+@pytest.mark.parametrize('start', [1, BATCH_SIZE, PAYMENTS - 1, PAYMENTS, PAYMENTS + 5])
+def test_resume_with_start(client, node, start):
+    """?start= picks up at that id, so a client can resume after the last line it saved"""
+    assert export(client, start=start) == [expected_line(node, i) for i in range(start, PAYMENTS)]
+
+@pytest.mark.parametrize('start', ['-1', 'abc'])
+def test_bad_start(client, start):
+    response = client.get('/api/export', query_string={'start': start})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': 'start must be a non-negative payment id'}
+
+def test_error_line_after_failed_read(client, node):
+    """A read failing mid-stream ends the export with an error line naming where to resume"""
+    if app_module.payment_index is not None:
+        pytest.skip("the index path only reads SQLite")
+    response = client.get('/api/export', buffered=False)
+    chunks = response.response
+    first = json.loads(next(chunks))
+    node.fail_with = 500
+    rest = [json.loads(chunk) for chunk in chunks]
+
+    assert [first] + rest[:-1] == [expected_line(node, i) for i in range(BATCH_SIZE)]
+    assert rest[-1]['resume_from'] == BATCH_SIZE
+    assert 'error' in rest[-1]
+
+    node.fail_with = None
+    resumed = export(client, start=rest[-1]['resume_from'])
+    assert [first] + rest[:-1] + resumed == [expected_line(node, i) for i in range(PAYMENTS)]
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Test Gas Estimator
+Memoized gas limits checked against eth_estimateGas on the local stand-in node
+"""
+
+import logging
+import math
+
+import pytest
+from eth_utils import keccak, to_checksum_address
+from web3 import Web3
+
+import app as app_module
+from app import CONTRACT_ABI, CONTRACT_ADDRESS, app
+from benchmarks.stand_in_node import StandInNode, make_payments
+from calldata import CalldataEncoder
+from gas_estimator import GasEstimator
+from gas_oracle import GasOracle
+from payment_cache import PaymentCache
+from shares import LEGACY_SHARE_DENOMINATOR, SHARE_DENOMINATOR
+
+MARGIN = 0.2
+ZERO_ADDRESS = '0x0000000000000000000000000000000000000000'
+PAYER = to_checksum_address('0x' + '44' * 20)
+
+@pytest.fixture
+def node():
+    with StandInNode(make_payments(20, seed=7)) as node:
+        node.balances[PAYER.lower()] = 10**24
+        yield node
+
+@pytest.fixture
+def w3(node):
+    return Web3(Web3.HTTPProvider(node.url))
+
+@pytest.fixture
+def estimator(w3):
+    return GasEstimator(w3, CONTRACT_ADDRESS, CalldataEncoder(CONTRACT_ABI), margin=MARGIN)
+
+def recipients(count, seed=0):
+    return [to_checksum_address(keccak(text=f"{seed}:{i}")[-20:]) for i in range(count)]
+
+def shares(count, denominator=SHARE_DENOMINATOR):
+    percentages = [denominator // count] * count
+    percentages[-1] += denominator - sum(percentages)
+    return percentages
+
+def estimate(w3, name, *args, value=0):
+    """What the node says the real transaction needs"""
+    return w3.eth.estimate_gas({
+        'from': PAYER,
+        'to': CONTRACT_ADDRESS,
+        'data': CalldataEncoder(CONTRACT_ABI).encode(name, *args),
+        'value': value,
+    })
+
+@pytest.mark.parametrize('count', [1, 3, 10])
+def test_create_payment_limit_covers_the_bucket(w3, estimator, count):
+    """Every description in a bucket fits the limit set by the bucket's longest description"""
+    longest = w3.eth.estimate_gas(estimator._create_payment_transaction(count, 1, PAYER))
+    for description in ["Lunch", "Dinner at Cafe Javas " * 3, "x" * 64]:
+        limit = estimator.create_payment(description, count)
+        needed = estimate(w3, 'createPayment', description, recipients(count, seed=len(description)),
+                          shares(count), 10**18)
+        assert needed <= limit <= math.ceil(longest * (1 + MARGIN))
+    assert limit < 2000000
+
+def test_create_payment_simulates_the_largest_total(w3, estimator):
+    """The contract caps totals at uint128, so the simulated total is the largest one it accepts"""
+    with pytest.raises(Exception, match="Amount too large"):
+        estimate(w3, 'createPayment', "Lunch", recipients(3), shares(3), 2**128)
+    assert estimator.create_payment("Lunch", 3) < estimator.fallback
+    assert estimator.stats()['entries'] == 1
+
+def test_create_payment_legacy_shares():
+    """The simulated split adds up to the contract's denominator, or the estimate reverts"""
+    with StandInNode(share_denominator=LEGACY_SHARE_DENOMINATOR) as node:
+        w3 = Web3(Web3.HTTPProvider(node.url))
+        legacy = GasEstimator(w3, CONTRACT_ADDRESS, CalldataEncoder(CONTRACT_ABI), margin=MARGIN,
+                              share_denominator=lambda: LEGACY_SHARE_DENOMINATOR)
+        needed = estimate(w3, 'createPayment', "Lunch", recipients(3), shares(3, LEGACY_SHARE_DENOMINATOR), 10**18)
+        assert needed <= legacy.create_payment("Lunch", 3) < legacy.fallback
+
+        basis_points = GasEstimator(w3, CONTRACT_ADDRESS, CalldataEncoder(CONTRACT_ABI), margin=MARGIN)
+        assert basis_points.create_payment("Lunch", 3) == basis_points.fallback
+
+def test_create_payment_is_memoized(node, estimator):
+    """Same recipient count and description bucket: one eth_estimateGas"""
+    estimator.create_payment("Lunch", 3)
+    node.reset_counters()
+    assert estimator.create_payment("Brunch at Kikuubo", 3) == estimator.create_payment("Lunch", 3)
+    assert node.calls == 0
+
+    estimator.create_payment("Lunch", 4)
+    estimator.create_payment("y" * 200, 3)
+    assert estimator.stats() == {'entries': 3, 'hits': 2, 'misses': 3, 'failures': 0}
+
+def test_pay_invoice_limit_covers_distribution(node, w3, estimator):
+    """The limit covers a contribution that completes (or overpays) the payment, and grows per recipient"""
+    by_count = {}
+    for payment_id, payment in enumerate(node.payments):
+        if not payment[5]:
+            continue
+        limit = estimator.pay_invoice(payment_id, payment, PAYER)
+        remaining = payment[3] - payment[4]
+        assert estimate(w3, 'payInvoice', payment_id, value=remaining) <= limit
+        assert estimate(w3, 'payInvoice', payment_id, value=remaining * 2) <= limit
+        assert estimate(w3, 'payInvoice', payment_id, value=1) <= limit
+        by_count[len(payment[1])] = limit
+
+    counts = sorted(by_count)
+    assert len(counts) > 1
+    assert [by_count[c] for c in counts] == sorted(by_count[c] for c in counts)
+    assert all(limit < 2000000 for limit in by_count.values())
+
+def test_pay_invoice_is_memoized_by_recipient_count(node, estimator):
+    """Payments with the same number of recipients share one estimate"""
+    node.payments = [["Bill", recipients(3, seed=i), [40, 30, 30], 10**18, 0, True, ZERO_ADDRESS]
+                     for i in range(5)]
+    limits = {estimator.pay_invoice(i, payment, PAYER) for i, payment in enumerate(node.payments)}
+    assert len(limits) == 1
+    assert estimator.stats()['misses'] == 1
+
+def test_falls_back_when_simulation_reverts(node, estimator):
+    """A completed payment reverts in simulation; the old fixed limit is used and not cached"""
+    node.payments = [["Done", recipients(2), [50, 50], 10**18, 10**18, False, ZERO_ADDRESS]]
+    assert estimator.pay_invoice(0, node.payments[0], PAYER) == 2000000
+    assert estimator.stats()['entries'] == 0
+
+def test_failure_remembered_for_failure_ttl(node, estimator, caplog):
+    """Within failure_ttl a failed key and sender get the fallback without another simulation or warning"""
+    node.payments = [["Done", recipients(2), [50, 50], 10**18, 10**18, False, ZERO_ADDRESS]]
+    with caplog.at_level(logging.WARNING, logger='gas_estimator'):
+        estimator.pay_invoice(0, node.payments[0], PAYER)
+        node.reset_counters()
+        assert [estimator.pay_invoice(0, node.payments[0], PAYER) for _ in range(5)] == [2000000] * 5
+    assert node.calls == 0
+    assert caplog.text.count("Gas estimation failed") == 1
+    assert estimator.stats() == {'entries': 0, 'hits': 5, 'misses': 1, 'failures': 1}
+
+    # Once it expires the simulation is tried again, and a success is cached as usual
+    estimator._failures = {key: 0 for key in estimator._failures}
+    node.payments[0][4:6] = [0, True]
+    assert estimator.pay_invoice(0, node.payments[0], PAYER) < 2000000
+    assert estimator.stats()['entries'] == 1
+
+def test_pay_invoice_simulated_from_the_caller(node, estimator, caplog):
+    """The zero address holds no CELO, so only a simulation from the caller's address gets past the balance check"""
+    payment_id = next(i for i, payment in enumerate(node.payments) if payment[5])
+    with caplog.at_level(logging.WARNING, logger='gas_estimator'):
+        assert estimator.pay_invoice(payment_id, node.payments[payment_id]) == estimator.fallback
+    assert "insufficient funds" in caplog.text
+    # The failure is remembered for the zero address only
+    assert estimator.pay_invoice(payment_id, node.payments[payment_id], PAYER) < estimator.fallback
+    assert estimator.stats()['entries'] == 1
+
+@pytest.fixture
+def client(node, w3, monkeypatch):
+    contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+    monkeypatch.setattr(app_module, 'contract', contract)
+    monkeypatch.setattr(app_module, 'payment_cache', PaymentCache(lambda: w3.eth.block_number, block_ttl=0))
+    monkeypatch.setattr(app_module, 'payment_index', None)
+    monkeypatch.setattr(app_module, 'gas_oracle', GasOracle(w3, refresh_interval=3600))
+    monkeypatch.setattr(app_module, 'gas_estimator', GasEstimator(w3, CONTRACT_ADDRESS, CalldataEncoder(CONTRACT_ABI),
+                                                                  margin=MARGIN, logger=app.logger))
+    return app.test_client()
+
+@pytest.mark.parametrize('sender, simulated', [(PAYER.lower(), True), ('', False), ('not an address', False)])
+def test_pay_invoice_route_uses_sender(node, client, caplog, sender, simulated):
+    """The route simulates from the posted wallet address; without one the failure is logged through app.logger"""
+    payment_id = next(i for i, payment in enumerate(node.payments) if payment[5])
+    with caplog.at_level(logging.WARNING, logger=app.logger.name):
+        response = client.post('/pay_invoice', data={'payment_id': payment_id, 'amount': '0.1', 'sender': sender})
+    gas = int(response.get_json()['tx_data']['gas'], 16)
+    assert (gas < 2000000) == simulated
+    assert ("Gas estimation failed" in caplog.text) != simulated
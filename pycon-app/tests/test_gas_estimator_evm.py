@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test Gas Estimator on a Real EVM
+GasEstimator limits against the compiled PaymentSplitter on eth-tester's py-evm chain
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip('eth_tester')
+solcx = pytest.importorskip('solcx')
+
+from web3 import Web3
+
+from calldata import CalldataEncoder
+from gas_estimator import GasEstimator
+
+CONTRACT_SOURCE = os.path.join(os.path.dirname(__file__), '..', '..', 'pycon-app-contracts', 'contracts',
+                               'PaymentSplitter.sol')
+# brownie-config.yaml's compiler settings
+SOLC_VERSION = '0.8.19'
+
+@pytest.fixture(scope='module')
+def compiled():
+    if SOLC_VERSION not in {str(version) for version in solcx.get_installed_solc_versions()}:
+        pytest.skip(f"needs solc {SOLC_VERSION}: python -m solcx.install v{SOLC_VERSION}")
+    output = solcx.compile_files([CONTRACT_SOURCE], output_values=['abi', 'bin'], solc_version=SOLC_VERSION,
+                                 optimize=True, optimize_runs=200)
+    return next(contract for name, contract in output.items() if name.endswith(':PaymentSplitter'))
+
+@pytest.fixture
+def w3():
+    return Web3(Web3.EthereumTesterProvider())
+
+@pytest.fixture
+def contract(w3, compiled):
+    factory = w3.eth.contract(abi=compiled['abi'], bytecode=compiled['bin'])
+    receipt = w3.eth.wait_for_transaction_receipt(factory.constructor().transact({'from': w3.eth.accounts[0]}))
+    return w3.eth.contract(address=receipt['contractAddress'], abi=compiled['abi'])
+
+@pytest.fixture
+def estimator(w3, contract):
+    return GasEstimator(w3, contract.address, CalldataEncoder(contract.abi),
+                        share_denominator=lambda: contract.functions.SHARE_DENOMINATOR().call())
+
+def send(w3, contract, sender, gas, name, *args, value=0):
+    """Send the transaction with the estimated limit and return its receipt"""
+    tx_hash = getattr(contract.functions, name)(*args).transact({'from': sender, 'gas': gas, 'value': value})
+    return w3.eth.wait_for_transaction_receipt(tx_hash)
+
+@pytest.mark.parametrize('count', [1, 5, 20])
+def test_limits_cover_real_transactions(w3, contract, estimator, count):
+    """Both simulations succeed on the real contract, and the transactions fit their limits"""
+    creator, payer = w3.eth.accounts[0], w3.eth.accounts[1]
+    recipients = [Web3.to_checksum_address(Web3.keccak(text=f"evm:{i}")[-20:]) for i in range(count)]
+    denominator = contract.functions.SHARE_DENOMINATOR().call()
+    shares = [denominator // count] * count
+    shares[0] += denominator - sum(shares)
+
+    description = "Dinner at Cafe Javas"
+    limit = estimator.create_payment(description, count, creator)
+    assert limit < estimator.fallback
+    receipt = send(w3, contract, creator, limit, 'createPayment', description, recipients, shares, 10**18)
+    assert receipt['status'] == 1
+    assert receipt['gasUsed'] <= limit
+
+    payment_id = contract.functions.nextPaymentId().call() - 1
+    limit = estimator.pay_invoice(payment_id, contract.functions.getPayment(payment_id).call(), payer)
+    assert limit < estimator.fallback
+    receipt = send(w3, contract, payer, limit, 'payInvoice', payment_id, value=10**18)
+    assert receipt['status'] == 1
+    assert receipt['gasUsed'] <= limit
+    assert contract.functions.getPayment(payment_id).call()[5] is False
+    assert estimator.stats()['failures'] == 0
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test Gas Oracle
+Shared quotes, refreshing stale ones, and nodes without eth_feeHistory, against the local stand-in node
+"""
+
+import time
+
+import pytest
+from web3 import Web3
+
+from app import gas_price_fields
+from benchmarks.stand_in_node import GAS_PRICE, StandInNode
+from gas_oracle import GasOracle
+
+BASE_FEE = GAS_PRICE // 2
+PRIORITY_FEE = 10**9
+
+@pytest.fixture
+def node():
+    with StandInNode() as node:
+        yield node
+
+def oracle_for(node, **options):
+    options.setdefault('refresh_interval', 3600)
+    return GasOracle(Web3(Web3.HTTPProvider(node.url)), **options)
+
+def settle(node, timeout=2.0):
+    """Wait for the background thread's refresh to finish, so the node's counters stay put"""
+    deadline = time.monotonic() + timeout
+    calls = node.calls
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        if node.calls == calls:
+            return
+        calls = node.calls
+
+def test_quote_from_fee_history(node):
+    """The next block's base fee, the median tip, and room for the base fee to double"""
+    quote = oracle_for(node).quote()
+    assert quote.gas_price == GAS_PRICE
+    assert quote.base_fee_per_gas == BASE_FEE
+    assert quote.max_priority_fee_per_gas == PRIORITY_FEE
+    assert quote.max_fee_per_gas == 2 * BASE_FEE + PRIORITY_FEE
+    assert gas_price_fields(quote) == {
+        'gasPrice': hex(GAS_PRICE),
+        'maxFeePerGas': hex(2 * BASE_FEE + PRIORITY_FEE),
+        'maxPriorityFeePerGas': hex(PRIORITY_FEE),
+    }
+
+def test_without_fee_history(node, monkeypatch):
+    """Nodes without eth_feeHistory still get a legacy gasPrice quote"""
+    def missing(*params):
+        raise AttributeError("eth_feeHistory")
+    monkeypatch.setattr(node, 'rpc_eth_feeHistory', missing)
+    quote = oracle_for(node).quote()
+    assert quote.gas_price == GAS_PRICE
+    assert (quote.max_fee_per_gas, quote.max_priority_fee_per_gas, quote.base_fee_per_gas) == (None, None, None)
+    assert gas_price_fields(quote) == {'gasPrice': hex(GAS_PRICE)}
+
+def test_fresh_quote_is_shared(node):
+    """Requests within max_age get the same quote without touching the node"""
+    oracle = oracle_for(node)
+    first = oracle.quote()
+    settle(node)
+    node.reset_counters()
+    assert all(oracle.quote() is oracle.quote() for _ in range(10))
+    assert oracle.quote().fetched_at >= first.fetched_at
+    assert node.calls == 0
+
+def test_stale_quote_refreshed(node):
+    """A quote older than max_age is never served: quote() refreshes it first"""
+    oracle = oracle_for(node, max_age=60)
+    oracle.quote()
+    settle(node)
+    oracle._quote = oracle._quote._replace(fetched_at=time.time() - 61)
+    node.reset_counters()
+    quote = oracle.quote()
+    assert time.time() - quote.fetched_at < 60
+    assert node.calls > 0
+
+def test_stale_quote_with_node_down(node):
+    """With the node down, a stale quote raises instead of being served"""
+    oracle = oracle_for(node, max_age=60)
+    oracle.quote()
+    settle(node)
+    oracle._quote = oracle._quote._replace(fetched_at=time.time() - 61)
+    node.fail_with = 503
+    with pytest.raises(Exception):
+        oracle.quote()
+
+def test_background_refresh(node, capsys):
+    """The thread keeps sampling on its interval and survives failed samples"""
+    oracle = oracle_for(node, refresh_interval=0.05)
+    try:
+        first = oracle.quote()
+        assert wait_for(lambda: oracle.quote().fetched_at > first.fetched_at)
+
+        node.fail_with = 503
+        output = []
+        assert wait_for(lambda: output.append(capsys.readouterr().out) or "Gas oracle refresh failed" in ''.join(output))
+        node.fail_with = None
+        failed_at = time.time()
+        assert wait_for(lambda: oracle.quote().fetched_at > failed_at)
+    finally:
+        # The thread cannot be stopped; let it sleep for the rest of the run
+        oracle.refresh_interval = 3600
+
+def wait_for(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.05)
+    return True
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Test Indexer
+Checkpoints, reorgs, backfill and schema migration of the SQLite payment index, against the local stand-in node
+"""
+
+import json
+import sqlite3
+
+import pytest
+from web3 import Web3
+
+from app import CONTRACT_ABI, CONTRACT_ADDRESS
+from benchmarks.stand_in_node import StandInNode
+from indexer import LogIndexer, PaymentIndex, amount_key
+
+ALICE = '0x' + '11' * 20
+BOB = Web3.to_checksum_address('0x' + '22' * 20)
+CAROL = Web3.to_checksum_address('0x' + '33' * 20)
+
+@pytest.fixture
+def node():
+    with StandInNode() as node:
+        yield node
+
+@pytest.fixture
+def make_indexer(node, tmp_path):
+    w3 = Web3(Web3.HTTPProvider(node.url))
+    contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+    def make_indexer(name='payments.db', **options):
+        return LogIndexer(w3, contract, PaymentIndex(str(tmp_path / name)), **options)
+    return make_indexer
+
+def activity(node, count, start=0):
+    """`count` payments, one block each, the even ones paid in two contributions"""
+    for i in range(start, start + count):
+        payment_id = node.create_payment(f"Bill #{i}", [BOB, CAROL], [5000, 5000], 100 + i, ALICE)
+        if i % 2 == 0:
+            node.contribute(payment_id, BOB, 50)
+            node.contribute(payment_id, CAROL, 50 + i)
+
+def dump(index):
+    """Everything a reader sees, without the bookkeeping tables"""
+    payments = index.db.execute('SELECT * FROM payments ORDER BY id').fetchall()
+    contributions = index.db.execute('SELECT * FROM contributions ORDER BY block_number, log_index').fetchall()
+    return payments, contributions
+
+def test_resume_from_checkpoint(node, make_indexer):
+    """A restarted indexer only applies the events after its checkpoint"""
+    activity(node, 3)
+    assert make_indexer().sync() == len(node.logs)
+    assert make_indexer().index.get_checkpoint() == node.block_number
+
+    indexed = len(node.logs)
+    activity(node, 2, start=3)
+    indexer = make_indexer()
+    assert indexer.sync() == len(node.logs) - indexed
+    assert indexer.index.get_checkpoint() == node.block_number
+    fresh = make_indexer('fresh.db')
+    fresh.sync()
+    assert dump(indexer.index) == dump(fresh.index)
+
+def synced_each_block(node, make_indexer, count, reorg_depth):
+    """An indexer that saw every block, so it holds the hashes of the last reorg_depth blocks"""
+    indexer = make_indexer(reorg_depth=reorg_depth)
+    for i in range(count):
+        node.create_payment(f"Bill #{i}", [BOB], [10000], 100, ALICE)
+        indexer.sync()
+        node.contribute(i, CAROL, 10 + i)
+        indexer.sync()
+    return indexer
+
+@pytest.mark.parametrize('depth', [1, 3])
+def test_reorg_within_window(node, make_indexer, capsys, depth):
+    """Only the blocks after the fork point are rolled back and read again"""
+    indexer = synced_each_block(node, make_indexer, 6, reorg_depth=4)
+    fork_point = node.block_number - depth
+    node.reorg(depth)
+    activity(node, 2, start=100)
+    indexer.sync()
+    assert f"Reorg detected, rolling back to block {fork_point}" in capsys.readouterr().out
+
+    fresh = make_indexer('fresh.db')
+    fresh.sync()
+    assert dump(indexer.index) == dump(fresh.index)
+
+def test_reorg_deeper_than_window(node, make_indexer, capsys):
+    """With no recorded hash left on the chain, rollback goes reorg_depth past the oldest one"""
+    indexer = synced_each_block(node, make_indexer, 6, reorg_depth=3)
+    oldest = indexer.index.recent_blocks()[-1][0]
+    node.reorg(5)
+    activity(node, 2, start=100)
+    indexer.sync()
+    assert f"Deep reorg detected, rolling back to block {oldest - 3}" in capsys.readouterr().out
+
+    fresh = make_indexer('fresh.db')
+    fresh.sync()
+    assert dump(indexer.index) == dump(fresh.index)
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_backfill_matches_sync(node, make_indexer, workers):
+    """Ranges fetched concurrently are applied in block order, the same as a sequential sync"""
+    activity(node, 12)
+    sequential = make_indexer('sequential.db', chunk_size=5)
+    sequential.sync()
+    parallel = make_indexer('parallel.db', chunk_size=5)
+    assert parallel.backfill(workers=workers) == len(node.logs)
+    assert dump(parallel.index) == dump(sequential.index)
+    assert parallel.index.get_checkpoint() == sequential.index.get_checkpoint() == node.block_number
+
+def test_migrate_old_database(tmp_path):
+    """Indexes made before paging get the sort keys filled in from the stored amounts"""
+    path = str(tmp_path / 'old.db')
+    with sqlite3.connect(path) as db:
+        db.execute("""CREATE TABLE payments (
+            id INTEGER PRIMARY KEY, description TEXT NOT NULL, recipients TEXT NOT NULL,
+            percentages TEXT NOT NULL, total_amount TEXT NOT NULL, collected_amount TEXT NOT NULL,
+            is_active INTEGER NOT NULL, creator TEXT NOT NULL, created_block INTEGER NOT NULL,
+            completed_block INTEGER)""")
+        for payment_id, total, collected in [(0, 10**24, 10**23), (1, 400, 400), (2, 1000, 0)]:
+            db.execute('INSERT INTO payments VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, NULL)',
+                       (payment_id, f"Bill #{payment_id}", json.dumps([BOB]), json.dumps([10000]),
+                        str(total), str(collected), int(collected < total), ALICE, payment_id + 1))
+
+    index = PaymentIndex(path)
+    rows = index.db.execute('SELECT id, total_amount_key, progress_bps FROM payments ORDER BY id').fetchall()
+    assert rows == [(0, amount_key(10**24), 1000), (1, amount_key(400), 10000), (2, amount_key(1000), 0)]
+    assert [payment_id for payment_id, _ in index.page_payments(sort='progress')[0]] == [2, 0, 1]
+    assert [payment_id for payment_id, _ in index.page_payments(sort='total_amount')[0]] == [1, 2, 0]
+    assert index.get_payment(0)[3:5] == [10**24, 10**23]
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Test JSON Provider
+orjson and stdlib encoding produce the same documents
+"""
+
+import json
+from decimal import Decimal
+
+import pytest
+
+import json_provider
+from app import app
+from json_provider import dumps_bytes, iter_json_list
+
+DOCUMENT = {'id': 3, 'total_amount': Decimal('0.05'), 'progress': Decimal('1E-18'), 'is_active': True,
+            'description': 'Déjeuner', 'recipients': ['0x' + '11' * 20]}
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def encoder(request, monkeypatch):
+    if request.param == 'stdlib':
+        monkeypatch.setattr(json_provider, 'orjson', None)
+    elif json_provider.orjson is None:
+        pytest.skip("orjson is not installed")
+    return request.param
+
+def test_compact_sorted_and_exact(encoder):
+    """Decimals are encoded as their exact strings"""
+    assert dumps_bytes(DOCUMENT) == (
+        '{"description":"Déjeuner","id":3,"is_active":true,"progress":"1E-18",'
+        '"recipients":["0x1111111111111111111111111111111111111111"],"total_amount":"0.05"}'
+    ).encode('utf-8')
+
+def test_wei_beyond_64_bits(encoder):
+    """Raw uint256 amounts fall back to the json module instead of failing"""
+    assert dumps_bytes({'wei': 2**256 - 1}) == b'{"wei":%d}' % (2**256 - 1)
+
+def test_unknown_types_still_fail(encoder):
+    with pytest.raises(TypeError):
+        dumps_bytes({'value': object()})
+
+@pytest.mark.parametrize('count', [0, 1, 999, 1000, 2501])
+def test_streamed_list_matches_single_encode(encoder, count):
+    rows = [{'id': i, 'collected_amount': Decimal(i) / 7} for i in range(count)]
+    assert b''.join(iter_json_list(rows)) == dumps_bytes(rows) + b'\n'
+
+def test_jsonify_uses_provider(encoder):
+    with app.app_context():
+        response = app.json.response([DOCUMENT])
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.get_data()) == json.loads(json.dumps([DOCUMENT], default=str))
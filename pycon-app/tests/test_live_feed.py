@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test Live Feed
+Shared log poller pushing payment updates, run against the local stand-in node
+"""
+
+import pytest
+from web3 import Web3
+
+from app import CONTRACT_ABI, CONTRACT_ADDRESS, payment_progress
+from batch_reads import BatchReader
+from benchmarks.stand_in_node import StandInNode, make_payments
+from live_feed import PaymentFeed, sse_message
+from payment_cache import PaymentCache
+
+CONTRIBUTOR = '0x' + '11' * 20
+
+@pytest.fixture
+def node():
+    payments = make_payments(5, seed=3)
+    for payment in payments:
+        payment[4], payment[5] = 0, True
+    with StandInNode(payments) as node:
+        yield node
+
+@pytest.fixture
+def feed(node):
+    w3 = Web3(Web3.HTTPProvider(node.url))
+    contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+    cache = PaymentCache(lambda: w3.eth.block_number, block_ttl=60)
+    return PaymentFeed(w3, contract, cache, BatchReader(w3, contract).get_payments, payment_progress)
+
+@pytest.fixture(autouse=True)
+def no_background_thread(monkeypatch):
+    # Tests drive poll() themselves
+    monkeypatch.setattr(PaymentFeed, '_ensure_started', lambda self: None)
+
+def subscribe(feed, payment_id):
+    updates = []
+    token = feed.subscribe(payment_id, updates.append)
+    return token, updates
+
+def test_contribution_reaches_every_viewer(node, feed):
+    """One poll updates all subscribers of the payment, and only them"""
+    viewers = [subscribe(feed, 1)[1] for _ in range(3)]
+    other = subscribe(feed, 2)[1]
+    feed.poll()
+    assert all(len(updates) == 1 for updates in viewers + [other])
+
+    node.contribute(1, CONTRIBUTOR, 10**18)
+    feed.poll()
+    for updates in viewers:
+        assert len(updates) == 2
+        assert updates[-1]['collected_amount'] == '1'
+        assert updates[-1]['is_active']
+    assert len(other) == 1
+
+def test_completion_is_pushed(node, feed):
+    """Paying the rest sends the final, inactive state"""
+    token, updates = subscribe(feed, 0)
+    feed.poll()
+    node.contribute(0, CONTRIBUTOR, node.payments[0][3])
+    feed.poll()
+    assert updates[-1]['is_active'] is False
+    assert updates[-1]['progress'] == '100'
+
+def test_node_calls_independent_of_viewers(node, feed):
+    """Fifty viewers cost the node exactly what one viewer does"""
+    subscribe(feed, 3)
+    feed.poll()
+
+    def calls_for_contribution():
+        node.contribute(3, CONTRIBUTOR, 1)
+        node.reset_counters()
+        feed.poll()
+        return node.calls
+
+    single = calls_for_contribution()
+    for _ in range(49):
+        subscribe(feed, 3)
+    assert calls_for_contribution() == single
+
+def test_cache_invalidated_by_contribution(node, feed):
+    """The cached getPayment is dropped as soon as a contribution is seen"""
+    subscribe(feed, 4)
+    feed.poll()
+    node.contribute(4, CONTRIBUTOR, 5)
+    feed.poll()
+    assert feed.payment_cache.get(4, lambda i: None)[4] == 5
+
+def test_idle_without_subscribers(node, feed):
+    """Nothing is read once the last viewer leaves"""
+    token, _ = subscribe(feed, 1)
+    feed.poll()
+    feed.unsubscribe(token)
+    node.reset_counters()
+    feed.poll()
+    assert node.calls == 0
+    assert feed.subscriber_count() == 0
+
+def test_sse_message():
+    assert sse_message('progress', '{"id":1}') == 'event: progress\ndata: {"id":1}\n\n'
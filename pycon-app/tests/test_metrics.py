@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test Metrics
+Scrape /metrics after real requests and check names, labels, histogram buckets and the RPC pool callbacks
+"""
+
+import re
+
+import pytest
+from web3 import Web3
+
+import app as app_module
+from app import CONTRACT_ABI, CONTRACT_ADDRESS, app
+from batch_reads import BatchReader, SummaryReader
+from benchmarks.stand_in_node import StandInNode, make_payments
+from metrics import CONTENT_TYPE, DEFAULT_BUCKETS, REGISTRY
+from payment_cache import PaymentCache
+from rpc_pool import PooledHTTPProvider, register_metrics
+
+SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (\S+)$')
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+def scrape(client):
+    """({name: kind}, {(name, labels): value}) from the Prometheus text format"""
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type == CONTENT_TYPE
+    kinds, samples = {}, {}
+    for line in response.get_data(as_text=True).splitlines():
+        if line.startswith('# TYPE '):
+            _, _, name, kind = line.split(' ')
+            kinds[name] = kind
+        elif line and not line.startswith('#'):
+            match = SAMPLE.match(line)
+            assert match, f"not a sample line: {line!r}"
+            name, labels, value = match.groups()
+            samples[(name, tuple(LABEL.findall(labels or '')))] = float(value)
+    return kinds, samples
+
+@pytest.fixture
+def nodes():
+    with StandInNode(make_payments(6, seed=3)) as up, StandInNode() as down:
+        down.fail_with = 503
+        yield up, down
+
+@pytest.fixture
+def client(nodes, monkeypatch):
+    """The app on a pool of a working and a failing node, with its own metric callbacks"""
+    provider = PooledHTTPProvider([node.url for node in reversed(nodes)], hedge_delay=0, cooldown=60)
+    w3 = Web3(provider)
+    contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+    batch_reader = BatchReader(w3, contract)
+    monkeypatch.setattr(app_module, 'w3', w3)
+    monkeypatch.setattr(app_module, 'contract', contract)
+    monkeypatch.setattr(app_module, 'batch_reader', batch_reader)
+    monkeypatch.setattr(app_module, 'summary_reader', SummaryReader(batch_reader))
+    monkeypatch.setattr(app_module, 'summary_cache', PaymentCache(lambda: w3.eth.block_number, block_ttl=0))
+    monkeypatch.setattr(app_module, 'payment_index', None)
+    # register_metrics() replaces the app provider's callbacks; put them back afterwards
+    monkeypatch.setattr(REGISTRY, '_metrics', dict(REGISTRY._metrics))
+    register_metrics(provider)
+    return app.test_client()
+
+def delta(before, after, name, **labels):
+    key = (name, tuple(labels.items()))
+    return after.get(key, 0) - before.get(key, 0)
+
+def test_metric_names_and_types(client):
+    kinds, _ = scrape(client)
+    assert {name: kinds[name] for name in [
+        'http_requests_total', 'http_request_duration_seconds', 'app_errors_total',
+        'rpc_requests_total', 'rpc_request_duration_seconds', 'rpc_errors_total',
+        'rpc_endpoint_requests_total', 'rpc_endpoint_errors_total', 'rpc_endpoint_latency_ms',
+        'rpc_endpoint_up', 'rpc_hedged_requests_total',
+        'payment_cache_hits_total', 'payment_cache_hit_ratio', 'gas_estimate_cache_hits_total',
+        'page_cache_hits_total', 'live_feed_subscribers',
+    ]} == {
+        'http_requests_total': 'counter', 'http_request_duration_seconds': 'histogram',
+        'app_errors_total': 'counter',
+        'rpc_requests_total': 'counter', 'rpc_request_duration_seconds': 'histogram',
+        'rpc_errors_total': 'counter',
+        'rpc_endpoint_requests_total': 'counter', 'rpc_endpoint_errors_total': 'counter',
+        'rpc_endpoint_latency_ms': 'gauge', 'rpc_endpoint_up': 'gauge', 'rpc_hedged_requests_total': 'counter',
+        'payment_cache_hits_total': 'counter', 'payment_cache_hit_ratio': 'gauge',
+        'gas_estimate_cache_hits_total': 'counter', 'page_cache_hits_total': 'counter',
+        'live_feed_subscribers': 'gauge',
+    }
+
+def test_http_requests_by_route_and_status(client):
+    """Requests are labelled with the endpoint name, method and status; unknown paths as 'unmatched'"""
+    _, before = scrape(client)
+    assert client.get('/api/payments').status_code == 200
+    assert client.get('/api/payments', query_string={'limit': 0}).status_code == 400
+    assert client.get('/no/such/page').status_code == 404
+    _, after = scrape(client)
+
+    assert delta(before, after, 'http_requests_total', route='api_payments', method='GET', status='200') == 1
+    assert delta(before, after, 'http_requests_total', route='api_payments', method='GET', status='400') == 1
+    assert delta(before, after, 'http_requests_total', route='unmatched', method='GET', status='404') == 1
+    assert delta(before, after, 'http_request_duration_seconds_count', route='api_payments', method='GET') == 2
+
+@pytest.mark.parametrize('name, labels', [
+    ('http_request_duration_seconds', {'route': 'api_payments', 'method': 'GET'}),
+    ('rpc_request_duration_seconds', {'method': 'batch'}),
+])
+def test_histogram_buckets(client, name, labels):
+    """One cumulative line per bucket and +Inf, ending at _count, with the bucket bound in 'le'"""
+    client.get('/api/payments')
+    _, samples = scrape(client)
+    label_pairs = tuple(labels.items())
+    buckets = [(dict(key[1])['le'], value) for key, value in samples.items()
+               if key[0] == f"{name}_bucket" and key[1][:-1] == label_pairs]
+    assert [le for le, _ in buckets] == [str(bound) for bound in DEFAULT_BUCKETS] + ['+Inf']
+    counts = [count for _, count in buckets]
+    assert counts == sorted(counts)
+    assert counts[-1] == samples[(f"{name}_count", label_pairs)] > 0
+    assert samples[(f"{name}_sum", label_pairs)] > 0
+
+def test_rpc_metrics(client, nodes):
+    """Per-method RPC counts and failures, and per-endpoint health read from the pool at scrape time"""
+    up, down = nodes
+    _, before = scrape(client)
+    # Both endpoints fail once, then the working one answers
+    up.fail_with = 503
+    assert client.get('/api/payments').status_code == 500
+    up.fail_with = None
+    assert client.get('/api/payments').status_code == 200
+    _, after = scrape(client)
+
+    # The request gave up on its first RPC, whichever method web3 sent first
+    assert sum(value - before.get(key, 0) for key, value in after.items()
+               if key[0] == 'rpc_errors_total' and ('kind', 'unavailable') in key[1]) == 1
+    assert delta(before, after, 'app_errors_total', where='api_payments') == 1
+    assert delta(before, after, 'rpc_requests_total', method='eth_call') > 0
+    assert after[('rpc_endpoint_requests_total', (('endpoint', up.url),))] > 0
+    assert after[('rpc_endpoint_errors_total', (('endpoint', up.url),))] == 1
+    assert after[('rpc_endpoint_errors_total', (('endpoint', down.url),))] >= 1
+    assert after[('rpc_endpoint_up', (('endpoint', up.url),))] == 1
+    assert after[('rpc_endpoint_latency_ms', (('endpoint', up.url),))] >= 0
+    assert ('rpc_endpoint_latency_ms', (('endpoint', down.url),)) not in after
+    assert after[('rpc_hedged_requests_total', ())] == 0
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test Page Cache
+Rendered page reuse, conditional GET validators and content-hashed static names
+"""
+
+import os
+
+from werkzeug.http import http_date
+
+from page_cache import PageCache, not_modified
+from static_assets import StaticAssets
+
+def counting_render(pages):
+    calls = []
+    def render():
+        calls.append(1)
+        return pages[len(calls) - 1]
+    return render, calls
+
+def test_same_version_is_rendered_once():
+    cache = PageCache()
+    render, calls = counting_render(['<p>1</p>'])
+    first = cache.get('view_payment.html', 7, (0, True), render)
+    assert cache.get('view_payment.html', 7, (0, True), render) is first
+    assert len(calls) == 1
+    assert cache.stats() == {'size': 1, 'hits': 1, 'misses': 1}
+
+def test_new_version_renders_again():
+    """A contribution changes the version, the page and its ETag"""
+    cache = PageCache()
+    render, calls = counting_render(['<p>0%</p>', '<p>50%</p>'])
+    before = cache.get('view_payment.html', 7, (0, True), render)
+    after = cache.get('view_payment.html', 7, (5, True), render)
+    assert len(calls) == 2
+    assert after.body == '<p>50%</p>'
+    assert after.etag != before.etag
+
+def test_lru_eviction():
+    cache = PageCache(max_size=2)
+    for payment_id in range(3):
+        cache.get('view_payment.html', payment_id, None, lambda: str(payment_id))
+    render, calls = counting_render(['0'])
+    cache.get('view_payment.html', 0, None, render)
+    assert len(calls) == 1
+    assert cache.stats()['size'] == 2
+
+def test_not_modified():
+    page = PageCache().get('index.html', None, 3, lambda: '<html></html>')
+    assert not_modified(page, f'"{page.etag}"', None)
+    assert not_modified(page, f'"other", W/"{page.etag}"', None)
+    assert not not_modified(page, '"other"', None)
+    assert not_modified(page, None, http_date(page.last_modified))
+    assert not not_modified(page, None, http_date(page.last_modified - 1))
+    # If-None-Match takes precedence over If-Modified-Since
+    assert not not_modified(page, '"other"', http_date(page.last_modified))
+    assert not not_modified(page, None, None)
+
+def test_static_hashed_names(tmp_path):
+    (tmp_path / 'css').mkdir()
+    stylesheet = tmp_path / 'css' / 'style.css'
+    stylesheet.write_text('body {}')
+    assets = StaticAssets(str(tmp_path))
+
+    hashed = assets.hashed_name('css/style.css')
+    assert hashed.startswith('css/style.') and hashed.endswith('.css') and hashed != 'css/style.css'
+    assert assets.resolve(hashed) == ('css/style.css', True)
+    assert assets.resolve('css/style.css') == ('css/style.css', False)
+    assert assets.hashed_name('missing.js') == 'missing.js'
+
+    # Editing the file changes its URL; the old URL still resolves, but not as immutable
+    stylesheet.write_text('body { color: red }')
+    os.utime(stylesheet, ns=(0, os.stat(stylesheet).st_mtime_ns + 10**9))
+    assert assets.hashed_name('css/style.css') != hashed
+    assert assets.resolve(hashed) == ('css/style.css', False)
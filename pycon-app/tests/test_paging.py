@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test Paging
+/api/payments cursors and filters, from the payment index and from RPC reads on the stand-in node
+"""
+
+import base64
+import json
+
+import pytest
+from web3 import Web3
+
+import app as app_module
+from app import CONTRACT_ABI, CONTRACT_ADDRESS, app
+from batch_reads import BatchReader, SummaryReader
+from benchmarks.stand_in_node import StandInNode
+from indexer import LogIndexer, PaymentIndex, amount_key
+from paging import decode_cursor, encode_cursor, parse_page_query
+from payment_cache import PaymentCache
+
+ALICE = '0x' + '11' * 20
+BOB = '0x' + '22' * 20
+CAROL = Web3.to_checksum_address('0x' + '33' * 20)
+
+def raw_cursor(value):
+    """Cursor for any JSON value, the way a client could forge one"""
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip('=')
+
+@pytest.fixture(scope='module')
+def node():
+    with StandInNode() as node:
+        for i in range(25):
+            creator = CAROL if i % 3 == 0 else ALICE
+            payment_id = node.create_payment(f"Bill #{i}", [BOB], [10000], 1000 + i, creator)
+            if i % 4 == 0:
+                node.contribute(payment_id, BOB, 1000 + i)
+            elif i % 4 == 1:
+                node.contribute(payment_id, BOB, 10 * i)
+        yield node
+
+@pytest.fixture(params=['index', 'rpc'])
+def client(request, node, monkeypatch, tmp_path):
+    w3 = Web3(Web3.HTTPProvider(node.url))
+    contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+    batch_reader = BatchReader(w3, contract)
+    payment_index = None
+    if request.param == 'index':
+        payment_index = PaymentIndex(str(tmp_path / 'payments.db'))
+        LogIndexer(w3, contract, payment_index).sync()
+    monkeypatch.setattr(app_module, 'w3', w3)
+    monkeypatch.setattr(app_module, 'contract', contract)
+    monkeypatch.setattr(app_module, 'batch_reader', batch_reader)
+    monkeypatch.setattr(app_module, 'summary_reader', SummaryReader(batch_reader))
+    monkeypatch.setattr(app_module, 'summary_cache', PaymentCache(lambda: w3.eth.block_number, block_ttl=0))
+    monkeypatch.setattr(app_module, 'payment_index', payment_index)
+    return app.test_client()
+
+def walk(client, query):
+    """Ids of every page of /api/payments, following X-Next-Cursor"""
+    ids = []
+    cursor = None
+    while True:
+        response = client.get('/api/payments', query_string=dict(query, **({'cursor': cursor} if cursor else {})))
+        assert response.status_code == 200
+        ids += [row['id'] for row in response.get_json()]
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            return ids
+
+@pytest.mark.parametrize('sort, descending, after', [
+    ('id', False, (7, 7)),
+    ('progress', True, (5000, 3)),
+    ('total_amount', False, (amount_key(10**30), 12)),
+])
+def test_cursor_round_trip(sort, descending, after):
+    assert decode_cursor(encode_cursor(sort, descending, after)) == (sort, descending, after)
+
+@pytest.mark.parametrize('query, matches', [
+    ({}, lambda payment: True),
+    ({'is_active': 'true'}, lambda payment: payment[5]),
+    ({'is_active': '0'}, lambda payment: not payment[5]),
+    ({'creator': CAROL.lower()}, lambda payment: payment[6] == CAROL),
+    ({'creator': CAROL, 'is_active': 'false'}, lambda payment: payment[6] == CAROL and not payment[5]),
+])
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+def test_filtered_pages(client, node, query, matches, order):
+    """Following the cursors visits every matching payment once, in order"""
+    expected = [i for i, payment in enumerate(node.payments) if matches(payment)]
+    if order == 'desc':
+        expected.reverse()
+    assert walk(client, dict(query, limit=4, order=order)) == expected
+
+def test_sorted_pages(client, node):
+    """Sorting by progress needs the index; pages follow (progress, id)"""
+    response = client.get('/api/payments', query_string={'sort': 'progress', 'limit': 4})
+    if app_module.payment_index is None:
+        assert response.status_code == 400
+        return
+    progress = {i: payment[4] * 10000 // payment[3] for i, payment in enumerate(node.payments)}
+    assert walk(client, {'sort': 'progress', 'limit': 4}) == sorted(progress, key=lambda i: (progress[i], i))
+
+@pytest.mark.parametrize('cursor', [
+    'not base64 at all!',
+    raw_cursor("id"),
+    raw_cursor(['id', False]),
+    raw_cursor(['name', False, [1, 1]]),
+    raw_cursor(['id', 'no', [1, 1]]),
+    raw_cursor(['id', False, 7]),
+    raw_cursor(['id', False, [1]]),
+    raw_cursor(['id', False, [1, 1, 1]]),
+    raw_cursor(['id', False, [1, "1"]]),
+    raw_cursor(['id', False, [1, True]]),
+    raw_cursor(['id', False, [1, -1]]),
+    raw_cursor(['id', False, [1, 1.5]]),
+    raw_cursor(['id', False, ["1", 1]]),
+    raw_cursor(['progress', False, [None, 1]]),
+    raw_cursor(['total_amount', False, [5, 1]]),
+    raw_cursor(['total_amount', False, ["5", 1]]),
+])
+def test_tampered_cursor(client, cursor):
+    """Forged cursors are a 400, not a 500 from deep inside the page query"""
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        parse_page_query({'cursor': cursor})
+    response = client.get('/api/payments', query_string={'cursor': cursor})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': "Invalid cursor"}
+
+def test_cursor_for_another_sort(client):
+    cursor = encode_cursor('id', True, (3, 3))
+    response = client.get('/api/payments', query_string={'cursor': cursor, 'order': 'asc'})
+    assert response.status_code == 400
+    assert response.get_json() == {'error': "cursor does not match sort and order"}
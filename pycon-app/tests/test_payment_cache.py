@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Test Payment Cache
+Completed payments kept for good, active ones for one block, LRU eviction and invalidation
+"""
+
+import pytest
+
+from payment_cache import FINAL, PaymentCache
+
+ALICE = '0x' + '11' * 20
+
+def payment(total=100, collected=0, is_active=True):
+    return ["Lunch", [ALICE], [10000], total, collected, is_active, ALICE]
+
+class Chain:
+    """Block number source that counts how often it is read"""
+
+    def __init__(self):
+        self.block = 1
+        self.reads = 0
+
+    def __call__(self):
+        self.reads += 1
+        return self.block
+
+class Loader:
+    """load_many() over a dict of payments, recording the ids it was asked for"""
+
+    def __init__(self, payments):
+        self.payments = payments
+        self.loaded = []
+
+    def __call__(self, payment_ids):
+        self.loaded.append(list(payment_ids))
+        return [self.payments.get(payment_id) for payment_id in payment_ids]
+
+@pytest.fixture
+def chain():
+    return Chain()
+
+def test_completed_payment_is_final(chain):
+    """A completed payment is never read again, however many blocks pass"""
+    cache = PaymentCache(chain, block_ttl=0)
+    load = Loader({1: payment(collected=100, is_active=False)})
+    cache.get_many([1], load)
+    for block in range(2, 6):
+        chain.block = block
+        cache.get_many([1], load)
+    assert load.loaded == [[1]]
+    assert cache._entries[1][1] is FINAL
+
+def test_active_payment_lives_one_block(chain):
+    """An active payment is tagged with its block and read again once the block changes"""
+    cache = PaymentCache(chain, block_ttl=0)
+    load = Loader({1: payment(collected=40)})
+    cache.get_many([1], load)
+    cache.get_many([1], load)
+    assert load.loaded == [[1]]
+    chain.block = 2
+    load.payments[1] = payment(collected=70)
+    assert cache.get_many([1], load) == [payment(collected=70)]
+    assert load.loaded == [[1], [1]]
+    assert cache.stats()['hits'] == 1
+
+def test_only_misses_are_loaded(chain):
+    """Hits and misses mix in one call; the misses are loaded together, in order"""
+    cache = PaymentCache(chain, block_ttl=0)
+    load = Loader({i: payment(total=100 + i) for i in range(6)})
+    cache.get_many([1, 3], load)
+    assert [p[3] for p in cache.get_many(range(6), load)] == [100, 101, 102, 103, 104, 105]
+    assert load.loaded == [[1, 3], [0, 2, 4, 5]]
+
+def test_missing_and_unknown_not_final(chain):
+    """None is not cached; an id past the end (empty, inactive struct) only lives one block"""
+    cache = PaymentCache(chain, block_ttl=0)
+    load = Loader({2: payment(total=0, is_active=False)})
+    assert cache.get_many([1, 2], load) == [None, payment(total=0, is_active=False)]
+    assert 1 not in cache._entries
+    assert cache._entries[2][1] == 1
+    chain.block = 2
+    cache.get_many([1, 2], load)
+    assert load.loaded == [[1, 2], [1, 2]]
+
+def test_block_number_read_once_per_ttl(chain):
+    """Within block_ttl the cached block number is trusted, so active entries stay valid"""
+    cache = PaymentCache(chain, block_ttl=3600)
+    load = Loader({1: payment()})
+    cache.get_many([1], load)
+    chain.block = 2
+    cache.get_many([1], load)
+    assert chain.reads == 1
+    assert load.loaded == [[1]]
+
+def test_invalidate(chain):
+    """Invalidating drops even a final entry; unknown ids are not counted"""
+    cache = PaymentCache(chain, block_ttl=0)
+    load = Loader({1: payment(collected=100, is_active=False), 2: payment()})
+    cache.get_many([1, 2], load)
+    cache.invalidate(1)
+    cache.invalidate(2)
+    cache.invalidate(99)
+    assert cache.stats()['invalidations'] == 2
+    cache.get_many([1, 2], load)
+    assert load.loaded == [[1, 2], [1, 2]]
+
+def test_lru_eviction(chain):
+    """Reads refresh an entry's position, so the least recently used one goes first"""
+    cache = PaymentCache(chain, max_size=2, block_ttl=0)
+    load = Loader({i: payment(collected=100, is_active=False) for i in range(3)})
+    cache.get_many([0, 1], load)
+    cache.get_many([0], load)
+    cache.get_many([2], load)
+    assert list(cache._entries) == [0, 2]
+    assert cache.stats()['evictions'] == 1
+
+def test_payment_count_once_per_block(chain):
+    cache = PaymentCache(chain, block_ttl=0)
+    counts = iter([5, 6])
+    assert [cache.payment_count(lambda: next(counts)) for _ in range(3)] == [5, 5, 5]
+    chain.block = 2
+    assert cache.payment_count(lambda: next(counts)) == 6
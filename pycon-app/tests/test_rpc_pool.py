@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test Pooled RPC Providers
+Failover, breakers, hedging and keep-alive against several local stand-in nodes
+"""
+
+import asyncio
+import time
+
+import pytest
+from web3 import AsyncWeb3, Web3
+
+from app import CONTRACT_ABI, CONTRACT_ADDRESS
+from batch_reads import AsyncBatchReader, BatchReader
+from benchmarks.stand_in_node import StandInNode, make_payments
+from rpc_pool import AsyncPooledHTTPProvider, PooledHTTPProvider
+
+@pytest.fixture
+def nodes():
+    """Three stand-in nodes serving the same chain"""
+    payments = make_payments(30)
+    started = [StandInNode(payments).start() for _ in range(3)]
+    yield started
+    for node in started:
+        node.stop()
+
+def provider_for(nodes, **options):
+    options.setdefault('hedge_delay', 0)
+    options.setdefault('cooldown', 60)
+    return PooledHTTPProvider([node.url for node in nodes], **options)
+
+def test_fails_over_when_an_endpoint_is_down(nodes):
+    """Every request succeeds while one node answers 503"""
+    nodes[0].fail_with = 503
+    w3 = Web3(provider_for(nodes))
+    assert [w3.eth.block_number for _ in range(20)] == [1] * 20
+    assert nodes[1].calls + nodes[2].calls >= 20
+
+def test_breaker_opens_and_recovers(nodes):
+    """After failure_threshold errors a node gets no traffic until the cooldown passes"""
+    nodes[0].fail_with = 503
+    provider = provider_for(nodes, failure_threshold=2, cooldown=0.3)
+    w3 = Web3(provider)
+    while provider.stats()['endpoints'][0]['state'] != 'open':
+        w3.eth.block_number
+
+    nodes[0].reset_counters()
+    for _ in range(20):
+        w3.eth.block_number
+    assert nodes[0].calls == 0
+
+    nodes[0].fail_with = None
+    time.sleep(0.35)
+    assert provider.stats()['endpoints'][0]['state'] == 'half-open'
+    while provider.stats()['endpoints'][0]['state'] != 'closed':
+        w3.eth.block_number
+    assert provider.stats()['endpoints'][0]['errors'] >= 2
+
+def test_all_breakers_open_still_tries(nodes):
+    """With every endpoint tripped the request is attempted rather than refused"""
+    for node in nodes:
+        node.fail_with = 503
+    w3 = Web3(provider_for(nodes, failure_threshold=1))
+    with pytest.raises(Exception):
+        w3.eth.block_number
+    nodes[2].fail_with = None
+    assert w3.eth.block_number == 1
+
+def test_routes_by_latency(nodes):
+    """The fastest node takes most of the traffic, slower ones are still sampled"""
+    nodes[0].latency = 0.04
+    nodes[1].latency = 0.04
+    w3 = Web3(provider_for(nodes))
+    for _ in range(100):
+        w3.eth.block_number
+    assert nodes[2].calls > 60
+    assert nodes[0].calls + nodes[1].calls > 0
+
+def test_hedges_slow_reads(nodes):
+    """A read stuck on a slow node is answered by the next one after hedge_delay"""
+    for node in nodes:
+        node.latency = 0.5
+    provider = provider_for(nodes, hedge_delay=0.05)
+    w3 = Web3(provider)
+    w3.eth.block_number  # measure latencies
+    nodes[1].latency = nodes[2].latency = 0
+
+    started = time.perf_counter()
+    for _ in range(5):
+        assert w3.eth.block_number == 1
+    assert time.perf_counter() - started < 5 * 0.5
+    assert provider.stats()['hedges'] >= 1
+
+def test_writes_are_not_hedged(nodes):
+    """A transaction is never sent to two nodes"""
+    for node in nodes:
+        node.latency = 0.1
+    w3 = Web3(provider_for(nodes, hedge_delay=0.01))
+    for node in nodes:
+        node.reset_counters()
+    response = w3.provider.make_request('eth_sendRawTransaction', ['0x00'])
+    assert 'error' in response
+    assert sum(node.calls for node in nodes) == 1
+
+def test_reuses_connections(nodes):
+    """Keep-alive: sequential requests share one connection per node"""
+    w3 = Web3(provider_for(nodes[:1]))
+    for _ in range(25):
+        w3.eth.block_number
+    assert nodes[0].calls == 25
+    assert nodes[0].connections == 1
+
+def test_batch_reads_go_through_the_pool(nodes):
+    """BatchReader batches fail over like single requests"""
+    nodes[0].fail_with = 503
+    w3 = Web3(provider_for(nodes))
+    contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+    payments = BatchReader(w3, contract, batch_size=10).get_payments(range(30))
+    assert payments == nodes[1].payments
+
+def test_async_provider(nodes):
+    """The AsyncWeb3 provider fails over, hedges and carries batches too"""
+    nodes[0].fail_with = 503
+    nodes[1].latency = 0.5
+
+    async def run():
+        provider = AsyncPooledHTTPProvider([node.url for node in nodes], hedge_delay=0.05)
+        w3 = AsyncWeb3(provider)
+        contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+        numbers = [await w3.eth.block_number for _ in range(10)]
+        payments = await AsyncBatchReader(w3, contract, batch_size=10).get_payments(range(30))
+        await provider.close()
+        return numbers, payments
+
+    numbers, payments = asyncio.run(run())
+    assert numbers == [1] * 10
+    assert payments == nodes[2].payments
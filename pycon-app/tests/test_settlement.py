@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Test Settlement
+Locked funds per payment from /api/settlement, against the local stand-in node
+"""
+
+import pytest
+from web3 import Web3
+
+import app as app_module
+from app import CONTRACT_ABI, CONTRACT_ADDRESS, app
+from batch_reads import BatchReader
+from benchmarks.stand_in_node import StandInNode
+from shares import LEGACY_SHARE_DENOMINATOR, SHARE_DENOMINATOR
+
+ALICE = '0x' + '11' * 20
+BOB = '0x' + '22' * 20
+CAROL = '0x' + '33' * 20
+
+def shares(node, *percentages):
+    """Whole percentages in the node's share units"""
+    return [percentage * node.share_denominator // 100 for percentage in percentages]
+
+# Contracts that refund overpayment also use basis points; earlier ones neither
+@pytest.fixture(params=[(True, SHARE_DENOMINATOR), (False, LEGACY_SHARE_DENOMINATOR)], ids=['refunds', 'legacy'])
+def node(request):
+    refunds_overpayment, share_denominator = request.param
+    with StandInNode(refunds_overpayment=refunds_overpayment, share_denominator=share_denominator) as node:
+        open_id = node.create_payment("Open", [ALICE, BOB], shares(node, 50, 50), 100, ALICE)
+        node.contribute(open_id, CAROL, 40)
+        # 33% of 101 Wei rounds down
+        dusty = node.create_payment("Dusty", [ALICE, BOB, CAROL], shares(node, 33, 33, 34), 101, ALICE)
+        node.contribute(dusty, CAROL, 101)
+        overpaid = node.create_payment("Overpaid", [ALICE], shares(node, 100), 100, ALICE)
+        node.contribute(overpaid, BOB, 60)
+        node.contribute(overpaid, CAROL, 70)
+        node.create_payment("Untouched", [BOB], shares(node, 100), 100, ALICE)
+        yield node
+
+@pytest.fixture
+def client(node, monkeypatch):
+    w3 = Web3(Web3.HTTPProvider(node.url))
+    contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+    monkeypatch.setattr(app_module, 'w3', w3)
+    monkeypatch.setattr(app_module, 'contract', contract)
+    monkeypatch.setattr(app_module, 'batch_reader', BatchReader(w3, contract))
+    return app.test_client()
+
+def test_locked_per_payment(client, node):
+    """Open payments hold their collections; legacy contracts also keep overpayment and dust"""
+    settlement = client.get('/api/settlement').get_json()
+
+    assert settlement['refunds_overpayment'] == node.refunds_overpayment
+    assert settlement['share_denominator'] == node.share_denominator
+    locked = {row['id']: int(row['locked_wei']) for row in settlement['payments']}
+    if node.refunds_overpayment:
+        assert locked == {0: 40}
+    else:
+        assert locked == {0: 40, 1: 1, 2: 30}
+    assert settlement['locked_wei'] == str(sum(locked.values()))
+    assert settlement['contract_balance_wei'] == settlement['locked_wei']
+    assert settlement['unaccounted_wei'] == '0'
+
+def test_one_batched_read(client, node):
+    """The flag and every payment go out in one JSON-RPC batch, however many payments exist"""
+    node.reset_counters()
+    assert client.get('/api/settlement').status_code == 200
+    round_trips = node.round_trips
+
+    for i in range(50):
+        node.create_payment(f"More {i}", [BOB], shares(node, 100), 100, ALICE)
+    node.reset_counters()
+    assert client.get('/api/settlement').status_code == 200
+    assert node.round_trips == round_trips
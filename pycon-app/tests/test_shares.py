@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test Payment Shares
+Form percentages in basis points, and whole percentages on legacy contracts
+"""
+
+from decimal import Decimal
+
+import pytest
+from web3 import Web3
+from werkzeug.datastructures import MultiDict
+
+import app as app_module
+from app import CONTRACT_ABI, CONTRACT_ADDRESS, FormError, parse_payment_form, payment_details
+from benchmarks.stand_in_node import StandInNode
+from shares import LEGACY_SHARE_DENOMINATOR, SHARE_DENOMINATOR, parse_percentage, share_percent
+
+ALICE = '0x' + '11' * 20
+BOB = '0x' + '22' * 20
+CAROL = '0x' + '33' * 20
+
+def form(*percentages, recipients=(ALICE, BOB, CAROL)):
+    return MultiDict([('description', "Team lunch"), ('total_amount', "0.3")]
+                     + [('recipients[]', recipient) for recipient in recipients]
+                     + [('percentages[]', percentage) for percentage in percentages])
+
+@pytest.mark.parametrize('text, denominator, share', [
+    ("33.33", SHARE_DENOMINATOR, 3333),
+    ("25", SHARE_DENOMINATOR, 2500),
+    (" 0.01 ", SHARE_DENOMINATOR, 1),
+    ("100", SHARE_DENOMINATOR, 10000),
+    ("40", LEGACY_SHARE_DENOMINATOR, 40),
+    ("40.00", LEGACY_SHARE_DENOMINATOR, 40),
+])
+def test_parse_percentage(text, denominator, share):
+    assert parse_percentage(text, denominator) == share
+    assert share_percent(share, denominator) == Decimal(text)
+
+@pytest.mark.parametrize('text, denominator', [
+    ("0.001", SHARE_DENOMINATOR),
+    ("33.3", LEGACY_SHARE_DENOMINATOR),
+    ("0", SHARE_DENOMINATOR),
+    ("100.01", SHARE_DENOMINATOR),
+    ("-5", SHARE_DENOMINATOR),
+    ("", SHARE_DENOMINATOR),
+    ("half", SHARE_DENOMINATOR),
+    ("nan", SHARE_DENOMINATOR),
+])
+def test_invalid_percentage(text, denominator):
+    with pytest.raises(ValueError):
+        parse_percentage(text, denominator)
+
+def test_form_in_basis_points():
+    """Two-decimal percentages that add up to 100% are sent as basis points"""
+    _, total, recipients, percentages = parse_payment_form(form("33.33", "33.33", "33.34"), SHARE_DENOMINATOR)
+    assert total == 3 * 10**17
+    assert recipients == [ALICE, BOB, CAROL]
+    assert percentages == [3333, 3333, 3334]
+
+@pytest.mark.parametrize('percentages, denominator, message', [
+    (("33.33", "33.33", "33.33"), SHARE_DENOMINATOR, "Percentages must add up to 100%"),
+    (("33.333", "33.333", "33.334"), SHARE_DENOMINATOR, "in steps of 0.01"),
+    (("33.33", "33.33", "33.34"), LEGACY_SHARE_DENOMINATOR, "in steps of 1"),
+    (("50", "50"), SHARE_DENOMINATOR, "Every recipient needs a percentage"),
+])
+def test_form_rejected(percentages, denominator, message):
+    with pytest.raises(FormError, match=message):
+        parse_payment_form(form(*percentages), denominator)
+
+def test_legacy_form_in_whole_percentages():
+    assert parse_payment_form(form("40", "30", "30"), LEGACY_SHARE_DENOMINATOR)[3] == [40, 30, 30]
+
+def test_details_show_percent():
+    payment = ["Lunch", [ALICE, BOB], [3333, 6667], 10**18, 0, True, ALICE]
+    assert payment_details(0, payment, SHARE_DENOMINATOR)['percentages'] == [Decimal("33.33"), Decimal("66.67")]
+    payment[2] = [40, 60]
+    assert payment_details(0, payment, LEGACY_SHARE_DENOMINATOR)['percentages'] == [40, 60]
+
+@pytest.mark.parametrize('denominator', [SHARE_DENOMINATOR, LEGACY_SHARE_DENOMINATOR])
+def test_share_denominator_read_once(monkeypatch, denominator):
+    """Read from the contract on first use; contracts without SHARE_DENOMINATOR use whole percentages"""
+    with StandInNode(share_denominator=denominator) as node:
+        w3 = Web3(Web3.HTTPProvider(node.url))
+        monkeypatch.setattr(app_module, 'contract', w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI))
+        app_module.share_denominator.cache_clear()
+        try:
+            assert app_module.share_denominator() == denominator
+            node.reset_counters()
+            assert app_module.share_denominator() == denominator
+            assert node.calls == 0
+        finally:
+            app_module.share_denominator.cache_clear()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test Summary Reads
+getPayments/getPaymentSummaries pages and the getPayment fallback, against the local stand-in node
+"""
+
+import pytest
+from web3 import Web3
+
+from app import CONTRACT_ABI, CONTRACT_ADDRESS, payment_summary
+from batch_reads import BatchReader, SummaryReader
+from benchmarks.stand_in_node import StandInNode, make_payments
+
+PAYMENTS = make_payments(45, seed=11)
+
+def reader(node, page_size=10):
+    w3 = Web3(Web3.HTTPProvider(node.url))
+    contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=CONTRACT_ABI)
+    return SummaryReader(BatchReader(w3, contract), page_size=page_size)
+
+@pytest.fixture(params=[True, False], ids=['summaries', 'fallback'])
+def summary_reader(request):
+    with StandInNode(PAYMENTS, summaries=request.param) as node:
+        yield reader(node)
+
+@pytest.mark.parametrize('payment_ids', [
+    list(range(45)),
+    list(range(44, -1, -1)),
+    [7, 3, 30, 3],
+    [12],
+])
+def test_listing_matches_get_payment(summary_reader, payment_ids):
+    """Listing rows are the same whether read from summaries or getPayment tuples"""
+    rows = summary_reader.get_summaries(payment_ids)
+    assert [payment_summary(i, row) for i, row in zip(payment_ids, rows)] == \
+        [payment_summary(i, PAYMENTS[i]) for i in payment_ids]
+    assert [row[6] for row in rows] == [PAYMENTS[i][6] for i in payment_ids]
+
+def test_summary_fields():
+    """Summaries carry the id and recipient count in place of the arrays"""
+    with StandInNode(PAYMENTS) as node:
+        summary = reader(node).get_summaries([4])[0]
+    description, recipients, _, total, collected, is_active, creator = PAYMENTS[4]
+    assert summary == (description, 4, len(recipients), total, collected, is_active, creator)
+
+def test_one_call_per_page():
+    """45 consecutive ids at 10 per page are 5 eth_calls in one JSON-RPC batch"""
+    with StandInNode(PAYMENTS) as node:
+        summary_reader = reader(node)
+        assert summary_reader.supported()
+        node.reset_counters()
+        summary_reader.get_summaries(range(45))
+        assert (node.round_trips, node.calls) == (1, 5)
+
+def test_ids_past_the_end():
+    """getPayments stops at the last payment; missing ids come back as None"""
+    with StandInNode(PAYMENTS) as node:
+        rows = reader(node).get_summaries(range(40, 50))
+    assert [row is None for row in rows] == [False] * 5 + [True] * 5
+
+def test_fallback_detected_once():
+    """Without the summary views every read goes through getPayment"""
+    with StandInNode(PAYMENTS, summaries=False) as node:
+        summary_reader = reader(node)
+        assert not summary_reader.supported()
+        node.reset_counters()
+        summary_reader.get_summaries(range(20))
+        assert node.calls == 20